@@ -0,0 +1,139 @@
+"""Admission control for research runs: bounded concurrency with fast rejection.
+
+At most ``ADMISSION_MAX_CONCURRENT`` runs execute at once. Further requests
+wait in a FIFO queue of at most ``ADMISSION_QUEUE_SIZE``; beyond that, and
+for any client that already has ``ADMISSION_PER_CLIENT`` requests admitted
+or waiting, the request is rejected immediately so the API can answer 429
+instead of piling more calls onto Gemini and Tavily.
+
+Only ``/v1/agent/invoke`` and ``/v1/agent/stream`` are admitted here.
+Background jobs are limited separately by their ``JOB_WORKERS`` workers,
+so at most ``ADMISSION_MAX_CONCURRENT + JOB_WORKERS`` runs execute at once.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 16))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 64))
+ADMISSION_PER_CLIENT = int(os.getenv("ADMISSION_PER_CLIENT", 4))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 30))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 5))
+# Requests are attributed to this header's value, else to the peer address.
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "X-Client-ID")
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted; ``reason`` says why."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class AdmissionController:
+    """Global concurrency limit with a bounded wait queue and per-client caps.
+
+    Slots are handed directly from a finishing run to the oldest waiter, so
+    a newcomer can never overtake the queue. ``per_client`` of 0 disables
+    the per-client cap.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        per_client: int = ADMISSION_PER_CLIENT,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._clients: Dict[str, int] = {}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: str, message: str) -> Rejected:
+        ADMISSION_REJECTIONS[reason].inc()
+        return Rejected(reason, message)
+
+    async def acquire(self, client: str) -> None:
+        """Wait for a run slot for ``client``; raise Rejected if none is coming."""
+        if self.per_client and self._clients.get(client, 0) >= self.per_client:
+            raise self._reject(
+                "client_limit",
+                f"Client already has {self.per_client} requests in progress",
+            )
+        started = time.perf_counter()
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+        elif len(self._waiters) >= self.queue_size:
+            raise self._reject(
+                "queue_full", f"{self.queue_size} requests are already waiting"
+            )
+        else:
+            await self._wait(client)
+        self._clients[client] = self._clients.get(client, 0) + 1
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+    async def _wait(self, client: str) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        # Count the waiter against its client while it queues.
+        self._clients[client] = self._clients.get(client, 0) + 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(
+                "timeout", f"No run slot freed up within {self.queue_timeout:g}s"
+            )
+        except asyncio.CancelledError:
+            # A slot handed over just before the caller went away is passed on.
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._forget(client)
+
+    def release(self, client: str) -> None:
+        """Give back the slot taken by ``acquire``."""
+        self._forget(client)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _forget(self, client: str) -> None:
+        remaining = self._clients.get(client, 0) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return running and waiting counts and the configured limits."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "per_client": self.per_client,
+            "clients": len(self._clients),
+        }
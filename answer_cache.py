@@ -0,0 +1,94 @@
+"""Cache of complete research answers, keyed by normalized query.
+
+Repeated questions are answered from the cache instead of re-running the
+whole draft/search/revise loop. Optionally, reworded questions whose
+content words match closely enough (Jaccard over stopword-free token
+sets, computed locally) are served the same answer.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from text_utils import content_tokens, jaccard, normalize_query
+
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 6 * 60 * 60))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 512))
+ANSWER_CACHE_NEAR_DUPLICATES = os.getenv(
+    "ANSWER_CACHE_NEAR_DUPLICATES", "false"
+).lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.9))
+
+
+class AnswerCache:
+    """LRU cache of finished answers with TTL and optional near-duplicate lookup."""
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl: float = ANSWER_CACHE_TTL,
+        near_duplicates: bool = ANSWER_CACHE_NEAR_DUPLICATES,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, tuple[float, frozenset, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[Any]:
+        """Return the cached answer for ``query`` or a near-duplicate of it."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+
+            if self.near_duplicates:
+                tokens = content_tokens(query)
+                best_key, best_score = None, self.similarity
+                for other_key, (expires_at, other_tokens, _) in self._entries.items():
+                    if expires_at < now:
+                        continue
+                    score = jaccard(tokens, other_tokens)
+                    if score >= best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.near_hits += 1
+                    return self._entries[best_key][2]
+
+            self.misses += 1
+            return None
+
+    def set(self, query: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, content_tokens(query), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of cached answers."""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
@@ -1,21 +1,123 @@
 """FastAPI application for the Reflexion Research Agent."""
 
-from typing import List, Optional
+# Loads .env before any module reads its settings, so it must stay first.
+import env  # noqa: F401  # isort: skip
 
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+import asyncio
+import contextlib
+import functools
+import os
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from pydantic import BaseModel, Field
+from pydantic_core import to_json
+
+from admission import (
+    ADMISSION_CLIENT_HEADER,
+    ADMISSION_RETRY_AFTER,
+    AdmissionController,
+    Rejected,
+)
+from answer_cache import AnswerCache
+from chains import llm_cache
+from checkpoints import ThreadBusy, ThreadLocks, resume_input
+from jobs import Job, JobManager, QueueFull
+from main import DeadlineExceeded, extract_answer_from_messages, get_graph, warm_up
+from metrics import registry
+from singleflight import SingleFlight
+from text_utils import normalize_query
+from tool_executor import search_cache
+
+# Build the graph and the LLM and search clients before serving traffic.
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Responses at least this large are gzipped for clients that accept it.
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", 1000))
+
+# Compiled on first use, or by the startup warm-up; tests install their own.
+graph = None
+
+
+def agent_graph():
+    """Return the graph requests run on, compiling it if nothing has yet."""
+    global graph
+    if graph is None:
+        graph = get_graph()
+    return graph
+
 
-from main import graph
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    from tavily_client import pooled_connections
+
+    if WARM_UP_ON_STARTUP:
+        await asyncio.to_thread(warm_up)
+    async with pooled_connections():
+        yield
 
-load_dotenv()
 
 app = FastAPI(
     title="Reflexion Research Agent API",
     description="An intelligent research assistant that generates high-quality, well-researched answers through self-reflection and iterative improvement.",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+answer_cache = AnswerCache()
+in_flight = SingleFlight()
+run_threads = ThreadLocks()
+admission = AdmissionController()
+
+registry.callback(
+    "reflexion_search_cache_hits_total",
+    "Search queries answered from the search-result cache.",
+    lambda: search_cache.hits,
+)
+registry.callback(
+    "reflexion_search_cache_misses_total",
+    "Search queries that missed the search-result cache.",
+    lambda: search_cache.misses,
+)
+registry.callback(
+    "reflexion_answer_cache_hits_total",
+    "Requests answered from the answer cache, near-duplicate matches included.",
+    lambda: answer_cache.hits + answer_cache.near_hits,
+)
+registry.callback(
+    "reflexion_answer_cache_misses_total",
+    "Requests that missed the answer cache.",
+    lambda: answer_cache.misses,
+)
+registry.callback(
+    "reflexion_llm_cache_hits_total",
+    "Draft and revise steps answered from the LLM response cache.",
+    lambda: llm_cache.hits,
+)
+registry.callback(
+    "reflexion_llm_cache_misses_total",
+    "Draft and revise steps that missed the LLM response cache.",
+    lambda: llm_cache.misses,
+)
+registry.callback(
+    "reflexion_admission_active",
+    "Requests holding a run slot.",
+    lambda: admission.active,
+    kind="gauge",
+)
+registry.callback(
+    "reflexion_admission_waiting",
+    "Requests queued for a run slot.",
+    lambda: admission.waiting,
+    kind="gauge",
 )
 
 # Enable CORS for local development
@@ -26,6 +128,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
 
 
 class AgentRequest(BaseModel):
@@ -36,6 +139,44 @@ class AgentRequest(BaseModel):
         description="The research question or query to investigate",
         example="What are AI-powered SOC startups and their funding?",
     )
+    fresh: bool = Field(
+        default=False,
+        description="Skip the answer and LLM response caches and run a fresh "
+        "research pass",
+    )
+    deadline_ms: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Time budget in milliseconds; when it runs out the best "
+        "answer so far is returned",
+    )
+    run_id: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        max_length=128,
+        description="Thread ID to checkpoint the run under; sending it again "
+        "resumes a failed or timed-out run after its last finished step "
+        "(requires CHECKPOINT_DB); a fresh run starts it over",
+    )
+    include: Literal["answer", "references", "messages"] = Field(
+        default="references",
+        description="How much of the run to return: the answer only, the "
+        "answer and its references, or those plus the full message history",
+    )
+
+    def flight_key(self) -> str:
+        """Key under which identical in-flight runs are coalesced.
+
+        Requests with a ``run_id`` share the run of that ID and question,
+        whatever their other settings, since one checkpoint thread only
+        holds one run.
+        """
+        if self.run_id is not None:
+            return f"run:{self.run_id}:{normalize_query(self.query)}"
+        key = normalize_query(self.query)
+        if self.fresh:
+            key = f"{key}!fresh"
+        return key if self.deadline_ms is None else f"{key}@{self.deadline_ms}ms"
 
 
 class AgentResponse(BaseModel):
@@ -46,35 +187,265 @@ class AgentResponse(BaseModel):
         default=None, description="List of citation URLs if available"
     )
     messages: Optional[List[dict]] = Field(
-        default=None, description="Full conversation history (for debugging)"
+        default=None,
+        description="Full conversation history (for debugging), returned "
+        'with include="messages"',
+    )
+    partial: bool = Field(
+        default=False,
+        description="True when the time budget ran out before the loop finished",
+    )
+
+
+class JobStatus(BaseModel):
+    """Status of a background research job."""
+
+    job_id: str = Field(..., description="ID to poll the job and fetch its result")
+    status: str = Field(..., description="One of queued, running, succeeded or failed")
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    started_at: Optional[float] = Field(
+        default=None, description="Time a worker picked the job up"
+    )
+    finished_at: Optional[float] = Field(
+        default=None, description="Time the job succeeded or failed"
+    )
+    progress: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Latest step (stage), revise count and answer so far",
+    )
+    error: Optional[str] = Field(default=None, description="Why the job failed")
+
+
+# Server-Sent Event names emitted for each graph node
+NODE_EVENTS = {
+    "draft": "draft",
+    "execute_tools": "search",
+    "revise": "revision",
+}
+
+
+class ModelJSONResponse(Response):
+    """JSON response encoded in one pass by pydantic-core's serializer.
+
+    Endpoints return it directly, so FastAPI does not validate and
+    re-encode a model the endpoint has just built.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content, fallback=str)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {to_json(data, fallback=str).decode()}\n\n"
+
+
+def node_event_payload(node: str, messages: List[BaseMessage]) -> dict:
+    """Build the event payload for the messages a graph node just produced."""
+    if node == "execute_tools":
+        return {"results": [msg.content for msg in messages]}
+
+    for msg in messages:
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            return msg.tool_calls[0].get("args", {})
+    return {"answer": messages[-1].content if messages else ""}
+
+
+def run_config(fresh: bool, run_id: Optional[str] = None) -> Dict[str, Any]:
+    """Graph run config; ``fresh`` runs bypass the LLM response cache.
+
+    A ``run_id`` is the checkpoint thread the run is saved under.
+    """
+    configurable: Dict[str, Any] = {"fresh": fresh}
+    if run_id is not None:
+        configurable["thread_id"] = run_id
+    return {"configurable": configurable}
+
+
+def hold_run(graph: Any, query: str, run_id: Optional[str]):
+    """Hold ``run_id``'s checkpoint thread while a run uses it.
+
+    Without a run ID or checkpointing the run has no thread to hold.
+    """
+    if run_id is None or graph.checkpointer is None:
+        return contextlib.nullcontext()
+    return run_threads.hold(run_id, query)
+
+
+def check_run_id(request: "AgentRequest") -> None:
+    """Reject a ``run_id`` already in use for a different question with 409."""
+    if request.run_id is None:
+        return
+    try:
+        run_threads.check(request.run_id, request.query)
+    except ThreadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def stream_agent_events(
+    query: str,
+    deadline_ms: Optional[int] = None,
+    fresh: bool = False,
+    run_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Run the graph and yield an SSE frame as each node finishes.
+
+    A resumed run only emits events for the steps it still has to run.
+    """
+    partial = False
+    try:
+        graph = agent_graph()
+        config = run_config(fresh, run_id)
+        async with hold_run(graph, query, run_id):
+            graph_input, saved = await resume_input(graph, config, query, deadline_ms)
+            messages: List[BaseMessage] = list(
+                saved.get("messages") or [HumanMessage(content=query)]
+            )
+            async for update in graph.astream(
+                graph_input, config, stream_mode="updates"
+            ):
+                for node, output in update.items():
+                    partial = partial or output.get("deadline_exceeded", False)
+                    new_messages = output.get("messages")
+                    if not new_messages:
+                        continue
+                    messages.extend(new_messages)
+                    yield format_sse(
+                        NODE_EVENTS.get(node, node),
+                        node_event_payload(node, new_messages),
+                    )
+
+        answer, references = extract_answer_from_messages(messages)
+        yield format_sse(
+            "done", {"answer": answer, "references": references, "partial": partial}
+        )
+    except Exception as e:
+        yield format_sse("error", {"detail": f"Error processing request: {str(e)}"})
+
+
+def build_response(
+    state: Dict[str, Any], include: str = "messages"
+) -> ModelJSONResponse:
+    """Build the API response for a finished run's final state.
+
+    ``include`` is one of ``AgentRequest.include``; the message history is
+    only converted when it is asked for.
+    """
+    messages = state["messages"]
+    answer, references = extract_answer_from_messages(messages)
+    if include == "answer":
+        references = None
+
+    messages_dict = None
+    if include == "messages" and messages:
+        messages_dict = []
+        for msg in messages:
+            msg_dict = {
+                "type": msg.__class__.__name__,
+                "content": msg.content if hasattr(msg, "content") else None,
+            }
+            if isinstance(msg, AIMessage) and msg.tool_calls:
+                msg_dict["tool_calls"] = msg.tool_calls
+            messages_dict.append(msg_dict)
+
+    return ModelJSONResponse(
+        AgentResponse(
+            answer=answer,
+            references=references,
+            messages=messages_dict,
+            partial=state.get("deadline_exceeded", False),
+        )
     )
 
 
-def extract_answer_from_messages(
-    messages: List[BaseMessage],
-) -> tuple[str, Optional[List[str]]]:
-    """Extract the final answer and references from the message history."""
-    answer = ""
-    references = None
+def client_id(http_request: Request) -> str:
+    """Identify the caller for per-client admission limits."""
+    client = http_request.headers.get(ADMISSION_CLIENT_HEADER)
+    if client:
+        return client
+    return http_request.client.host if http_request.client else "unknown"
+
+
+async def admit(client: str) -> None:
+    """Take a run slot for ``client`` or fail fast with 429."""
+    try:
+        await admission.acquire(client)
+    except Rejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
 
-    for message in reversed(messages):
-        if isinstance(message, AIMessage) and message.tool_calls:
-            for tool_call in message.tool_calls:
-                args = tool_call.get("args", {})
-                if "answer" in args:
-                    answer = args["answer"]
-                    if "references" in args and args["references"]:
-                        references = args["references"]
-                    break
-            if answer:
-                break
 
-    if not answer and messages:
-        last_message = messages[-1]
-        if isinstance(last_message, AIMessage):
-            answer = last_message.content or "No answer generated"
+async def run_agent(
+    query: str,
+    deadline_ms: Optional[int] = None,
+    progress: Optional[Dict[str, Any]] = None,
+    fresh: bool = False,
+    run_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run the graph for ``query`` and cache its final state.
 
-    return answer, references
+    If ``progress`` is given it is updated after every graph step with the
+    step's event name, the revise count and the answer so far. Runs cut
+    short by the time budget are returned but not cached. A ``fresh`` run
+    does not answer model calls from the LLM response cache. With a
+    ``run_id`` and checkpointing on, the run continues that thread after
+    its last finished step.
+    """
+    graph = agent_graph()
+    config = run_config(fresh, run_id)
+    state: Dict[str, Any] = {}
+    async with hold_run(graph, query, run_id):
+        graph_input, _ = await resume_input(graph, config, query, deadline_ms)
+        async for mode, chunk in graph.astream(
+            graph_input,
+            config,
+            stream_mode=["updates", "values"],
+        ):
+            if mode == "values":
+                state = chunk
+            if progress is None:
+                continue
+            if mode == "updates":
+                progress["stage"] = NODE_EVENTS.get(next(iter(chunk)), "")
+            else:
+                progress["iterations"] = state.get("iterations", 0)
+                progress["answer"] = extract_answer_from_messages(state["messages"])[0]
+    if not state.get("deadline_exceeded", False):
+        answer_cache.set(query, state)
+    return state
+
+
+async def run_job(job: Job) -> Dict[str, Any]:
+    """Job runner: run the graph, reporting progress on the job."""
+    params = job.params
+    return await run_agent(
+        params["query"],
+        params["deadline_ms"],
+        job.progress,
+        params["fresh"],
+        params["run_id"],
+    )
+
+
+jobs = JobManager(run_job)
+
+registry.callback(
+    "reflexion_jobs_queued",
+    "Background jobs waiting for a worker.",
+    lambda: jobs.queued,
+    kind="gauge",
+)
+registry.callback(
+    "reflexion_jobs_running",
+    "Background jobs being run by a worker.",
+    lambda: jobs.running,
+    kind="gauge",
+)
 
 
 @app.get("/")
@@ -85,6 +456,13 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "invoke": "/v1/agent/invoke",
+            "stream": "/v1/agent/stream",
+            "jobs": "/v1/agent/jobs",
+            "search_cache": "/v1/search-cache/stats",
+            "answer_cache": "/v1/answer-cache/stats",
+            "llm_cache": "/v1/llm-cache/stats",
+            "admission": "/v1/admission/stats",
+            "metrics": "/metrics",
             "docs": "/docs",
             "health": "/health",
         },
@@ -97,8 +475,42 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: node and search latency, tokens, iterations, caches."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/v1/search-cache/stats")
+async def search_cache_stats():
+    """Search-result cache hit/miss counters and tier sizes."""
+    return search_cache.stats()
+
+
+@app.get("/v1/answer-cache/stats")
+async def answer_cache_stats():
+    """Answer cache hit/miss counters and size."""
+    return answer_cache.stats()
+
+
+@app.get("/v1/llm-cache/stats")
+async def llm_cache_stats():
+    """LLM response cache hit/miss counters and tier sizes."""
+    return llm_cache.stats()
+
+
+@app.get("/v1/admission/stats")
+async def admission_stats():
+    """Run slots in use, queued requests and the admission limits."""
+    return admission.stats()
+
+
 @app.post("/v1/agent/invoke", response_model=AgentResponse)
-async def invoke_agent(request: AgentRequest) -> AgentResponse:
+async def invoke_agent(
+    request: AgentRequest, http_request: Request
+) -> ModelJSONResponse:
     """
     Invoke the reflexion research agent with a query.
 
@@ -109,31 +521,173 @@ async def invoke_agent(request: AgentRequest) -> AgentResponse:
     4. Research using Tavily Search
     5. Revise the answer with citations
     6. Iterate up to 2 times for improvement
-    """
-    try:
-        messages = graph.invoke(request.query)
 
-        answer, references = extract_answer_from_messages(messages)
+    Answers are cached by normalized query; set ``fresh`` to bypass the
+    answer cache and the LLM response cache.
+    Concurrent requests for the same query share a single in-flight run.
 
-        messages_dict = None
-        if messages:
-            messages_dict = []
-            for msg in messages:
-                msg_dict = {
-                    "type": msg.__class__.__name__,
-                    "content": msg.content if hasattr(msg, "content") else None,
-                }
-                if isinstance(msg, AIMessage) and msg.tool_calls:
-                    msg_dict["tool_calls"] = msg.tool_calls
-                messages_dict.append(msg_dict)
-
-        return AgentResponse(
-            answer=answer,
-            references=references,
-            messages=messages_dict,
+    With ``deadline_ms`` the run stops once the budget is spent and returns
+    its latest answer with ``partial`` set. If not even the first draft
+    finished in time, the response is a 504. With checkpointing on, a
+    request repeating the ``run_id`` of a failed or partial run resumes it
+    after its last finished step instead of starting over. Requests with
+    the same ``run_id`` and question share one run; a ``run_id`` in use
+    for another question is rejected with 409, and ``fresh`` discards
+    the saved run.
+
+    Runs are admission-controlled: when every run slot is busy the request
+    waits in a bounded queue, and it is rejected with 429 and
+    ``Retry-After`` if the queue or the caller's own limit is full.
+    Cached answers skip admission, and so do requests joining a run in
+    flight: the slot belongs to the run and is given back when it ends.
+
+    ``include`` picks how much of the run is returned: ``answer``,
+    ``references`` (the default) or ``messages`` for the full trace.
+    Requests asking for different levels still share one run.
+    """
+    if not request.fresh:
+        cached = answer_cache.get(request.query)
+        if cached is not None:
+            return build_response(cached, request.include)
+
+    check_run_id(request)
+    key = request.flight_key()
+    on_done = None
+    if not in_flight.running(key):
+        client = client_id(http_request)
+        await admit(client)
+        on_done = functools.partial(admission.release, client)
+    try:
+        state = await in_flight.do(
+            key,
+            lambda: run_agent(
+                request.query,
+                request.deadline_ms,
+                fresh=request.fresh,
+                run_id=request.run_id,
+            ),
+            on_done,
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ThreadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing request: {str(e)}",
         )
+    return build_response(state, request.include)
+
+
+@app.post("/v1/agent/stream")
+async def stream_agent(
+    request: AgentRequest, http_request: Request
+) -> StreamingResponse:
+    """
+    Stream the reflexion research agent's progress as Server-Sent Events.
+
+    Events are emitted as soon as each graph node finishes:
+    - ``draft``: the first AnswerQuestion (answer, reflection, search_queries)
+    - ``search``: the search results gathered for one iteration
+    - ``revision``: each ReviseAnswer (adds references)
+    - ``done``: the final answer and references, with ``partial`` set when
+      ``deadline_ms`` ran out before the loop finished
+    - ``error``: emitted instead of ``done`` if the run fails
+
+    Concurrent streams for the same query share a single in-flight run; a
+    late subscriber first receives the events it missed.
+
+    Streams are admission-controlled like ``/v1/agent/invoke``; a rejected
+    stream gets a 429 before any event is sent. The run holds the slot, not
+    its subscribers: it is given back when the run ends, even if every
+    client has gone, and a stream joining a run in flight takes none.
+    """
+    check_run_id(request)
+    key = request.flight_key()
+    on_done = None
+    if not in_flight.streaming(key):
+        client = client_id(http_request)
+        await admit(client)
+        on_done = functools.partial(admission.release, client)
+    events = in_flight.stream(
+        key,
+        lambda: stream_agent_events(
+            request.query, request.deadline_ms, request.fresh, request.run_id
+        ),
+        on_done,
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/v1/agent/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: AgentRequest) -> JobStatus:
+    """
+    Submit a research run as a background job and return its ID at once.
+
+    Poll ``GET /v1/agent/jobs/{job_id}`` for status and progress, then fetch
+    the ``AgentResponse`` from ``GET /v1/agent/jobs/{job_id}/result``. A
+    cached answer completes the job immediately. When the job queue is
+    full the request is rejected with 429.
+    """
+    params = {
+        "query": request.query,
+        "deadline_ms": request.deadline_ms,
+        "fresh": request.fresh,
+        "run_id": request.run_id,
+        "include": request.include,
+    }
+    if not request.fresh:
+        cached = answer_cache.get(request.query)
+        if cached is not None:
+            return JobStatus(**jobs.complete(params, cached).summary())
+    check_run_id(request)
+
+    try:
+        job = jobs.submit(params)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "5"}
+        )
+    return JobStatus(**job.summary())
+
+
+@app.get("/v1/agent/jobs/stats")
+async def job_stats():
+    """Job worker, queue and store sizes."""
+    return jobs.stats()
+
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/v1/agent/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str) -> JobStatus:
+    """Status of a background job, with its progress so far."""
+    return JobStatus(**_get_job(job_id).summary())
+
+
+@app.get("/v1/agent/jobs/{job_id}/result", response_model=AgentResponse)
+async def get_job_result(job_id: str) -> ModelJSONResponse:
+    """
+    Result of a finished background job, shaped by the job's ``include``.
+
+    Returns 409 while the job is still queued or running and 500 if it
+    failed.
+    """
+    job = _get_job(job_id)
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.error is not None:
+        raise HTTPException(
+            status_code=500, detail=f"Error processing request: {job.error}"
+        )
+    return build_response(job.result, job.params["include"])
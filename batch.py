@@ -0,0 +1,214 @@
+"""Offline batch runner: answer every question in a JSONL file.
+
+Questions are streamed from the input file and run through the graph with
+bounded concurrency. Each result is appended to the output JSONL as soon
+as it finishes, and IDs that already have a successful result there are
+skipped, so an interrupted batch resumes where it stopped.
+
+Usage:
+    python batch.py questions.jsonl results.jsonl --concurrency 8
+    python batch.py requests.jsonl results.jsonl --id-field request_id --query-field body
+"""
+
+# Loads .env before any module reads its settings, so it must stay first.
+import env  # noqa: F401  # isort: skip
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from main import extract_answer_from_messages, get_graph
+from state import initial_state
+
+DEFAULT_CONCURRENCY = 4
+
+
+def load_finished_ids(output_path: str) -> Set[str]:
+    """Return the IDs that already have a successful result in ``output_path``."""
+    finished: Set[str] = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partial line left behind by an interrupted run.
+                continue
+            # An ok record without an ID cannot be matched to a question.
+            if record.get("status") == "ok" and record.get("id") is not None:
+                finished.add(str(record["id"]))
+    return finished
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def iter_questions(
+    input_path: str, id_field: str, query_field: str
+) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Yield ``(id, query, error)`` triples from a JSONL file, one line at a time.
+
+    Records without ``id_field`` are identified by their line number. A
+    line that is not a JSON object or has no ``query_field`` is yielded
+    with ``query`` None and ``error`` saying why, so one bad record does
+    not stop the batch.
+    """
+    with open(input_path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            question_id = f"line-{line_number}"
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield question_id, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield question_id, None, "Record is not a JSON object"
+                continue
+            question_id = str(record.get(id_field, question_id))
+            query = record.get(query_field)
+            if not isinstance(query, str):
+                yield question_id, None, f"Record has no {query_field!r} text"
+                continue
+            yield question_id, query, None
+
+
+async def answer_question(question_id: str, query: str) -> Dict[str, Any]:
+    """Run one question through the graph and build its output record."""
+    try:
+        messages = (await get_graph().ainvoke(initial_state(query)))["messages"]
+        answer, references = extract_answer_from_messages(messages)
+        return {
+            "id": question_id,
+            "query": query,
+            "status": "ok",
+            "answer": answer,
+            "references": references,
+        }
+    except Exception as e:
+        return {"id": question_id, "query": query, "status": "error", "error": str(e)}
+
+
+def _open_for_append(output_path: str):
+    output_file = open(output_path, "a+", encoding="utf-8")
+    if output_file.tell() > 0:
+        output_file.seek(output_file.tell() - 1)
+        if output_file.read(1) != "\n":
+            output_file.write("\n")
+    return output_file
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    id_field: str = "id",
+    query_field: str = "query",
+) -> Dict[str, int]:
+    """Answer every unfinished question in ``input_path``.
+
+    A fixed pool of ``concurrency`` workers pulls from a bounded queue, so
+    memory stays flat no matter how large the input file is.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    finished = load_finished_ids(output_path)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    queue: "asyncio.Queue[Optional[Tuple[str, str]]]" = asyncio.Queue(
+        maxsize=concurrency * 2
+    )
+
+    with _open_for_append(output_path) as output_file:
+
+        def write(record: Dict[str, Any]) -> None:
+            output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output_file.flush()
+            counts[record["status"]] += 1
+            print(
+                f"[{counts['ok']} ok / {counts['error']} failed] "
+                f"{record['id']}: {record['status']}",
+                file=sys.stderr,
+            )
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                write(await answer_question(*item))
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        questions = iter_questions(input_path, id_field, query_field)
+        for question_id, query, error in questions:
+            if question_id in finished:
+                counts["skipped"] += 1
+                continue
+            finished.add(question_id)
+            if error is not None:
+                write(
+                    {
+                        "id": question_id,
+                        "query": query,
+                        "status": "error",
+                        "error": error,
+                    }
+                )
+                continue
+            await queue.put((question_id, query))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    return counts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("input", help="JSONL file with one question per line")
+    arg_parser.add_argument("output", help="JSONL file results are appended to")
+    arg_parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Questions run at the same time (default: {DEFAULT_CONCURRENCY})",
+    )
+    arg_parser.add_argument(
+        "--id-field", default="id", help="Field holding the question ID"
+    )
+    arg_parser.add_argument(
+        "--query-field", default="query", help="Field holding the question text"
+    )
+    args = arg_parser.parse_args()
+
+    async def run() -> Dict[str, int]:
+        from tavily_client import pooled_connections
+
+        async with pooled_connections():
+            return await run_batch(
+                args.input,
+                args.output,
+                args.concurrency,
+                args.id_field,
+                args.query_field,
+            )
+
+    counts = asyncio.run(run())
+    print(
+        f"Done: {counts['ok']} answered, {counts['error']} failed, "
+        f"{counts['skipped']} already finished",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
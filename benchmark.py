@@ -0,0 +1,372 @@
+"""Offline benchmarks for the reflexion pipeline.
+
+The graph and the FastAPI app run against the record/replay stand-ins from
+``replay`` (synthetic responses by default), so no API keys are needed and
+every number reflects our own orchestration plus the configured artificial
+latency. The benchmark reports:
+
+- wall time per graph node (draft, execute_tools, revise) and per run
+- estimated tokens of the prompt sent to the model at each iteration
+- peak Python memory per run (``tracemalloc``)
+- requests per second through ``/v1/agent/invoke`` at each concurrency level
+- time to ``import api`` in a fresh interpreter, i.e. the cold-start cost
+
+Results are written as JSON. Pass ``--baseline`` with an earlier result file
+to list every metric that got worse by more than ``--tolerance``; the exit
+status is 1 when any did.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --output bench.json --baseline baseline.json --tolerance 0.2
+    python benchmark.py --llm-latency-ms 800 --search-latency-ms 300 --concurrency 1 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage
+
+from admission import ADMISSION_CLIENT_HEADER
+from state import initial_state
+from text_utils import estimate_tokens
+
+DEFAULT_RUNS = 5
+DEFAULT_CONCURRENCY = (1, 8, 64)
+DEFAULT_REQUESTS_PER_CLIENT = 4
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_IMPORT_RUNS = 5
+
+IMPORT_TIMER = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - started)"
+)
+
+# Metrics where a larger value is an improvement; every other metric is a cost.
+HIGHER_IS_BETTER = ("requests_per_second",)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimated tokens a message adds to a prompt, tool-call arguments included."""
+    tokens = estimate_tokens(str(message.content))
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens(str(message.tool_calls))
+    return tokens
+
+
+class PromptTokenCounter(BaseCallbackHandler):
+    """Callback that records the estimated size of every chat-model prompt."""
+
+    def __init__(self):
+        self.prompt_tokens: List[int] = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        for prompt in messages:
+            self.prompt_tokens.append(sum(message_tokens(m) for m in prompt))
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Mean, median, 95th percentile and maximum of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+    }
+
+
+async def profile_run(graph, query: str) -> Dict[str, Any]:
+    """Run ``query`` once and time each node as its update arrives.
+
+    Nodes run one after another, so the time between two updates is the
+    wall time of the node that produced the second one.
+    """
+    counter = PromptTokenCounter()
+    nodes = []
+    start = last = time.perf_counter()
+    async for update in graph.astream(
+        initial_state(query), config={"callbacks": [counter]}, stream_mode="updates"
+    ):
+        now = time.perf_counter()
+        for node in update:
+            nodes.append({"node": node, "seconds": now - last})
+        last = now
+    return {
+        "seconds": last - start,
+        "nodes": nodes,
+        "prompt_tokens": counter.prompt_tokens,
+    }
+
+
+async def peak_memory(graph, query: str) -> int:
+    """Peak bytes allocated by Python while running ``query`` once."""
+    tracemalloc.start()
+    try:
+        await graph.ainvoke(initial_state(query))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def benchmark_graph(graph, runs: int = DEFAULT_RUNS) -> Dict[str, Any]:
+    """Profile ``runs`` sequential runs, then measure each run's peak memory.
+
+    Memory is traced in separate runs because ``tracemalloc`` slows down
+    every allocation and would inflate the timings.
+    """
+    profiles = [
+        await profile_run(graph, f"benchmark question {i}") for i in range(runs)
+    ]
+    peaks = [await peak_memory(graph, f"memory question {i}") for i in range(runs)]
+
+    node_seconds = defaultdict(list)
+    for profile in profiles:
+        for node in profile["nodes"]:
+            node_seconds[node["node"]].append(node["seconds"])
+
+    calls = max((len(p["prompt_tokens"]) for p in profiles), default=0)
+    prompt_tokens = [
+        statistics.fmean(
+            p["prompt_tokens"][i] for p in profiles if len(p["prompt_tokens"]) > i
+        )
+        for i in range(calls)
+    ]
+
+    return {
+        "runs": runs,
+        "run_seconds": summarize([p["seconds"] for p in profiles]),
+        "nodes": {node: summarize(values) for node, values in node_seconds.items()},
+        "prompt_tokens": prompt_tokens,
+        "peak_memory_bytes": summarize(peaks),
+    }
+
+
+async def benchmark_api(
+    app, concurrency: int, requests_per_client: int = DEFAULT_REQUESTS_PER_CLIENT
+) -> Dict[str, Any]:
+    """Drive ``/v1/agent/invoke`` with ``concurrency`` clients in a closed loop.
+
+    Every request carries a distinct query and ``fresh`` so neither the
+    answer cache nor in-flight coalescing short-circuits the run. Each
+    simulated client sends its own client ID, so the per-client admission
+    limit applies per client as it would in production.
+    """
+    latencies: List[float] = []
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=None
+    ) as client:
+
+        async def run_client(client_id: int) -> None:
+            nonlocal failures
+            for i in range(requests_per_client):
+                body = {
+                    "query": f"throughput question {concurrency}-{client_id}-{i}",
+                    "fresh": True,
+                }
+                sent = time.perf_counter()
+                response = await client.post(
+                    "/v1/agent/invoke",
+                    json=body,
+                    headers={ADMISSION_CLIENT_HEADER: f"benchmark-{client_id}"},
+                )
+                latencies.append(time.perf_counter() - sent)
+                if response.status_code != 200:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client(c) for c in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": failures,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_seconds": summarize(latencies),
+    }
+
+
+def benchmark_import(
+    module: str = "api", runs: int = DEFAULT_IMPORT_RUNS
+) -> Dict[str, Any]:
+    """Time ``import module`` in fresh interpreters with the current environment."""
+    seconds = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_TIMER.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        seconds.append(float(output.strip().splitlines()[-1]))
+    return {"module": module, "runs": runs, "seconds": summarize(seconds)}
+
+
+def flatten_metrics(results: Dict[str, Any]) -> Dict[str, float]:
+    """Map a result file to the scalar metrics compared against a baseline."""
+    graph = results["graph"]
+    metrics = {
+        "graph.run_seconds.mean": graph["run_seconds"]["mean"],
+        "graph.peak_memory_bytes.max": graph["peak_memory_bytes"]["max"],
+    }
+    for node, stats in graph["nodes"].items():
+        metrics[f"graph.nodes.{node}.mean"] = stats["mean"]
+    for call, tokens in enumerate(graph["prompt_tokens"]):
+        metrics[f"graph.prompt_tokens.{call}"] = tokens
+    if "import" in results:
+        metrics["import.seconds.p50"] = results["import"]["seconds"]["p50"]
+    for level in results.get("api", []):
+        prefix = f"api.concurrency_{level['concurrency']}"
+        metrics[f"{prefix}.requests_per_second"] = level["requests_per_second"]
+        metrics[f"{prefix}.latency_seconds.p95"] = level["latency_seconds"]["p95"]
+    return metrics
+
+
+def find_regressions(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """Describe every metric that is more than ``tolerance`` worse than baseline."""
+    current = flatten_metrics(results)
+    previous = flatten_metrics(baseline)
+    regressions = []
+    for name in sorted(current.keys() & previous.keys()):
+        old, new = previous[name], current[name]
+        if old <= 0:
+            continue
+        change = (new - old) / old
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{name}: {old:.4g} -> {new:.4g} ({change:.0%} worse)")
+    return regressions
+
+
+def configure_backends(args: argparse.Namespace) -> None:
+    """Select the replay stand-ins and turn the result caches off.
+
+    Must run before ``main`` or ``api`` is imported: both build their
+    backends from the environment at import time.
+    """
+    os.environ["REPLAY_MODE"] = args.replay_mode
+    os.environ["REPLAY_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["REPLAY_SEARCH_LATENCY_MS"] = str(args.search_latency_ms)
+    os.environ["SEARCH_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["SEARCH_CACHE_DB"] = ""
+    os.environ["ANSWER_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["LLM_CACHE"] = "false"
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    # Timed first, in subprocesses, before this process has imported anything.
+    import_time = benchmark_import("api", args.import_runs)
+
+    import api
+    import main
+
+    return {
+        "config": {
+            "replay_mode": args.replay_mode,
+            "llm_latency_ms": args.llm_latency_ms,
+            "search_latency_ms": args.search_latency_ms,
+            "runs": args.runs,
+            "requests_per_client": args.requests_per_client,
+        },
+        "import": import_time,
+        "graph": await benchmark_graph(main.get_graph(), args.runs),
+        "api": [
+            await benchmark_api(api.app, concurrency, args.requests_per_client)
+            for concurrency in args.concurrency
+        ],
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "--output", default="benchmark.json", help="Where to write the results"
+    )
+    arg_parser.add_argument(
+        "--baseline", help="Earlier result file to check for regressions"
+    )
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed relative slowdown per metric (default: {DEFAULT_TOLERANCE})",
+    )
+    arg_parser.add_argument(
+        "--runs",
+        type=int,
+        default=DEFAULT_RUNS,
+        help=f"Sequential graph runs to profile (default: {DEFAULT_RUNS})",
+    )
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_CONCURRENCY),
+        help="Concurrent API clients to measure (default: 1 8 64)",
+    )
+    arg_parser.add_argument(
+        "--requests-per-client",
+        type=int,
+        default=DEFAULT_REQUESTS_PER_CLIENT,
+        help=f"Requests each API client sends (default: {DEFAULT_REQUESTS_PER_CLIENT})",
+    )
+    arg_parser.add_argument(
+        "--import-runs",
+        type=int,
+        default=DEFAULT_IMPORT_RUNS,
+        help=f"Fresh interpreters to time importing the API in (default: {DEFAULT_IMPORT_RUNS})",
+    )
+    arg_parser.add_argument(
+        "--replay-mode",
+        choices=("synthetic", "replay"),
+        default="synthetic",
+        help="Answer from synthetic responses or only from recorded cassettes",
+    )
+    arg_parser.add_argument(
+        "--llm-latency-ms", type=float, default=0, help="Artificial LLM latency"
+    )
+    arg_parser.add_argument(
+        "--search-latency-ms", type=float, default=0, help="Artificial search latency"
+    )
+    args = arg_parser.parse_args()
+
+    configure_backends(args)
+    results = asyncio.run(run_benchmarks(args))
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = find_regressions(
+                results, json.load(baseline_file), args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,124 @@
-import datetime
-
-from dotenv import load_dotenv
+# Loads .env before any module reads its settings, so it must stay first.
+import env  # noqa: F401  # isort: skip
 
-load_dotenv()
+import datetime
+import functools
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage
 from langchain_core.output_parsers import JsonOutputToolsParser, PydanticToolsParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from context_cache import (
+    GEMINI_CONTEXT_CACHE,
+    ContextCache,
+    create_gemini_cache,
+    prefix_tokens,
+    with_context_cache,
+)
+from lazy import Lazy, deferred
+from llm_cache import LLM_CACHE, LLMCache, cached_responses
+from rate_limit import gemini_limiter, rate_limited
+from replay import REPLAY_MODE, wrap_chat_model
 from schemas import AnswerQuestion, ReviseAnswer
 
-llm = init_chat_model("google_genai:gemini-2.5-flash")
+GEMINI_MODEL = "google_genai:gemini-2.5-flash"
+
+
+def create_llm():
+    """Build the chat model; the provider SDK is only imported here."""
+    from langchain.chat_models import init_chat_model
+
+    return wrap_chat_model(lambda: init_chat_model(GEMINI_MODEL))
+
+
+llm = Lazy(create_llm)
+llm_cache = LLMCache.from_env()
 parser = JsonOutputToolsParser(return_id=True)
 parser_pydantic = PydanticToolsParser(tools=[AnswerQuestion])
 
+# Laid out for prompt caching: the leading system message is byte-identical
+# on every call of a chain and the conversation only grows at its end. The
+# one volatile value, today's date, sits in the closing system message.
 actor_prompt_template = ChatPromptTemplate.from_messages(
     [
         (
             "system",
             """You are expert researcher.
-        Current time: {time}
         1. {first_instruction}
         2. Reflect and critique your answer. Be severe to maximize improvement.
         3. Recommend search queries to research information and improve your answer.""",
         ),
         MessagesPlaceholder(variable_name="messages"),
-        ("system", "Answer the user's question above using the required format."),
+        (
+            "system",
+            "Current date: {date}\n"
+            "Answer the user's question above using the required format.",
+        ),
     ]
 ).partial(
-    time=lambda: datetime.datetime.now().isoformat(),
+    date=lambda: datetime.date.today().isoformat(),
 )
 
-first_responder = actor_prompt_template.partial(
-    first_instruction="Provide a detailed ~250 word answer."
-) | llm.bind_tools(tools=[AnswerQuestion], tool_choice="AnswerQuestion")
+context_cache = (
+    ContextCache(
+        lambda system, tool, ttl: create_gemini_cache(llm.get(), system, tool, ttl)
+    )
+    if GEMINI_CONTEXT_CACHE and REPLAY_MODE == "off"
+    else None
+)
+
+
+@functools.lru_cache(maxsize=None)
+def bind_tool(model, tool):
+    """Bind ``tool`` as the forced tool call of ``model`` (cached per model)."""
+    return model.bind_tools(tools=[tool], tool_choice=tool.__name__)
+
+
+def tool_model(tool, system: str):
+    """Runnable calling the current ``llm`` with ``tool`` bound, built on first use.
+
+    With context caching on, the static system message ``system`` and the
+    tool are sent as a reference to their Gemini cache instead of inline.
+    A prefix below Gemini's minimum cacheable size can never be cached, so
+    it is left unwrapped.
+    """
+    model = deferred(lambda: bind_tool(llm, tool), name=tool.__name__)
+    if context_cache is None or prefix_tokens(system, tool) < context_cache.min_tokens:
+        return model
+    return with_context_cache(
+        model, context_cache, tool, lambda name: llm.bind(cached_content=name)
+    )
+
+
+def actor_model(tool, system: str):
+    """Model step of a chain: rate-limited, and answered from ``llm_cache`` if on."""
+    model = rate_limited(tool_model(tool, system), gemini_limiter)
+    if not LLM_CACHE:
+        return model
+    return cached_responses(model, llm_cache, GEMINI_MODEL, tool)
+
+
+def actor_chain(first_instruction: str, tool):
+    """The actor prompt with ``first_instruction``, piped into a ``tool`` call."""
+    system = actor_prompt_template.messages[0].format(
+        first_instruction=first_instruction
+    )
+    return actor_prompt_template.partial(
+        first_instruction=first_instruction
+    ) | actor_model(tool, system.content)
+
+
+first_responder = actor_chain("Provide a detailed ~250 word answer.", AnswerQuestion)
 validator = PydanticToolsParser(tools=[AnswerQuestion])
 
 revise_instructions = """Revise your previous answer using the new information.
     - You should use the previous critique to add important information to your answer.
         - You MUST include numerical citations in your revised answer to ensure it can be verified.
+        - Number each citation with the [n] label of the search result it comes from.
         - Add a "References" section to the bottom of your answer (which does not count towards the word limit). In the form of:
             - [1] https://example.com
             - [2] https://example.com
     - You should use the previous critique to remove superfluous information from your answer and make SURE it is not more than 250 words.
 """
 
-revisor = actor_prompt_template.partial(
-    first_instruction=revise_instructions
-) | llm.bind_tools(tools=[ReviseAnswer], tool_choice="ReviseAnswer")
+revisor = actor_chain(revise_instructions, ReviseAnswer)
@@ -0,0 +1,427 @@
+"""SQLite checkpoints so an interrupted run resumes from its last finished step.
+
+With ``CHECKPOINT_DB`` set, the graph saves its state after every node
+into a local SQLite database, under the run's thread ID. Running the same
+thread again continues after the last ``draft``, ``execute_tools`` or
+``revise`` step that finished, so the model and search calls already paid
+for are not repeated after a worker restart, an upstream failure or a run
+cut short by its time budget.
+
+Writes are kept small and cheap: only the latest checkpoint of a thread
+is kept, a channel's value is only written when it changed, values are
+msgpack-encoded by LangGraph's serializer, and the database runs in WAL
+mode without a sync per commit. Threads untouched for ``CHECKPOINT_TTL``
+seconds are dropped.
+"""
+
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from state import AgentState, initial_state
+from text_utils import normalize_query
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", 24 * 60 * 60))
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL,"
+    " checkpoint_id TEXT NOT NULL, parent_id TEXT,"
+    " checkpoint_type TEXT NOT NULL, checkpoint BLOB NOT NULL,"
+    " metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,"
+    " updated_at REAL NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns))",
+    "CREATE INDEX IF NOT EXISTS checkpoints_updated ON checkpoints (updated_at)",
+    "CREATE TABLE IF NOT EXISTS checkpoint_blobs ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL,"
+    " channel TEXT NOT NULL, version TEXT NOT NULL,"
+    " value_type TEXT NOT NULL, value BLOB,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, channel, version))",
+    "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL,"
+    " checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, idx INTEGER NOT NULL,"
+    " channel TEXT NOT NULL, value_type TEXT NOT NULL, value BLOB,"
+    " task_path TEXT NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+)
+
+
+class ThreadBusy(Exception):
+    """The thread is in use by a run for another question."""
+
+
+class ThreadLocks:
+    """Keep concurrent runs from sharing a checkpoint thread.
+
+    Each save drops the values of the thread's earlier checkpoints, so two
+    runs saving to one thread at once would delete each other's state.
+    A run claims its thread for its question and holds the thread's lock
+    from resuming until it finishes. Runs for the same question queue up
+    (the later one finds the earlier one's progress); a claim for another
+    question while the thread is in use raises ThreadBusy.
+    """
+
+    def __init__(self):
+        self._threads: Dict[str, List[Any]] = {}
+
+    def check(self, thread_id: str, query: str) -> None:
+        """Raise ThreadBusy if ``thread_id`` is in use for another question."""
+        entry = self._threads.get(thread_id)
+        if entry is not None and entry[0] != normalize_query(query):
+            raise ThreadBusy(
+                f"Run {thread_id!r} is in progress for a different question"
+            )
+
+    @contextlib.asynccontextmanager
+    async def hold(self, thread_id: str, query: str) -> AsyncIterator[None]:
+        """Claim ``thread_id`` for ``query`` and hold its lock while the context runs."""
+        self.check(thread_id, query)
+        entry = self._threads.setdefault(
+            thread_id, [normalize_query(query), asyncio.Lock(), 0]
+        )
+        entry[2] += 1
+        try:
+            async with entry[1]:
+                yield
+        finally:
+            entry[2] -= 1
+            if entry[2] == 0:
+                del self._threads[thread_id]
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """Checkpoint saver that keeps the latest checkpoint of each thread in SQLite.
+
+    Earlier checkpoints are dropped when a new one is saved, so there is no
+    history to list or fork from; ``list`` yields the latest checkpoint only.
+    """
+
+    def __init__(self, path: str, ttl: float = CHECKPOINT_TTL):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def _load(self, typed: Tuple[str, Optional[bytes]]) -> Any:
+        return self.serde.loads_typed((typed[0], typed[1] or b""))
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checkpoint_id, parent_id, checkpoint_type, checkpoint,"
+                " metadata_type, metadata FROM checkpoints"
+                " WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            checkpoint_id, parent_id = row[0], row[1]
+            wanted = get_checkpoint_id(config)
+            if wanted and wanted != checkpoint_id:
+                return None
+            blobs = self._conn.execute(
+                "SELECT channel, version, value_type, value FROM checkpoint_blobs"
+                " WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchall()
+            writes = self._conn.execute(
+                "SELECT task_id, channel, value_type, value FROM checkpoint_writes"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+                " ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+        checkpoint: Checkpoint = self._load(row[2:4])
+        stored = {(channel, version): (t, v) for channel, version, t, v in blobs}
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            typed = stored.get((channel, str(version)))
+            if typed is not None and typed[0] != "empty":
+                values[channel] = self._load(typed)
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self._load(row[4:6]),
+            parent_config=(
+                _config(thread_id, checkpoint_ns, parent_id) if parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self._load((t, v)))
+                for task_id, channel, t, v in writes
+            ],
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None or before is not None or limit == 0:
+            return
+        latest = self.get_tuple(config)
+        if latest is None:
+            return
+        if filter and any(latest.metadata.get(k) != v for k, v in filter.items()):
+            return
+        yield latest
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        saved = {k: v for k, v in checkpoint.items() if k != "channel_values"}
+        values = checkpoint["channel_values"]
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version))
+            + (
+                self.serde.dumps_typed(values[channel])
+                if channel in values
+                else ("empty", None)
+            )
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_typed = self.serde.dumps_typed(saved)
+        metadata_typed = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        live = {(ch, str(v)) for ch, v in checkpoint["channel_versions"].items()}
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)",
+                blobs,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    *checkpoint_typed,
+                    *metadata_typed,
+                    now,
+                ),
+            )
+            # Only the new checkpoint is kept: drop superseded values and writes.
+            stale = [
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version in self._conn.execute(
+                    "SELECT channel, version FROM checkpoint_blobs"
+                    " WHERE thread_id = ? AND checkpoint_ns = ?",
+                    (thread_id, checkpoint_ns),
+                )
+                if (channel, version) not in live
+            ]
+            self._conn.executemany(
+                "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?"
+                " AND channel = ? AND version = ?",
+                stale,
+            )
+            self._conn.execute(
+                "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ?"
+                " AND checkpoint_id != ?",
+                (thread_id, checkpoint_ns, checkpoint["id"]),
+            )
+            self._expire(now)
+            self._conn.commit()
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        key = (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        rows = [
+            key
+            + (task_id, WRITES_IDX_MAP.get(channel, idx), channel)
+            + self.serde.dumps_typed(value)
+            + (task_path,)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Special writes (errors, interrupts) replace earlier ones; regular
+        # writes of a task are saved once.
+        verb = "REPLACE" if all(row[4] < 0 for row in rows) else "IGNORE"
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR {verb} INTO checkpoint_writes"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+            self._conn.commit()
+
+    def _expire(self, now: float) -> None:
+        expired = "SELECT thread_id FROM checkpoints WHERE updated_at < ?"
+        cutoff = (now - self.ttl,)
+        for table in ("checkpoint_blobs", "checkpoint_writes"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id IN ({expired})", cutoff
+            )
+        self._conn.execute("DELETE FROM checkpoints WHERE updated_at < ?", cutoff)
+
+    def threads(self) -> int:
+        """Number of threads with a saved checkpoint."""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()
+        return count
+
+    # Local SQLite calls take well under a millisecond, like the search
+    # cache's SQLite tier, so the async API calls them directly.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+
+def create_checkpointer() -> Optional[SQLiteCheckpointer]:
+    """Build the checkpointer configured by CHECKPOINT_DB, or None when unset."""
+    return SQLiteCheckpointer(CHECKPOINT_DB) if CHECKPOINT_DB else None
+
+
+def last_finished_step(messages: List[Any], iterations: int) -> Optional[str]:
+    """Name of the last node whose output is in ``messages``, or None.
+
+    Each node leaves a distinct trace: ``execute_tools`` ends the history
+    with tool results, and an answer ends it after ``draft`` (no revise
+    steps counted yet) or ``revise``.
+    """
+    if not messages or isinstance(messages[-1], HumanMessage):
+        return None
+    if isinstance(messages[-1], ToolMessage):
+        return "execute_tools"
+    if isinstance(messages[-1], AIMessage):
+        return "revise" if iterations else "draft"
+    return None
+
+
+async def resume_input(
+    graph: Any, config: RunnableConfig, query: str, deadline_ms: Optional[int] = None
+) -> Tuple[Optional[AgentState], AgentState]:
+    """Return the graph input for a run on ``config``'s thread, and its saved state.
+
+    The input is None to continue the thread from its checkpoint, with the
+    time budget restarted from now. A thread for another question, or one
+    that never finished a step, starts over from ``initial_state``, and so
+    does a ``fresh`` run. A run that already finished without being cut
+    short is not run again; the graph just reports its final state.
+
+    Callers hold the thread in ``ThreadLocks`` while they run it.
+    """
+    fresh_start = initial_state(query, deadline_ms)
+    configurable = config["configurable"]
+    thread_id = configurable.get("thread_id")
+    if graph.checkpointer is None or not thread_id:
+        return fresh_start, {}
+    snapshot = await graph.aget_state(config)
+    saved = snapshot.values
+    messages = saved.get("messages", [])
+    step = last_finished_step(messages, saved.get("iterations", 0))
+    if (
+        step is None
+        or configurable.get("fresh")
+        or normalize_query(messages[0].content) != normalize_query(query)
+    ):
+        if saved:
+            await graph.checkpointer.adelete_thread(thread_id)
+        return fresh_start, {}
+    if saved.get("deadline_exceeded") or snapshot.next:
+        await graph.aupdate_state(
+            config,
+            {"deadline": fresh_start["deadline"], "deadline_exceeded": False},
+            as_node=step,
+        )
+    return None, saved
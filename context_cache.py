@@ -0,0 +1,180 @@
+"""Explicit Gemini context caching of the static prompt prefix.
+
+Every call of a chain opens with the same system instructions and forces
+the same tool. Gemini discounts repeated prefixes on its own when it
+notices them; with ``GEMINI_CONTEXT_CACHE`` on, each (instructions, tool)
+prefix is also stored once as Gemini cached content and requests refer
+to it by name instead of resending it.
+
+A cache is created on first use and recreated shortly before its
+``GEMINI_CONTEXT_CACHE_TTL`` runs out. Gemini only caches prefixes above
+a minimum size (``GEMINI_CONTEXT_CACHE_MIN_TOKENS``, counting both the
+instructions and the tool schema). A prefix estimated below it is never
+sent upstream, and one that Gemini rejects as too small is sent inline
+from then on. Any other failure is retried after a backoff that doubles
+with each consecutive failure; the prefix is sent inline meanwhile.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from metrics import CONTEXT_CACHE_EVENTS
+from text_utils import estimate_tokens
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", 3600))
+# Gemini's minimum cacheable size (1,024 tokens for Gemini 2.5 Flash).
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(
+    os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", 1024)
+)
+# Seconds before a failed cache creation is retried, doubled after each
+# consecutive failure up to the cache TTL.
+RETRY_BACKOFF = 30
+
+# Caches are renewed this many seconds before they expire, so that no
+# request is sent with a name that is about to stop working.
+RENEW_MARGIN = 60
+
+
+def create_gemini_cache(model: Any, system: str, tool: type, ttl: int) -> str:
+    """Store ``system`` and the forced ``tool`` as Gemini cached content."""
+    from langchain_google_genai import create_context_cache
+
+    return create_context_cache(
+        model,
+        [SystemMessage(content=system)],
+        ttl=f"{ttl}s",
+        tools=[tool],
+        tool_choice=tool.__name__,
+    )
+
+
+class ContextCache:
+    """Cache names per static prefix, created on demand and renewed before expiry.
+
+    ``create(system, tool, ttl)`` stores a prefix upstream and returns the
+    cache name to send with requests. It runs outside the lock; while one
+    caller creates a prefix's cache, others send that prefix inline.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[str, type, int], str],
+        ttl: int = GEMINI_CONTEXT_CACHE_TTL,
+        min_tokens: int = GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+    ):
+        self._create = create
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self._names: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._too_small: Set[Tuple[str, str]] = set()
+        # Consecutive failures and when to try again, per prefix.
+        self._retry: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._creating: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def name(self, system: str, tool: type) -> Optional[str]:
+        """Return the cache name for this prefix, or None to send it inline."""
+        key = (system, tool.__name__)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._too_small or key in self._creating:
+                return None
+            cached = self._names.get(key)
+            if cached is not None and cached[1] > now:
+                return cached[0]
+            failures, retry_at = self._retry.get(key, (0, 0.0))
+            if retry_at > now:
+                return None
+            if prefix_tokens(system, tool) < self.min_tokens:
+                CONTEXT_CACHE_EVENTS["too_small"].inc()
+                self._too_small.add(key)
+                return None
+            self._creating.add(key)
+        try:
+            name = self._create(system, tool, self.ttl)
+        except Exception as e:
+            CONTEXT_CACHE_EVENTS["failed"].inc()
+            with self._lock:
+                self._creating.discard(key)
+                if is_too_small(e):
+                    self._too_small.add(key)
+                else:
+                    backoff = min(
+                        RETRY_BACKOFF * 2**failures, max(self.ttl, RETRY_BACKOFF)
+                    )
+                    self._retry[key] = (failures + 1, time.monotonic() + backoff)
+            return None
+        CONTEXT_CACHE_EVENTS["created"].inc()
+        with self._lock:
+            self._creating.discard(key)
+            self._retry.pop(key, None)
+            renew_at = time.monotonic() + max(0, self.ttl - RENEW_MARGIN)
+            self._names[key] = (name, renew_at)
+        return name
+
+
+def prefix_tokens(system: str, tool: type) -> int:
+    """Estimated size of a cached prefix: the instructions plus the tool schema."""
+    schema = json.dumps(convert_to_openai_tool(tool))
+    return estimate_tokens(system) + estimate_tokens(schema)
+
+
+def is_too_small(error: Exception) -> bool:
+    """Whether Gemini rejected a cache for being below its minimum size."""
+    message = str(error).lower()
+    return "too small" in message or "min_total_token_count" in message
+
+
+def with_context_cache(
+    model: Runnable,
+    cache: ContextCache,
+    tool: type,
+    cached_model: Callable[[str], Runnable],
+) -> Runnable:
+    """Send a prompt's leading system message and ``tool`` by cache reference.
+
+    ``model`` has ``tool`` bound and is used whenever the prefix has no
+    cache. Otherwise the rest of the prompt goes to ``cached_model(name)``,
+    which must not bind the tool itself. A request using a cache cannot
+    carry a system instruction of its own, so later system messages are
+    sent as user turns.
+    """
+
+    def _split(prompt) -> Tuple[Optional[str], list]:
+        messages = prompt.to_messages()
+        if not messages or not isinstance(messages[0], SystemMessage):
+            return None, messages
+        name = cache.name(messages[0].content, tool)
+        rest = [
+            HumanMessage(content=m.content) if isinstance(m, SystemMessage) else m
+            for m in messages[1:]
+        ]
+        return name, rest
+
+    def _invoke(prompt, config):
+        name, rest = _split(prompt)
+        if name is None:
+            return model.invoke(prompt, config)
+        return cached_model(name).invoke(rest, config)
+
+    async def _ainvoke(prompt, config):
+        # Creating a cache is a blocking upstream call.
+        name, rest = await asyncio.to_thread(_split, prompt)
+        if name is None:
+            return await model.ainvoke(prompt, config)
+        return await cached_model(name).ainvoke(rest, config)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=tool.__name__)
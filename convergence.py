@@ -0,0 +1,92 @@
+"""Convergence checks that let the revise loop stop before MAX_ITERATIONS.
+
+Another search-and-revise round is only worth paying for when it can still
+change the answer. After each revision ``convergence_reason`` looks at the
+latest answer and reports why the loop can stop:
+
+- ``stable_answer``: the revised answer barely differs from the previous
+  one (word-set Jaccard similarity).
+- ``no_critique``: the reflection has nothing left in ``missing``.
+- ``no_new_queries``: every proposed search query repeats an earlier one,
+  or there are none.
+
+The draft is never accepted as converged; at least one revision always runs.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from search_history import SearchHistory
+from text_utils import content_tokens, jaccard, normalize_query, token_set
+
+CONVERGENCE_EARLY_EXIT = os.getenv("CONVERGENCE_EARLY_EXIT", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+CONVERGENCE_ANSWER_SIMILARITY = float(os.getenv("CONVERGENCE_ANSWER_SIMILARITY", 0.9))
+
+TRIVIAL_CRITIQUES = frozenset(
+    {
+        "n/a",
+        "na",
+        "no",
+        "none",
+        "nothing",
+        "nothing major",
+        "nothing missing",
+        "nothing significant",
+        "not applicable",
+    }
+)
+
+
+def _answers(messages: Sequence[BaseMessage]) -> List[Tuple[int, Dict[str, Any]]]:
+    """``(index, args)`` of every answer tool call, oldest first."""
+    answers = []
+    for index, message in enumerate(messages):
+        if isinstance(message, AIMessage):
+            for tool_call in message.tool_calls:
+                if "answer" in tool_call.get("args", {}):
+                    answers.append((index, tool_call["args"]))
+                    break
+    return answers
+
+
+def is_trivial_critique(text: str) -> bool:
+    """True when a critique is empty or only says there is nothing to add."""
+    return not content_tokens(text) or normalize_query(text) in TRIVIAL_CRITIQUES
+
+
+def convergence_reason(
+    messages: Sequence[BaseMessage],
+    similarity: float = CONVERGENCE_ANSWER_SIMILARITY,
+) -> Optional[str]:
+    """Return why the loop can stop after the latest revision, or None."""
+    answers = _answers(messages)
+    if len(answers) < 2:
+        return None
+    (latest_index, latest), (_, previous) = answers[-1], answers[-2]
+
+    if (
+        jaccard(token_set(str(latest["answer"])), token_set(str(previous["answer"])))
+        >= similarity
+    ):
+        return "stable_answer"
+
+    reflection = latest.get("reflection") or {}
+    missing = (
+        reflection.get("missing", "")
+        if isinstance(reflection, dict)
+        else getattr(reflection, "missing", "")
+    )
+    if is_trivial_critique(str(missing)):
+        return "no_critique"
+
+    history = SearchHistory.from_messages(messages[:latest_index])
+    if all(history.match(query) for query in latest.get("search_queries", [])):
+        return "no_new_queries"
+
+    return None
@@ -0,0 +1,10 @@
+"""Load ``.env`` into the process environment.
+
+Entry points import this module before anything that reads configuration
+from the environment at import time. The file is read once per process,
+however many modules import it.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,89 @@
+"""History compaction for the revise step.
+
+Every node sees the full accumulated message list in the graph state, so the
+revisor prompt grows with each iteration. ``compact_history`` keeps what the
+revisor actually needs: the question, the latest answer with its critique
+and the searches it triggered, plus a bounded digest of earlier evidence.
+Superseded drafts and duplicate-search notices are dropped.
+"""
+
+import os
+from typing import List, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from text_utils import estimate_tokens
+
+REVISE_TOKEN_BUDGET = int(os.getenv("REVISE_TOKEN_BUDGET", 6000))
+
+EVIDENCE_DIGEST_HEADER = "Evidence gathered in earlier research iterations:"
+
+
+def _latest_answer_index(messages: Sequence[BaseMessage]) -> int:
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if isinstance(message, AIMessage) and message.tool_calls:
+            return index
+    return -1
+
+
+def _is_duplicate_notice(message: ToolMessage) -> bool:
+    return isinstance(message.artifact, dict) and "duplicate_of" in message.artifact
+
+
+def _trim_to_tokens(text: str, tokens: int) -> str:
+    max_chars = tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit("\n", 1)[0] + "\n…"
+
+
+def compact_history(
+    messages: Sequence[BaseMessage], token_budget: int = REVISE_TOKEN_BUDGET
+) -> List[BaseMessage]:
+    """Return the messages to send to the revisor, within ``token_budget``.
+
+    The question, the latest answer and its tool results are always kept.
+    Earlier search results are folded, newest first, into one digest that
+    uses whatever budget remains.
+    """
+    latest = _latest_answer_index(messages)
+    if latest <= 0:
+        return list(messages)
+
+    question = messages[0]
+    current = list(messages[latest:])
+    older_evidence = [
+        message.content
+        for message in messages[1:latest]
+        if isinstance(message, ToolMessage) and not _is_duplicate_notice(message)
+    ]
+    if not older_evidence:
+        return [question] + current
+
+    used = sum(
+        (
+            estimate_tokens(str(message.content))
+            + estimate_tokens(str(message.tool_calls))
+            if isinstance(message, AIMessage)
+            else estimate_tokens(str(message.content))
+        )
+        for message in [question] + current
+    )
+    remaining = token_budget - used - estimate_tokens(EVIDENCE_DIGEST_HEADER)
+
+    digest = []
+    for content in reversed(older_evidence):
+        if remaining <= 0:
+            break
+        content = _trim_to_tokens(str(content), remaining)
+        digest.append(content)
+        remaining -= estimate_tokens(content)
+
+    if not digest:
+        return [question] + current
+
+    digest_message = HumanMessage(
+        content="\n\n".join([EVIDENCE_DIGEST_HEADER] + digest[::-1])
+    )
+    return [question, digest_message] + current
@@ -0,0 +1,186 @@
+"""Background research jobs: submit now, poll status, fetch the result later.
+
+Jobs wait in a bounded queue and are run by a fixed pool of worker tasks,
+so the number of concurrent graph runs is set by ``JOB_WORKERS`` and not
+by how many clients are connected. Finished jobs stay in the store for
+``JOB_RESULT_TTL`` seconds.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 60 * 60))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its limit."""
+
+
+class Job:
+    """One submitted research run and everything known about it so far."""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def summary(self) -> Dict[str, Any]:
+        """Status fields reported to clients (everything but the result)."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class JobStore:
+    """Jobs by ID; finished jobs expire ``ttl`` seconds after they finish."""
+
+    def __init__(self, ttl: float = JOB_RESULT_TTL):
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> None:
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def finished(self, job: Job) -> None:
+        with self._lock:
+            self._finished[job.id] = job.finished_at + self.ttl
+
+    def _purge(self) -> None:
+        now = time.time()
+        while self._finished:
+            job_id, expires_at = next(iter(self._finished.items()))
+            if expires_at > now:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+
+class JobManager:
+    """Bounded queue plus a fixed pool of workers that run submitted jobs.
+
+    ``runner`` receives the job, may update ``job.progress`` while it runs,
+    and returns the job's result. Workers are started on first use in the
+    running event loop.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable[Any]],
+        workers: int = JOB_WORKERS,
+        queue_size: int = JOB_QUEUE_SIZE,
+        store: Optional[JobStore] = None,
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.queue_size = queue_size
+        self.store = store or JobStore()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running = 0
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [
+                loop.create_task(self._work(self._queue)) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, params: Dict[str, Any]) -> Job:
+        """Queue a job and return it at once; raise QueueFull at the limit."""
+        queue = self._ensure_workers()
+        job = Job(params)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self.queue_size} jobs are already queued")
+        self.store.add(job)
+        return job
+
+    def complete(self, params: Dict[str, Any], result: Any) -> Job:
+        """Record a job that finished without running, e.g. from a cache."""
+        job = Job(params)
+        job.status = SUCCEEDED
+        job.started_at = job.finished_at = time.time()
+        job.result = result
+        self.store.add(job)
+        self.store.finished(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self.running += 1
+            try:
+                job.result = await self.runner(job)
+                job.status = SUCCEEDED
+            except Exception as e:
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                self.running -= 1
+                job.finished_at = time.time()
+                self.store.finished(job)
+                queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return worker, queue and store sizes."""
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "stored": len(self.store),
+        }
@@ -0,0 +1,56 @@
+"""Deferred construction of expensive clients.
+
+Provider SDKs are slow to import and their clients validate credentials
+when built, so nothing is constructed at import time. ``Lazy`` builds its
+target the first time it is used; ``deferred`` turns a runnable factory
+into a runnable that resolves the factory on every call.
+"""
+
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """Proxy that builds its target on first attribute access, exactly once."""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._target: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._target is not None
+
+    def get(self) -> T:
+        """Return the target, building it if this is the first use."""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+def deferred(factory: Callable[[], Runnable], name: str = "deferred") -> Runnable:
+    """Runnable that calls ``factory()`` at invocation time and runs the result.
+
+    ``factory`` should cache what it builds; it is looked up again on each
+    call so that replacing the objects it reads (e.g. in tests) takes effect.
+    """
+
+    def _invoke(value, config):
+        return factory().invoke(value, config)
+
+    async def _ainvoke(value, config):
+        return await factory().ainvoke(value, config)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=name)
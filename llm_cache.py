@@ -0,0 +1,139 @@
+"""Response cache in front of the chat model, keyed on the canonical prompt.
+
+Batch re-runs, retried requests and repeated questions send Gemini the
+exact same prompt again. With ``LLM_CACHE`` on, the draft and revise
+steps look the response up first, in the same two tiers as the search
+cache: an in-process LRU and an optional SQLite database
+(``LLM_CACHE_DB``).
+
+The key hashes the model name, the bound tool's schema and the messages
+as the model sees them. Message IDs and response metadata are left out
+and tool-call IDs are renumbered in order of appearance, since they are
+random per run but do not change what the model is asked. Only responses
+with well-formed tool calls are stored; they are restored with their tool
+calls exactly as returned, minus token usage, as a hit costs no tokens.
+Set ``configurable.fresh`` in the run config to bypass the cache.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from search_cache import LRUCacheTier, SearchCache, SQLiteCacheTier
+
+LLM_CACHE = os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")
+LLM_CACHE_DB_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DB_MAX_ENTRIES", 100_000))
+
+
+class LLMCache(SearchCache):
+    """Tiered cache of chat-model responses (see ``search_cache.SearchCache``)."""
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        """Build the cache configured by the LLM_CACHE_* environment variables.
+
+        With ``LLM_CACHE`` off the cache has no tiers and stores nothing.
+        """
+        if not LLM_CACHE:
+            return cls([])
+        tiers: List[Any] = [LRUCacheTier(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)]
+        if LLM_CACHE_DB:
+            tiers.append(
+                SQLiteCacheTier(
+                    LLM_CACHE_DB,
+                    LLM_CACHE_DB_MAX_ENTRIES,
+                    LLM_CACHE_TTL,
+                    table="llm_cache",
+                )
+            )
+        return cls(tiers)
+
+
+def _canonical(message: BaseMessage, call_ids: Dict[Any, str]) -> Dict[str, Any]:
+    def call_id(original: Any) -> str:
+        return call_ids.setdefault(original, f"call_{len(call_ids)}")
+
+    data: Dict[str, Any] = {"type": message.type, "content": message.content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        data["tool_calls"] = [
+            {"name": call["name"], "args": call["args"], "id": call_id(call["id"])}
+            for call in message.tool_calls
+        ]
+    if isinstance(message, ToolMessage):
+        data["tool_call_id"] = call_id(message.tool_call_id)
+    return data
+
+
+def llm_cache_key(
+    messages: List[BaseMessage], model: str, tool_schema: Dict[str, Any]
+) -> str:
+    """Hash a chat request: model name, bound tool schema and canonical messages."""
+    call_ids: Dict[Any, str] = {}
+    payload = {
+        "model": model,
+        "tool": tool_schema,
+        "messages": [_canonical(message, call_ids) for message in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _cacheable(message: Any) -> bool:
+    return (
+        isinstance(message, AIMessage)
+        and bool(message.tool_calls)
+        and not message.invalid_tool_calls
+    )
+
+
+def _restore(data: Dict[str, Any]) -> AIMessage:
+    (message,) = messages_from_dict([data])
+    return message.model_copy(update={"usage_metadata": None})
+
+
+def cached_responses(
+    model: Runnable, cache: SearchCache, model_name: str, tool: type
+) -> Runnable:
+    """Wrap the model step of a chain so repeated prompts are answered locally."""
+    tool_schema = convert_to_openai_tool(tool)
+
+    def _lookup(prompt, config) -> Tuple[Optional[str], Optional[AIMessage]]:
+        if ((config or {}).get("configurable") or {}).get("fresh"):
+            return None, None
+        messages = prompt.to_messages() if hasattr(prompt, "to_messages") else prompt
+        key = llm_cache_key(list(messages), model_name, tool_schema)
+        cached = cache.get(key)
+        return key, None if cached is None else _restore(cached)
+
+    def _store(key: Optional[str], message: Any) -> Any:
+        if key is not None and _cacheable(message):
+            cache.set(key, message_to_dict(message))
+        return message
+
+    def _invoke(prompt, config):
+        key, message = _lookup(prompt, config)
+        if message is not None:
+            return message
+        return _store(key, model.invoke(prompt, config))
+
+    async def _ainvoke(prompt, config):
+        key, message = _lookup(prompt, config)
+        if message is not None:
+            return message
+        return _store(key, await model.ainvoke(prompt, config))
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=f"cached_{tool.__name__}")
@@ -1,47 +1,223 @@
-from typing import List
+# Loads .env before any module reads its settings, so it must stay first.
+import env  # noqa: F401  # isort: skip
 
-from dotenv import load_dotenv
+import asyncio
+import functools
+import time
+from typing import List, Optional
 
-load_dotenv()
-from langchain_core.messages import BaseMessage, ToolMessage
-from langgraph.graph import END, MessageGraph
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from langgraph.graph import END, StateGraph
 
 from chains import first_responder, revisor
-from tool_executor import execute_tools
+from checkpoints import create_checkpointer
+from convergence import CONVERGENCE_EARLY_EXIT, convergence_reason
+from history import compact_history
+from metrics import EARLY_EXITS, NODE_SECONDS, RUN_ITERATIONS, record_token_usage
+from schemas import AnswerQuestion, ReviseAnswer
+from state import AgentState, initial_state, time_left
+from tool_executor import aexecute_tools, execute_tools
 
 MAX_ITERATIONS = 2
 
 
-def event_loop(state: List[BaseMessage]) -> str:
-    """Conditional edge function to control iteration loop."""
-    count_tool_visits = sum(isinstance(item, ToolMessage) for item in state)
-    num_iterations = count_tool_visits
-    if num_iterations > MAX_ITERATIONS:
-        return END
+class DeadlineExceeded(TimeoutError):
+    """The time budget ran out before the first draft was written."""
+
+
+def _finish(state: AgentState) -> str:
+    RUN_ITERATIONS.observe(state["iterations"])
+    return END
+
+
+def event_loop(state: AgentState) -> str:
+    """Conditional edge function to control iteration loop.
+
+    The loop runs at most MAX_ITERATIONS revise steps, however many search
+    queries each step emits, and ends sooner once the latest revision has
+    converged (see ``convergence.convergence_reason``) or the time budget
+    has run out.
+    """
+    if state["iterations"] >= MAX_ITERATIONS or state.get("deadline_exceeded"):
+        return _finish(state)
+    if CONVERGENCE_EARLY_EXIT:
+        reason = convergence_reason(state["messages"])
+        if reason is not None:
+            EARLY_EXITS[reason].inc()
+            return _finish(state)
     return "execute_tools"
 
 
-def create_graph():
-    """Create and compile the reflexion agent graph."""
-    builder = MessageGraph()
-    builder.add_node("draft", first_responder)
-    builder.add_node("execute_tools", execute_tools)
-    builder.add_node("revise", revisor)
-    builder.add_edge("draft", "execute_tools")
-    builder.add_edge("execute_tools", "revise")
+def unless_deadline_exceeded(next_node: str):
+    """Edge that ends the run once a step was skipped for lack of time."""
+
+    def route(state: AgentState) -> str:
+        if state.get("deadline_exceeded"):
+            return _finish(state)
+        return next_node
+
+    return route
+
+
+def extract_answer_from_messages(
+    messages: List[BaseMessage],
+) -> tuple[str, Optional[List[str]]]:
+    """Extract the final answer and references from the message history."""
+    answer = ""
+    references = None
+
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and message.tool_calls:
+            for tool_call in message.tool_calls:
+                args = tool_call.get("args", {})
+                if "answer" in args:
+                    answer = args["answer"]
+                    if "references" in args and args["references"]:
+                        references = args["references"]
+                    break
+            if answer:
+                break
+
+    if not answer and messages:
+        last_message = messages[-1]
+        if isinstance(last_message, AIMessage):
+            answer = last_message.content or "No answer generated"
+
+    return answer, references
+
+
+def graph_node(
+    node: str,
+    runnable: Runnable,
+    counts_iteration: bool = False,
+    required: bool = False,
+):
+    """Run ``runnable`` on the state's messages and return a state update.
+
+    The node's wall time and the token usage the model reports go to
+    ``metrics``. A node with ``counts_iteration`` bumps the revise counter.
+
+    When the run has a deadline, the step is skipped once it has passed
+    and the async call may only use the time that is left. A skipped or
+    cut-off step sets ``deadline_exceeded`` so the run ends with the best
+    answer so far; a ``required`` step raises DeadlineExceeded instead.
+    """
+    duration = NODE_SECONDS[node]
+
+    def _update(state: AgentState, output, start: float) -> dict:
+        duration.observe(time.perf_counter() - start)
+        record_token_usage(node, output)
+        update = {"messages": output if isinstance(output, list) else [output]}
+        if counts_iteration:
+            update["iterations"] = state.get("iterations", 0) + 1
+        return update
+
+    def _expired() -> dict:
+        if required:
+            raise DeadlineExceeded(f"Time budget ran out during {node}")
+        return {"deadline_exceeded": True}
+
+    def _invoke(state: AgentState, config) -> dict:
+        remaining = time_left(state)
+        if remaining is not None and remaining <= 0:
+            return _expired()
+        start = time.perf_counter()
+        return _update(state, runnable.invoke(state["messages"], config), start)
+
+    async def _ainvoke(state: AgentState, config) -> dict:
+        remaining = time_left(state)
+        if remaining is not None and remaining <= 0:
+            return _expired()
+        start = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(
+                runnable.ainvoke(state["messages"], config), remaining
+            )
+        except asyncio.TimeoutError:
+            if remaining is None or time_left(state) > 0:
+                raise
+            return _expired()
+        return _update(state, output, start)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=node)
+
+
+def create_graph(checkpointer=None):
+    """Create and compile the reflexion agent graph.
+
+    Every node has a native async path, so ``graph.ainvoke`` runs the whole
+    loop without blocking the event loop. The revisor only sees a compacted
+    history (see ``history.compact_history``), so its prompt stays bounded
+    as iterations grow. Revise steps are counted in ``AgentState``, so the
+    loop bound does not depend on how many queries each step searched.
+    With a deadline in the state the run stops early with its latest answer
+    (see ``graph_node``). With a ``checkpointer`` the state is saved after
+    every node, so a run on the same thread ID can resume after its last
+    finished step (see ``checkpoints``).
+    """
+    builder = StateGraph(AgentState)
+    builder.add_node("draft", graph_node("draft", first_responder, required=True))
+    builder.add_node(
+        "execute_tools",
+        graph_node(
+            "execute_tools", RunnableLambda(execute_tools, afunc=aexecute_tools)
+        ),
+    )
+    builder.add_node(
+        "revise",
+        graph_node(
+            "revise",
+            RunnableLambda(compact_history) | revisor,
+            counts_iteration=True,
+        ),
+    )
+    builder.add_conditional_edges(
+        "draft",
+        unless_deadline_exceeded("execute_tools"),
+        {END: END, "execute_tools": "execute_tools"},
+    )
+    builder.add_conditional_edges(
+        "execute_tools",
+        unless_deadline_exceeded("revise"),
+        {END: END, "revise": "revise"},
+    )
     builder.add_conditional_edges(
         "revise", event_loop, {END: END, "execute_tools": "execute_tools"}
     )
     builder.set_entry_point("draft")
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
+
+
+@functools.lru_cache(maxsize=None)
+def get_graph():
+    """Return the shared compiled graph, compiling it on first use."""
+    return create_graph(create_checkpointer())
+
 
+def __getattr__(name: str):
+    # ``main.graph`` is compiled on first access rather than at import.
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up() -> None:
+    """Compile the graph and build the LLM and search clients ahead of traffic."""
+    import chains
+    import tool_executor
+
+    get_graph()
+    for tool in (AnswerQuestion, ReviseAnswer):
+        chains.bind_tool(chains.llm, tool)
+    tool_executor.tavily_tool.tool.get()
 
-# Create the graph instance
-graph = create_graph()
 
 if __name__ == "__main__":
-    res = graph.invoke(
-        "Write about AI-Powered SOC / autonomous soc  problem domain, list startups that do that and raised capital."
-    )
+    res = get_graph().invoke(
+        initial_state(
+            "Write about AI-Powered SOC / autonomous soc  problem domain, list startups that do that and raised capital."
+        )
+    )["messages"]
     print(res[-1].tool_calls[0]["args"]["answer"])
     print(res)
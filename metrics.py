@@ -0,0 +1,309 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Metrics are created once at import time and every label combination is
+bound up front with ``labels()``, so recording a value on the hot path is a
+lock, an add and (for histograms) a bisect over a short bucket list.
+``Registry.render`` produces the body served at ``GET /metrics``.
+"""
+
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """Build the value holder for one label combination."""
+
+    def labels(self, *values: str):
+        """Return the child for one label combination, creating it once."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._new_child()
+            return child
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every label combination."""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} "
+            f"{_format_value(child.value)}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed, cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        samples = []
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames + ("le",), values + (_format_value(bound),)
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class CallbackMetric:
+    """Metric whose value is read from ``read`` when the registry renders.
+
+    Used to expose counters other components already keep, such as the
+    cache hit/miss counts, without touching their hot paths.
+    """
+
+    def __init__(
+        self, name: str, documentation: str, read: Callable[[], float], kind: str
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+
+    def render(self) -> str:
+        return (
+            f"# HELP {self.name} {self.documentation}\n"
+            f"# TYPE {self.name} {self.kind}\n"
+            f"{self.name} {_format_value(self.read())}"
+        )
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float],
+        kind: str = "counter",
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, read, kind))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+GRAPH_NODES = ("draft", "execute_tools", "revise")
+LLM_NODES = ("draft", "revise")
+
+node_seconds = registry.histogram(
+    "reflexion_node_duration_seconds",
+    "Wall time of one graph node execution.",
+    ["node"],
+)
+llm_tokens = registry.counter(
+    "reflexion_llm_tokens_total",
+    "Tokens reported by the chat model, by node and kind (prompt, completion, "
+    "and the cached part of the prompt).",
+    ["node", "kind"],
+)
+search_seconds = registry.histogram(
+    "reflexion_search_duration_seconds",
+    "Wall time of one upstream search call, without cache hits or rate-limit " "waits.",
+)
+search_queries = registry.counter(
+    "reflexion_search_queries_total", "Search queries sent to the search tool."
+)
+search_results = registry.histogram(
+    "reflexion_search_results",
+    "Result entries returned per search query.",
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+run_iterations = registry.histogram(
+    "reflexion_run_iterations",
+    "Revise steps taken by one research run.",
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+early_exits = registry.counter(
+    "reflexion_early_exits_total",
+    "Runs whose revise loop stopped early on convergence, by reason.",
+    ["reason"],
+)
+admission_wait_seconds = registry.histogram(
+    "reflexion_admission_wait_seconds",
+    "Time an admitted request waited for a run slot.",
+)
+admission_rejections = registry.counter(
+    "reflexion_admission_rejections_total",
+    "Requests rejected with 429 by admission control, by reason.",
+    ["reason"],
+)
+search_events = registry.counter(
+    "reflexion_search_events_total",
+    "Search query retries, hedged duplicates, timed-out attempts and "
+    "queries given up on.",
+    ["event"],
+)
+context_cache_events = registry.counter(
+    "reflexion_context_cache_events_total",
+    "Gemini context caches created for a static prompt prefix, failed "
+    "creations, and prefixes below the minimum cacheable size.",
+    ["event"],
+)
+rate_limit_wait_seconds = registry.histogram(
+    "reflexion_rate_limit_wait_seconds",
+    "Delay imposed by the client-side rate limiter before an upstream call.",
+    ["upstream"],
+)
+
+# Bind every label combination now so recording never builds label tuples.
+NODE_SECONDS = {node: node_seconds.labels(node) for node in GRAPH_NODES}
+PROMPT_TOKENS = {node: llm_tokens.labels(node, "prompt") for node in LLM_NODES}
+COMPLETION_TOKENS = {node: llm_tokens.labels(node, "completion") for node in LLM_NODES}
+CACHED_TOKENS = {node: llm_tokens.labels(node, "cached") for node in LLM_NODES}
+SEARCH_SECONDS = search_seconds.labels()
+SEARCH_QUERIES = search_queries.labels()
+SEARCH_RESULTS = search_results.labels()
+RUN_ITERATIONS = run_iterations.labels()
+EARLY_EXITS = {
+    reason: early_exits.labels(reason)
+    for reason in ("stable_answer", "no_critique", "no_new_queries")
+}
+ADMISSION_WAIT_SECONDS = admission_wait_seconds.labels()
+SEARCH_EVENTS = {
+    event: search_events.labels(event)
+    for event in ("retry", "hedge", "timeout", "failure")
+}
+CONTEXT_CACHE_EVENTS = {
+    event: context_cache_events.labels(event)
+    for event in ("created", "failed", "too_small")
+}
+RATE_LIMIT_WAIT_SECONDS = {
+    upstream: rate_limit_wait_seconds.labels(upstream)
+    for upstream in ("gemini", "tavily")
+}
+ADMISSION_REJECTIONS = {
+    reason: admission_rejections.labels(reason)
+    for reason in ("client_limit", "queue_full", "timeout")
+}
+
+
+def record_token_usage(node: str, message: Any) -> None:
+    """Count the prompt, completion and cached tokens reported for ``message``."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage or node not in PROMPT_TOKENS:
+        return
+    PROMPT_TOKENS[node].inc(usage.get("input_tokens", 0))
+    COMPLETION_TOKENS[node].inc(usage.get("output_tokens", 0))
+    details = usage.get("input_token_details") or {}
+    CACHED_TOKENS[node].inc(details.get("cache_read", 0) or 0)
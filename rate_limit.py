@@ -0,0 +1,190 @@
+"""Client-side rate limits for the Gemini and Tavily upstreams.
+
+Every graph run in the process shares one limiter per upstream, so under
+load calls are spaced out to the configured quota instead of bursting past
+it and coming back as 429s. Each limiter is a pair of token buckets:
+
+- requests per second (``GEMINI_REQUESTS_PER_SECOND``,
+  ``TAVILY_REQUESTS_PER_SECOND``), with a burst of one second's worth;
+- tokens per minute (``GEMINI_TOKENS_PER_MINUTE``), charged with a prompt
+  estimate before the call and corrected with the usage the model reports.
+
+A rate of 0 disables that bucket.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from metrics import RATE_LIMIT_WAIT_SECONDS
+from text_utils import estimate_tokens
+
+GEMINI_REQUESTS_PER_SECOND = float(os.getenv("GEMINI_REQUESTS_PER_SECOND", 0))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", 0))
+TAVILY_REQUESTS_PER_SECOND = float(os.getenv("TAVILY_REQUESTS_PER_SECOND", 0))
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of polling.
+
+    ``reserve`` takes the tokens at once, letting the level go negative, and
+    returns how long the caller must wait for the debt to refill. Callers
+    are therefore served in arrival order and nobody spins.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens and return the seconds to wait before using them."""
+        with self._lock:
+            self._refill()
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Give back tokens that were reserved but not used."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-second and tokens-per-minute limits for one upstream."""
+
+    def __init__(
+        self,
+        upstream: str,
+        requests_per_second: float = 0,
+        tokens_per_minute: float = 0,
+    ):
+        self.upstream = upstream
+        self.requests = (
+            TokenBucket(requests_per_second, max(1.0, requests_per_second))
+            if requests_per_second > 0
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+            if tokens_per_minute > 0
+            else None
+        )
+        self._wait_seconds = RATE_LIMIT_WAIT_SECONDS[upstream]
+
+    def _reserve(self, requests: int, tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None and requests:
+            delay = self.requests.reserve(requests)
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if delay:
+            self._wait_seconds.observe(delay)
+        return delay
+
+    def _refund(self, requests: int, tokens: int) -> None:
+        if self.requests is not None and requests:
+            self.requests.refund(requests)
+        if self.tokens is not None and tokens:
+            self.tokens.refund(tokens)
+
+    def acquire(self, requests: int = 1, tokens: int = 0) -> None:
+        """Block until ``requests`` calls using ``tokens`` tokens may be sent."""
+        delay = self._reserve(requests, tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, requests: int = 1, tokens: int = 0) -> None:
+        """Async ``acquire``; a cancelled waiter gives its reservation back."""
+        delay = self._reserve(requests, tokens)
+        if not delay:
+            return
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._refund(requests, tokens)
+            raise
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct a tokens-per-minute reservation once real usage is known."""
+        if self.tokens is None or actual is None or actual == estimated:
+            return
+        if actual > estimated:
+            self.tokens.reserve(actual - estimated)
+        else:
+            self.tokens.refund(estimated - actual)
+
+
+gemini_limiter = RateLimiter(
+    "gemini", GEMINI_REQUESTS_PER_SECOND, GEMINI_TOKENS_PER_MINUTE
+)
+tavily_limiter = RateLimiter("tavily", TAVILY_REQUESTS_PER_SECOND)
+
+
+def _prompt_tokens(prompt: Any) -> int:
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    return estimate_tokens(text)
+
+
+def _used_tokens(message: Any) -> Optional[int]:
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+def rate_limited(model: Runnable, limiter: RateLimiter) -> Runnable:
+    """Wrap a chat model so each call waits for ``limiter`` first.
+
+    The call is charged one request and the prompt's estimated tokens; the
+    estimate is corrected with the model's reported usage afterwards.
+    """
+
+    def _invoke(prompt, config):
+        estimated = _prompt_tokens(prompt) if limiter.tokens else 0
+        limiter.acquire(tokens=estimated)
+        message = model.invoke(prompt, config)
+        limiter.settle(estimated, _used_tokens(message))
+        return message
+
+    async def _ainvoke(prompt, config):
+        estimated = _prompt_tokens(prompt) if limiter.tokens else 0
+        await limiter.aacquire(tokens=estimated)
+        message = await model.ainvoke(prompt, config)
+        limiter.settle(estimated, _used_tokens(message))
+        return message
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name="rate_limited")
+
+
+class RateLimitedSearchTool:
+    """Wrap a search tool so every query sent upstream waits for ``limiter``.
+
+    Sits under ``CachedSearchTool``, so cache hits are never charged. Only
+    ``batch``/``abatch`` are intercepted; everything else is delegated.
+    """
+
+    def __init__(self, tool: Any, limiter: RateLimiter):
+        self.tool = tool
+        self.limiter = limiter
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool, name)
+
+    def batch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        self.limiter.acquire(requests=len(inputs))
+        return self.tool.batch(inputs, *args, **kwargs)
+
+    async def abatch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        await self.limiter.aacquire(requests=len(inputs))
+        return await self.tool.abatch(inputs, *args, **kwargs)
@@ -0,0 +1,329 @@
+"""Record/replay stand-ins for the Gemini chat model and the Tavily search tool.
+
+Set ``REPLAY_MODE`` to run the graph without live upstreams:
+
+- ``off`` (default): use the real clients.
+- ``record``: call the real clients and save every response to a cassette.
+- ``replay``: answer only from the cassette; a missing entry raises
+  ``CassetteMiss``.
+- ``synthetic``: answer from the cassette when possible, otherwise
+  generate a deterministic, schema-valid response. No API keys needed,
+  which makes it the mode for load tests and benchmarks.
+
+Cassettes are JSON files in ``REPLAY_CASSETTE_DIR``. Replayed and
+synthetic responses sleep for ``REPLAY_LLM_LATENCY_MS`` /
+``REPLAY_SEARCH_LATENCY_MS`` to approximate upstream latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from search_cache import make_cache_key
+
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()
+REPLAY_CASSETTE_DIR = os.getenv("REPLAY_CASSETTE_DIR", "cassettes")
+REPLAY_LLM_LATENCY_MS = float(os.getenv("REPLAY_LLM_LATENCY_MS", 0))
+REPLAY_SEARCH_LATENCY_MS = float(os.getenv("REPLAY_SEARCH_LATENCY_MS", 0))
+
+REPLAY_MODES = ("off", "record", "replay", "synthetic")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """A JSON file of recorded responses, keyed by request fingerprint."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as cassette_file:
+                self._entries = json.load(cassette_file)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            if self.path:
+                self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, delete=False, encoding="utf-8"
+        ) as tmp_file:
+            json.dump(self._entries, tmp_file, indent=1, sort_keys=True)
+        os.replace(tmp_file.name, self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _without_id(message: Dict[str, Any]) -> Dict[str, Any]:
+    return {**message, "data": {**message["data"], "id": None}}
+
+
+def chat_request_key(
+    messages: Sequence[BaseMessage], tools: Optional[List[dict]], tool_choice: Any
+) -> str:
+    """Fingerprint a chat request.
+
+    System messages are left out: they carry the volatile current date,
+    and the bound tool already tells the draft and revise prompts apart.
+    Message IDs are random per run and are dropped as well.
+    """
+    payload = {
+        "messages": [
+            _without_id(message_to_dict(message))
+            for message in messages
+            if not isinstance(message, SystemMessage)
+        ],
+        "tools": [tool["function"]["name"] for tool in tools or []],
+        "tool_choice": tool_choice,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def synthetic_tool_call(
+    messages: Sequence[BaseMessage], tools: List[dict], key: str
+) -> AIMessage:
+    """Build a deterministic, schema-valid tool call for the first bound tool.
+
+    Answer details and search queries are derived from the request ``key``,
+    so each round differs from the last and never looks converged.
+    """
+    tool_name = tools[0]["function"]["name"]
+    properties = tools[0]["function"]["parameters"].get("properties", {})
+    question = next(
+        (m.content for m in messages if isinstance(m, HumanMessage)), "the question"
+    )
+    words = [key[i : i + 4] for i in range(0, 32, 4)]
+
+    args: Dict[str, Any] = {
+        "answer": f"Synthetic answer to: {question}. "
+        + " ".join(f"Detail {key[:8]}n{i}." for i in range(40)),
+        "reflection": {
+            "missing": "Specific figures and sources.",
+            "superfluous": "Generic background.",
+        },
+        "search_queries": [
+            f"{question} {' '.join(words[:4])}",
+            f"{question} {' '.join(words[4:])}",
+        ],
+    }
+    if "references" in properties:
+        args["references"] = [f"https://example.com/source/{key[:8]}"]
+    args = {name: value for name, value in args.items() if name in properties}
+
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": tool_name, "args": args, "id": f"call_{key[:16]}"}],
+    )
+
+
+def synthetic_search_result(query: str, max_results: int) -> Dict[str, Any]:
+    """Build a deterministic Tavily-shaped search response for ``query``."""
+    slug = hashlib.sha1(query.encode()).hexdigest()[:10]
+    return {
+        "query": query,
+        "results": [
+            {
+                "title": f"{query} - source {i + 1}",
+                "url": f"https://example.com/{slug}/{i + 1}",
+                "content": f"Synthetic finding {i + 1} about {query}. " * 12,
+                "score": round(1 - i * 0.1, 2),
+                "raw_content": None,
+            }
+            for i in range(max_results)
+        ],
+        "response_time": 0.0,
+    }
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that records, replays or synthesizes tool-calling responses."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cassette: Cassette
+    mode: str = "replay"
+    inner: Optional[Any] = None
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    def _lookup(self, key, messages, tools) -> Optional[AIMessage]:
+        recorded = self.cassette.get(key)
+        if recorded is not None:
+            return messages_from_dict([recorded])[0]
+        if self.mode == "synthetic" and tools:
+            return synthetic_tool_call(messages, tools, key)
+        if self.mode != "record":
+            raise CassetteMiss(key)
+        return None
+
+    def _record(self, key: str, message: AIMessage) -> AIMessage:
+        self.cassette.put(key, message_to_dict(message))
+        return message
+
+    def _generate(
+        self,
+        messages,
+        stop=None,
+        run_manager=None,
+        tools=None,
+        tool_choice=None,
+        **kwargs,
+    ) -> ChatResult:
+        key = chat_request_key(messages, tools, tool_choice)
+        message = self._lookup(key, messages, tools)
+        if message is None:
+            bound = self.inner.bind_tools(tools, tool_choice=tool_choice)
+            message = self._record(key, bound.invoke(messages))
+        elif self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages,
+        stop=None,
+        run_manager=None,
+        tools=None,
+        tool_choice=None,
+        **kwargs,
+    ) -> ChatResult:
+        key = chat_request_key(messages, tools, tool_choice)
+        message = self._lookup(key, messages, tools)
+        if message is None:
+            bound = self.inner.bind_tools(tools, tool_choice=tool_choice)
+            message = self._record(key, await bound.ainvoke(messages))
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ReplaySearchTool:
+    """Search tool that records, replays or synthesizes Tavily responses."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = "replay",
+        inner: Any = None,
+        latency: float = 0.0,
+        max_results: int = 5,
+    ):
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency
+        self.max_results = getattr(inner, "max_results", max_results)
+
+    def _lookup(self, inputs: List[Dict[str, Any]]):
+        keys = [make_cache_key(item["query"], self.max_results) for item in inputs]
+        results = []
+        for item, key in zip(inputs, keys):
+            result = self.cassette.get(key)
+            if result is None and self.mode == "synthetic":
+                result = synthetic_search_result(item["query"], self.max_results)
+            elif result is None and self.mode != "record":
+                raise CassetteMiss(key)
+            results.append(result)
+        missing = [i for i, result in enumerate(results) if result is None]
+        return keys, results, missing
+
+    def _record(self, keys, results, missing, fetched) -> List[Any]:
+        for i, result in zip(missing, fetched):
+            results[i] = result
+            if isinstance(result, dict) and "error" not in result:
+                self.cassette.put(keys[i], result)
+        return results
+
+    def batch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        keys, results, missing = self._lookup(inputs)
+        if missing:
+            fetched = self.inner.batch([inputs[i] for i in missing], *args, **kwargs)
+            return self._record(keys, results, missing, fetched)
+        if self.latency:
+            time.sleep(self.latency)
+        return results
+
+    async def abatch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        keys, results, missing = self._lookup(inputs)
+        if missing:
+            fetched = await self.inner.abatch(
+                [inputs[i] for i in missing], *args, **kwargs
+            )
+            return self._record(keys, results, missing, fetched)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return results
+
+
+def _check_mode(mode: str) -> str:
+    if mode not in REPLAY_MODES:
+        raise ValueError(f"REPLAY_MODE must be one of {REPLAY_MODES}, got {mode!r}")
+    return mode
+
+
+def wrap_chat_model(
+    factory: Callable[[], BaseChatModel], mode: str = REPLAY_MODE
+) -> BaseChatModel:
+    """Return the real chat model, or a replay stand-in when REPLAY_MODE is set.
+
+    The real model is only constructed when it is actually called, i.e. in
+    ``off`` and ``record`` modes.
+    """
+    if _check_mode(mode) == "off":
+        return factory()
+    return ReplayChatModel(
+        cassette=Cassette(os.path.join(REPLAY_CASSETTE_DIR, "llm.json")),
+        mode=mode,
+        inner=factory() if mode == "record" else None,
+        latency=REPLAY_LLM_LATENCY_MS / 1000,
+    )
+
+
+def wrap_search_tool(factory: Callable[[], Any], mode: str = REPLAY_MODE) -> Any:
+    """Return the real search tool, or a replay stand-in when REPLAY_MODE is set."""
+    if _check_mode(mode) == "off":
+        return factory()
+    return ReplaySearchTool(
+        Cassette(os.path.join(REPLAY_CASSETTE_DIR, "search.json")),
+        mode=mode,
+        inner=factory() if mode == "record" else None,
+        latency=REPLAY_SEARCH_LATENCY_MS / 1000,
+    )
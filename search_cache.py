@@ -0,0 +1,230 @@
+"""Search-result cache in front of the Tavily tool.
+
+Results are cached per normalized query and ``max_results`` in up to two
+tiers: an in-process LRU and an optional SQLite database that several
+uvicorn workers can share. Hits never touch the network.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from text_utils import normalize_query
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 24 * 60 * 60))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 1024))
+SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB")
+SEARCH_CACHE_DB_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_DB_MAX_ENTRIES", 100_000))
+
+# A SQLite hit only rewrites its ``accessed_at`` once it is older than this
+# fraction of the TTL, so hot keys do not cost a write on every read.
+ACCESS_REFRESH_FRACTION = 0.1
+
+
+def make_cache_key(query: str, max_results: Optional[int]) -> str:
+    """Build the cache key for a query and result count."""
+    return f"{max_results}:{normalize_query(query)}"
+
+
+class LRUCacheTier:
+    """In-process LRU tier with per-entry expiry."""
+
+    def __init__(
+        self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl: float = SEARCH_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """On-disk tier shared between processes through a SQLite database.
+
+    Each cache keeps its entries in its own ``table``, so several caches can
+    share one database file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = SEARCH_CACHE_DB_MAX_ENTRIES,
+        ttl: float = SEARCH_CACHE_TTL,
+        table: str = "search_cache",
+    ):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, accessed_at FROM {self.table}"
+                " WHERE key = ? AND expires_at >= ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl * ACCESS_REFRESH_FRACTION:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                    (now, key),
+                )
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now),
+            )
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f" SELECT key FROM {self.table} ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+        return count
+
+
+class SearchCache:
+    """Tiered cache that checks each tier in order and backfills faster tiers."""
+
+    def __init__(self, tiers: Sequence[Any]):
+        self.tiers = list(tiers)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "SearchCache":
+        """Build the cache configured by the SEARCH_CACHE_* environment variables."""
+        tiers: List[Any] = [LRUCacheTier()]
+        if SEARCH_CACHE_DB:
+            tiers.append(SQLiteCacheTier(SEARCH_CACHE_DB))
+        return cls(tiers)
+
+    def get(self, key: str) -> Optional[Any]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size of each tier."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": {type(tier).__name__: len(tier) for tier in self.tiers},
+        }
+
+
+class CachedSearchTool:
+    """Wrap a search tool so cached queries skip the network entirely.
+
+    Only ``batch``/``abatch`` are intercepted; everything else is delegated
+    to the wrapped tool.
+    """
+
+    def __init__(self, tool: Any, cache: SearchCache):
+        self.tool = tool
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool, name)
+
+    def _lookup(self, inputs: List[Dict[str, Any]]):
+        max_results = getattr(self.tool, "max_results", None)
+        keys = [make_cache_key(item["query"], max_results) for item in inputs]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        return keys, results, missing
+
+    def _store(self, keys, results, missing, fetched) -> List[Any]:
+        for i, result in zip(missing, fetched):
+            results[i] = result
+            if isinstance(result, dict) and "error" not in result:
+                self.cache.set(keys[i], result)
+        return results
+
+    def batch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        keys, results, missing = self._lookup(inputs)
+        fetched = (
+            self.tool.batch([inputs[i] for i in missing], *args, **kwargs)
+            if missing
+            else []
+        )
+        return self._store(keys, results, missing, fetched)
+
+    async def abatch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        keys, results, missing = self._lookup(inputs)
+        fetched = (
+            await self.tool.abatch([inputs[i] for i in missing], *args, **kwargs)
+            if missing
+            else []
+        )
+        return self._store(keys, results, missing, fetched)
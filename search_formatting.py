@@ -0,0 +1,67 @@
+"""Compact rendering of search results for the revisor prompt.
+
+Instead of the Python repr of the whole Tavily payload (scores, empty
+fields, raw content), each result is rendered as a numbered source with
+its title, URL and a trimmed snippet. Numbers continue across iterations,
+so the ``[n]`` labels line up with the citations in ``ReviseAnswer``.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", 500))
+SEARCH_ITERATION_CHARS = int(os.getenv("SEARCH_ITERATION_CHARS", 6000))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def result_entries(result: Any) -> List[Dict[str, Any]]:
+    """Return the individual result entries of a search response."""
+    if isinstance(result, dict):
+        if isinstance(result.get("results"), list):
+            return [entry for entry in result["results"] if isinstance(entry, dict)]
+        if "error" not in result:
+            return [result]
+    return []
+
+
+def trim_snippet(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut ``text`` at a word boundary."""
+    text = _WHITESPACE.sub(" ", text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def snippet_budget(total_entries: int) -> int:
+    """Characters each snippet may use so one iteration fits its budget."""
+    if total_entries <= 0:
+        return SEARCH_SNIPPET_CHARS
+    return max(80, min(SEARCH_SNIPPET_CHARS, SEARCH_ITERATION_CHARS // total_entries))
+
+
+def render_search_result(
+    query: str, result: Any, first_number: int, snippet_chars: int
+) -> Tuple[str, int]:
+    """Render one search response; return the text and how many sources it numbered."""
+    if isinstance(result, dict) and "error" in result:
+        return f"Search {query!r} failed: {result['error']}", 0
+
+    entries = result_entries(result)
+    if not entries:
+        if isinstance(result, dict):
+            return f"Search {query!r}: no new results.", 0
+        return f"Search {query!r}:\n{trim_snippet(str(result), snippet_chars)}", 0
+
+    lines = [f"Search {query!r}:"]
+    for number, entry in enumerate(entries, start=first_number):
+        title = entry.get("title") or "Untitled"
+        lines.append(f"[{number}] {title}")
+        if entry.get("url"):
+            lines.append(f"URL: {entry['url']}")
+        snippet = trim_snippet(entry.get("content", ""), snippet_chars)
+        if snippet:
+            lines.append(snippet)
+    return "\n".join(lines), len(entries)
@@ -0,0 +1,100 @@
+"""Track the searches already run during one research run.
+
+The revisor frequently re-emits queries it has already searched, sometimes
+reworded. ``SearchHistory`` is rebuilt from the message history on every
+``execute_tools`` call, flags near-duplicate queries so they are not sent
+again, and drops result entries whose URL was already shown to the model.
+"""
+
+from typing import Any, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from text_utils import jaccard, token_set
+
+QUERY_SIMILARITY_THRESHOLD = 0.8
+
+
+class SearchHistory:
+    """Queries and result URLs already seen in one run."""
+
+    def __init__(self, threshold: float = QUERY_SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.queries: List[Tuple[str, frozenset]] = []
+        self.urls: Set[str] = set()
+        self.next_source = 1
+
+    @classmethod
+    def from_messages(
+        cls,
+        messages: Sequence[BaseMessage],
+        threshold: float = QUERY_SIMILARITY_THRESHOLD,
+    ) -> "SearchHistory":
+        """Rebuild the history from the messages of earlier iterations."""
+        history = cls(threshold)
+        for message in messages:
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    for query in tool_call.get("args", {}).get("search_queries", []):
+                        history.add_query(query)
+            elif isinstance(message, ToolMessage) and isinstance(
+                message.artifact, dict
+            ):
+                history.urls.update(message.artifact.get("urls", []))
+                history.next_source += message.artifact.get("sources", 0)
+        return history
+
+    def add_query(self, query: str) -> None:
+        self.queries.append((query, token_set(query)))
+
+    def match(self, query: str) -> Optional[str]:
+        """Return the earlier query ``query`` duplicates, if any."""
+        tokens = token_set(query)
+        for previous, previous_tokens in self.queries:
+            if jaccard(tokens, previous_tokens) >= self.threshold:
+                return previous
+        return None
+
+    def plan(self, queries: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+        """Pair each query with the earlier query it duplicates (or None).
+
+        Queries that are new are recorded, so later near-duplicates within
+        the same batch are caught as well.
+        """
+        planned = []
+        for query in queries:
+            duplicate_of = self.match(query)
+            if duplicate_of is None:
+                self.add_query(query)
+            planned.append((query, duplicate_of))
+        return planned
+
+    def collapse(self, result: Any) -> Tuple[Any, List[str]]:
+        """Drop result entries whose URL was already seen; return the new URLs.
+
+        The cached result object is never mutated.
+        """
+        if not isinstance(result, dict) or not isinstance(result.get("results"), list):
+            url = result.get("url") if isinstance(result, dict) else None
+            if url:
+                self.urls.add(url)
+            return result, [url] if url else []
+
+        kept, new_urls = [], []
+        for entry in result["results"]:
+            url = entry.get("url") if isinstance(entry, dict) else None
+            if url and url in self.urls:
+                continue
+            if url:
+                self.urls.add(url)
+                new_urls.append(url)
+            kept.append(entry)
+        return {**result, "results": kept}, new_urls
+
+
+def duplicate_search_message(query: str, duplicate_of: str) -> str:
+    """Short tool output used in place of re-running a duplicate search."""
+    return (
+        f"Skipped search {query!r}: it repeats the earlier search "
+        f"{duplicate_of!r}, so it was not run again."
+    )
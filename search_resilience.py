@@ -0,0 +1,263 @@
+"""Per-query timeouts, retries and hedging for search batches.
+
+A Tavily batch is only as fast as its slowest query. ``ResilientSearchTool``
+sends every query of a batch on its own, so one straggler no longer holds
+up the others, and bounds each query:
+
+- every attempt gets ``SEARCH_TIMEOUT`` seconds;
+- failed or timed-out attempts are retried up to ``SEARCH_RETRIES`` times
+  after a jittered exponential backoff (``SEARCH_RETRY_BACKOFF``);
+- with ``SEARCH_HEDGE`` on, an attempt still running after the p95 of
+  recent query latencies gets a duplicate request, and the first good
+  answer wins.
+
+A query that still fails comes back as an ``{"error": ...}`` result, which
+the renderer reports to the model as a failed search, so the iteration
+continues with the results it has.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from langchain_core.tools import ToolException
+
+from metrics import SEARCH_EVENTS
+
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", 10))
+SEARCH_RETRIES = int(os.getenv("SEARCH_RETRIES", 2))
+SEARCH_RETRY_BACKOFF = float(os.getenv("SEARCH_RETRY_BACKOFF", 0.5))
+SEARCH_HEDGE = os.getenv("SEARCH_HEDGE", "false").lower() in ("1", "true", "yes")
+
+# Latencies kept for the hedge delay, and how many are needed before hedging.
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class SearchFailed(Exception):
+    """One attempt at a query failed or returned an error result."""
+
+
+class LatencyTracker:
+    """Rolling window of successful query latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the ``fraction`` quantile, or None without enough samples."""
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _max_concurrency(kwargs: Dict[str, Any]) -> Optional[int]:
+    config = kwargs.get("config")
+    if isinstance(config, list):
+        config = config[0] if config else None
+    return (config or {}).get("max_concurrency")
+
+
+def _checked(result: Any) -> Any:
+    if isinstance(result, dict) and "error" in result:
+        raise SearchFailed(str(result["error"]))
+    return result
+
+
+class ResilientSearchTool:
+    """Wrap a search tool with per-query timeouts, retries and hedging.
+
+    Only ``batch``/``abatch`` are intercepted; everything else is delegated
+    to the wrapped tool. Queries go to the wrapped tool's ``batch`` /
+    ``abatch`` one at a time, so wrappers below (e.g. the rate limiter)
+    see every attempt. ``config={"max_concurrency": n}`` caps how many
+    queries of a batch are in flight at once.
+    """
+
+    def __init__(
+        self,
+        tool: Any,
+        timeout: float = SEARCH_TIMEOUT,
+        retries: int = SEARCH_RETRIES,
+        backoff: float = SEARCH_RETRY_BACKOFF,
+        hedge: bool = SEARCH_HEDGE,
+        latencies: Optional[LatencyTracker] = None,
+    ):
+        self.tool = tool
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.latencies = latencies or LatencyTracker()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool, name)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        delay = self.latencies.percentile(0.95)
+        return delay if delay is not None and delay < self.timeout else None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * 2**attempt)
+
+    def _retry(self, attempt: int, error: Exception) -> Optional[float]:
+        """Return the backoff before the next attempt, or None to give up."""
+        if isinstance(error, ToolException) or attempt >= self.retries:
+            return None
+        SEARCH_EVENTS["retry"].inc()
+        return self._backoff_delay(attempt)
+
+    def _failed(self, attempts: int, error: Exception) -> Dict[str, Any]:
+        if isinstance(error, ToolException):
+            return {"error": str(error)}
+        SEARCH_EVENTS["failure"].inc()
+        if isinstance(error, (asyncio.TimeoutError, concurrent.futures.TimeoutError)):
+            error = f"timed out after {self.timeout:g}s"
+        return {"error": f"{error} ({attempts} attempts)"}
+
+    # Async path
+
+    async def _acall(self, item: Dict[str, Any], args, kwargs) -> Any:
+        started = time.perf_counter()
+        (result,) = await self.tool.abatch([item], *args, **kwargs)
+        result = _checked(result)
+        self.latencies.add(time.perf_counter() - started)
+        return result
+
+    async def _aattempt(self, item: Dict[str, Any], args, kwargs) -> Any:
+        deadline = time.monotonic() + self.timeout
+        delay = self._hedge_delay()
+        pending = {asyncio.ensure_future(self._acall(item, args, kwargs))}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    SEARCH_EVENTS["hedge"].inc()
+                    pending.add(asyncio.ensure_future(self._acall(item, args, kwargs)))
+            error: Optional[BaseException] = None
+            while pending:
+                remaining = deadline - time.monotonic()
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, remaining),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _aquery(self, item: Dict[str, Any], args, kwargs) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await self._aattempt(item, args, kwargs)
+            except asyncio.TimeoutError as e:
+                SEARCH_EVENTS["timeout"].inc()
+                error: Exception = e
+            except Exception as e:
+                error = e
+            delay = self._retry(attempt, error)
+            if delay is None:
+                return self._failed(attempt + 1, error)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def abatch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        limit = asyncio.Semaphore(_max_concurrency(kwargs) or len(inputs) or 1)
+
+        async def query(item: Dict[str, Any]) -> Any:
+            async with limit:
+                return await self._aquery(item, args, kwargs)
+
+        return list(await asyncio.gather(*(query(item) for item in inputs)))
+
+    # Sync path: the same policy on a thread pool. Abandoned attempts are
+    # left to finish in the background, since threads cannot be cancelled.
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="search"
+            )
+        return self._executor
+
+    def _call(self, item: Dict[str, Any], args, kwargs) -> Any:
+        started = time.perf_counter()
+        (result,) = self.tool.batch([item], *args, **kwargs)
+        result = _checked(result)
+        self.latencies.add(time.perf_counter() - started)
+        return result
+
+    def _attempt(self, item: Dict[str, Any], args, kwargs) -> Any:
+        def submit() -> concurrent.futures.Future:
+            return self._pool().submit(self._call, item, args, kwargs)
+
+        deadline = time.monotonic() + self.timeout
+        pending = {submit()}
+        delay = self._hedge_delay()
+        if delay is not None:
+            done, _ = concurrent.futures.wait(pending, timeout=delay)
+            if not done:
+                SEARCH_EVENTS["hedge"].inc()
+                pending.add(submit())
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=max(0.0, deadline - time.monotonic()),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                raise concurrent.futures.TimeoutError()
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _query(self, item: Dict[str, Any], args, kwargs) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(item, args, kwargs)
+            except concurrent.futures.TimeoutError as e:
+                SEARCH_EVENTS["timeout"].inc()
+                error: Exception = e
+            except Exception as e:
+                error = e
+            delay = self._retry(attempt, error)
+            if delay is None:
+                return self._failed(attempt + 1, error)
+            time.sleep(delay)
+            attempt += 1
+
+    def batch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        workers = min(len(inputs), _max_concurrency(kwargs) or len(inputs))
+        if workers <= 1:
+            return [self._query(item, args, kwargs) for item in inputs]
+        with concurrent.futures.ThreadPoolExecutor(workers) as queries:
+            return list(
+                queries.map(lambda item: self._query(item, args, kwargs), inputs)
+            )
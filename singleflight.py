@@ -0,0 +1,125 @@
+"""Coalesce identical in-flight research runs.
+
+When the same query arrives again while a run for it is still going, the
+new caller attaches to that run instead of starting another one:
+``SingleFlight.do`` shares the awaited result, ``SingleFlight.stream``
+replays and then follows the events of the running stream.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BroadcastStream:
+    """Fan one async event source out to any number of subscribers.
+
+    Events are kept for the lifetime of the run, so a subscriber that joins
+    late still receives every event from the start.
+    """
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.events: List[str] = []
+        self.done = False
+        self._changed = asyncio.Condition()
+        self.task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for event in source:
+                async with self._changed:
+                    self.events.append(event)
+                    self._changed.notify_all()
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: position < len(self.events) or self.done
+                )
+                pending = self.events[position:]
+                finished = self.done
+            for event in pending:
+                yield event
+            position += len(pending)
+            if finished and position >= len(self.events):
+                return
+
+
+class SingleFlight:
+    """Track in-flight runs by key so concurrent duplicates share one run."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, BroadcastStream] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    def running(self, key: str) -> bool:
+        """Whether a run for ``key`` is in flight."""
+        return key in self._calls
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """Await the run for ``key``, starting it only if none is in flight.
+
+        The shared run is shielded, so one caller disconnecting does not
+        cancel it for the others. ``on_done`` is called once a run started
+        by this call is over, even if every caller has gone; a call that
+        joins a run already in flight calls it right away.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            if on_done is not None:
+                task.add_done_callback(lambda _: on_done())
+        elif on_done is not None:
+            on_done()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        self._calls.pop(key, None)
+        # Mark the exception as retrieved even if every caller went away.
+        if not task.cancelled():
+            task.exception()
+
+    def streaming(self, key: str) -> bool:
+        """Whether a stream for ``key`` is in flight."""
+        return key in self._streams
+
+    def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[str]],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> AsyncIterator[str]:
+        """Subscribe to the event stream for ``key``, starting it if needed.
+
+        ``on_done`` is called once a stream started by this call is over,
+        however it ended and whether or not anyone is still subscribed. A
+        call that joins a stream already in flight calls it right away.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = BroadcastStream(factory())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._streams.pop(key, None))
+            if on_done is not None:
+                broadcast.task.add_done_callback(lambda _: on_done())
+        elif on_done is not None:
+            on_done()
+        return broadcast.subscribe()
@@ -0,0 +1,38 @@
+"""Typed state shared by the reflexion graph and its callers."""
+
+import time
+from typing import Annotated, List, Optional, TypedDict
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+
+class AgentState(TypedDict, total=False):
+    """Graph state: the message history plus loop bookkeeping.
+
+    ``iterations`` counts revise steps. ``deadline`` is the wall-clock time
+    (``time.time()``) the run must finish by, or None for no budget;
+    ``deadline_exceeded`` is set once a step was skipped or cut short
+    because of it.
+    """
+
+    messages: Annotated[List[BaseMessage], add_messages]
+    iterations: int
+    deadline: Optional[float]
+    deadline_exceeded: bool
+
+
+def initial_state(query: str, deadline_ms: Optional[float] = None) -> AgentState:
+    """Graph input for a research question with an optional time budget."""
+    return {
+        "messages": [HumanMessage(content=query)],
+        "iterations": 0,
+        "deadline": time.time() + deadline_ms / 1000 if deadline_ms else None,
+        "deadline_exceeded": False,
+    }
+
+
+def time_left(state: AgentState) -> Optional[float]:
+    """Seconds until the run's deadline (may be negative), or None."""
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline - time.time()
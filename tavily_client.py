@@ -0,0 +1,129 @@
+"""Tavily search tool with a shared keep-alive HTTP connection pool.
+
+``langchain_tavily`` opens a new HTTP session for every async query and
+uses bare ``requests.post`` for sync ones, so every search pays a fresh
+TCP and TLS handshake. ``PooledTavilyAPIWrapper`` sends the same requests
+through shared ``httpx`` clients instead, with ``TAVILY_POOL_SIZE``
+connections kept alive:
+
+- async searches use the client opened by ``pooled_connections()`` for
+  the lifetime of the API server (or a batch run), which closes it on the
+  way out; outside of it each async search uses a short-lived client;
+- sync searches share one module-level client, closed together with the
+  async one.
+
+The default pool size covers every run allowed at once by admission
+control and the job workers, each searching a few queries in parallel.
+"""
+
+import contextlib
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from langchain_tavily import TavilySearch
+
+# The wrapper class of the public ``TavilySearch.api_wrapper`` field.
+from langchain_tavily.tavily_search import TavilySearchAPIWrapper
+
+from admission import ADMISSION_MAX_CONCURRENT
+from jobs import JOB_WORKERS
+
+# Queries a single draft or revision usually asks for.
+QUERIES_PER_STEP = 3
+
+TAVILY_API_URL = "https://api.tavily.com"
+TAVILY_POOL_SIZE = int(
+    os.getenv(
+        "TAVILY_POOL_SIZE", (ADMISSION_MAX_CONCURRENT + JOB_WORKERS) * QUERIES_PER_STEP
+    )
+)
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", 60))
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+_sync_lock = threading.Lock()
+
+
+def pool_limits(size: int) -> httpx.Limits:
+    """Connection limits that keep every pooled connection alive."""
+    return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+
+def sync_client() -> httpx.Client:
+    """Return the shared client for sync searches, opening it on first use."""
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(
+                limits=pool_limits(TAVILY_POOL_SIZE), timeout=TAVILY_TIMEOUT
+            )
+        return _sync_client
+
+
+@contextlib.asynccontextmanager
+async def pooled_connections(
+    size: int = TAVILY_POOL_SIZE, timeout: float = TAVILY_TIMEOUT
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Share one keep-alive pool between async searches while the context is open.
+
+    httpx async connections belong to the event loop that opened them, so
+    the context must be entered on the loop that runs the searches. Both
+    shared clients are closed when it exits.
+    """
+    global _async_client, _sync_client
+    client = _async_client = httpx.AsyncClient(
+        limits=pool_limits(size), timeout=timeout
+    )
+    try:
+        yield client
+    finally:
+        _async_client = None
+        await client.aclose()
+        with _sync_lock:
+            if _sync_client is not None:
+                _sync_client.close()
+                _sync_client = None
+
+
+class PooledTavilyAPIWrapper(TavilySearchAPIWrapper):
+    """Tavily Search API wrapper that reuses pooled HTTP connections."""
+
+    def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "url": f"{self.api_base_url or TAVILY_API_URL}/search",
+            "json": {k: v for k, v in params.items() if v is not None},
+            "headers": {
+                "Authorization": f"Bearer {self.tavily_api_key.get_secret_value()}"
+            },
+        }
+
+    @staticmethod
+    def _result(response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", {})
+            except ValueError:
+                detail = {}
+            error = (
+                detail.get("error") if isinstance(detail, dict) else None
+            ) or response.reason_phrase
+            raise ValueError(f"Error {response.status_code}: {error}")
+        return response.json()
+
+    def raw_results(self, query: str, **params: Any) -> Dict[str, Any]:
+        response = sync_client().post(**self._request({"query": query, **params}))
+        return self._result(response)
+
+    async def raw_results_async(self, query: str, **params: Any) -> Dict[str, Any]:
+        request = self._request({"query": query, **params})
+        if _async_client is not None:
+            return self._result(await _async_client.post(**request))
+        async with httpx.AsyncClient(timeout=TAVILY_TIMEOUT) as client:
+            return self._result(await client.post(**request))
+
+
+def create_tavily_tool(max_results: int = 5) -> TavilySearch:
+    """Build the Tavily search tool on top of the pooled API wrapper."""
+    return TavilySearch(max_results=max_results, api_wrapper=PooledTavilyAPIWrapper())
@@ -1,11 +1,18 @@
 """Pytest configuration and shared fixtures."""
 
+import asyncio
+import time
 from unittest.mock import MagicMock, Mock
 
 import pytest
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 
+from admission import AdmissionController
+from answer_cache import AnswerCache
+from jobs import JobManager
 from schemas import AnswerQuestion, Reflection, ReviseAnswer
+from singleflight import SingleFlight
 
 
 @pytest.fixture
@@ -95,3 +102,101 @@ def mock_parser():
         {"id": "test_call_id_123", "args": {"search_queries": ["query1", "query2"]}}
     ]
     return parser
+
+
+STUB_LATENCY = 0.05
+
+
+class StubSearchTool:
+    """Stand-in for TavilySearch that sleeps instead of calling the network."""
+
+    max_results = 5
+
+    def __init__(self, latency=STUB_LATENCY):
+        self.latency = latency
+        self.queries = []
+
+    def _result(self, query):
+        self.queries.append(query)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Result for {query}",
+                    "url": f"https://example.com/{query.replace(' ', '-')}",
+                    "content": f"Stub content about {query}.",
+                    "score": 0.9,
+                }
+            ],
+        }
+
+    def batch(self, inputs, *args, **kwargs):
+        time.sleep(self.latency)
+        return [self._result(item["query"]) for item in inputs]
+
+    async def abatch(self, inputs, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return [self._result(item["query"]) for item in inputs]
+
+
+def make_stub_chain(tool_name, latency=STUB_LATENCY):
+    """Build a runnable that mimics first_responder/revisor with fixed latency."""
+
+    def _response(messages):
+        iteration = sum(isinstance(m, AIMessage) for m in messages)
+        args = {
+            "answer": f"{tool_name} answer #{iteration}",
+            "reflection": {"missing": "More detail.", "superfluous": ""},
+            "search_queries": [f"stub query {iteration}"],
+        }
+        if tool_name == "ReviseAnswer":
+            args["references"] = ["https://example.com/ref"]
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": args, "id": f"call_{iteration}"}],
+        )
+
+    def _invoke(messages):
+        time.sleep(latency)
+        return _response(messages)
+
+    async def _ainvoke(messages):
+        await asyncio.sleep(latency)
+        return _response(messages)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke)
+
+
+@pytest.fixture
+def stub_search_tool(monkeypatch):
+    """Patch tool_executor.tavily_tool with a latency-only stand-in."""
+    import tool_executor
+
+    tool = StubSearchTool()
+    monkeypatch.setattr(tool_executor, "tavily_tool", tool)
+    return tool
+
+
+@pytest.fixture
+def stub_graph(monkeypatch, stub_search_tool):
+    """Compiled graph whose LLM and search backends are async stand-ins.
+
+    Also gives the API an empty answer cache, in-flight registry, job
+    manager and admission controller so tests do not share answers, runs,
+    jobs or run slots. Admission is sized so bursts from the single test
+    client are never rejected; admission tests install their own limits.
+    """
+    import api
+    import main
+
+    monkeypatch.setattr(main, "first_responder", make_stub_chain("AnswerQuestion"))
+    monkeypatch.setattr(main, "revisor", make_stub_chain("ReviseAnswer"))
+    graph = main.create_graph()
+    monkeypatch.setattr(api, "graph", graph)
+    monkeypatch.setattr(api, "answer_cache", AnswerCache())
+    monkeypatch.setattr(api, "in_flight", SingleFlight())
+    monkeypatch.setattr(api, "jobs", JobManager(api.run_job))
+    monkeypatch.setattr(
+        api, "admission", AdmissionController(max_concurrent=64, per_client=0)
+    )
+    return graph
@@ -0,0 +1,747 @@
+"""Integration tests for the FastAPI application."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from api import app
+from tests.conftest import STUB_LATENCY
+
+
+async def _post_queries(queries, **fields):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(
+            *(
+                client.post("/v1/agent/invoke", json={"query": query, **fields})
+                for query in queries
+            )
+        )
+
+
+async def _stream_events(query):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/v1/agent/stream", json={"query": query})
+    events = []
+    for frame in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return response, events
+
+
+class TestInvokeEndpoint:
+    """Tests for /v1/agent/invoke."""
+
+    @pytest.mark.integration
+    def test_invoke_returns_revised_answer(self, stub_graph):
+        """Test that the endpoint returns the final revised answer."""
+        (response,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["answer"].startswith("ReviseAnswer answer")
+        assert body["references"] == ["https://example.com/ref"]
+
+    @pytest.mark.integration
+    def test_parallel_requests_run_concurrently(self, stub_graph):
+        """Test that N parallel runs finish in about the time of one."""
+        start = time.perf_counter()
+        asyncio.run(_post_queries(["warm-up question"]))
+        single = time.perf_counter() - start
+
+        parallel_requests = 20
+        start = time.perf_counter()
+        responses = asyncio.run(
+            _post_queries([f"question {i}" for i in range(parallel_requests)])
+        )
+        parallel = time.perf_counter() - start
+
+        assert all(response.status_code == 200 for response in responses)
+        # Serialized execution would take ~20x as long as a single run.
+        assert parallel < single * 3
+
+    @pytest.mark.integration
+    def test_repeated_query_is_served_from_answer_cache(
+        self, stub_graph, stub_search_tool
+    ):
+        """Test that a repeated query skips the graph entirely."""
+        (first,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+        searches = len(stub_search_tool.queries)
+
+        (second,) = asyncio.run(_post_queries(["  what is an AI SOC "]))
+
+        assert second.json() == first.json()
+        assert len(stub_search_tool.queries) == searches
+
+    @pytest.mark.integration
+    def test_fresh_flag_bypasses_answer_cache(self, stub_graph, stub_search_tool):
+        """Test that fresh=true re-runs the research loop."""
+        asyncio.run(_post_queries(["What is an AI SOC?"]))
+        searches = len(stub_search_tool.queries)
+
+        asyncio.run(_post_queries(["What is an AI SOC?"], fresh=True))
+
+        assert len(stub_search_tool.queries) > searches
+
+    def test_fresh_flag_reaches_the_model_steps(self, monkeypatch, stub_graph):
+        """Test that fresh=true tells the chains to bypass the LLM cache."""
+        import api
+        import main
+
+        seen = []
+
+        def record(messages, config):
+            seen.append(config["configurable"].get("fresh"))
+            return messages
+
+        drafter = RunnableLambda(record) | main.first_responder
+        monkeypatch.setattr(main, "first_responder", drafter)
+        monkeypatch.setattr(api, "graph", main.create_graph())
+
+        asyncio.run(_post_queries(["cacheable question"]))
+        asyncio.run(_post_queries(["fresh question"], fresh=True))
+
+        assert seen == [False, True]
+
+    @pytest.mark.integration
+    def test_failed_run_resumes_by_run_id(self, monkeypatch, stub_graph, tmp_path):
+        """Test that retrying a failed run_id continues after its last step."""
+        import api
+        import main
+        from checkpoints import SQLiteCheckpointer
+
+        drafts = []
+        revisions = []
+        drafter, revisor = main.first_responder, main.revisor
+
+        async def draft(messages):
+            drafts.append(messages)
+            return await drafter.ainvoke(messages)
+
+        async def revise(messages):
+            revisions.append(messages)
+            if len(revisions) == 1:
+                raise RuntimeError("model unavailable")
+            return await revisor.ainvoke(messages)
+
+        monkeypatch.setattr(main, "first_responder", RunnableLambda(draft))
+        monkeypatch.setattr(main, "revisor", RunnableLambda(revise))
+        checkpointer = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"))
+        monkeypatch.setattr(api, "graph", main.create_graph(checkpointer))
+
+        (failed,) = asyncio.run(_post_queries(["What is an AI SOC?"], run_id="r1"))
+        (resumed,) = asyncio.run(_post_queries(["What is an AI SOC?"], run_id="r1"))
+
+        assert failed.status_code == 500
+        assert resumed.status_code == 200
+        assert resumed.json()["answer"].startswith("ReviseAnswer answer")
+        assert len(drafts) == 1
+
+    @pytest.mark.integration
+    def test_concurrent_requests_for_one_run_id_share_one_run(
+        self, monkeypatch, stub_graph, tmp_path
+    ):
+        """Test that requests sharing a run_id never run its thread twice at once."""
+        import api
+        import main
+        from checkpoints import SQLiteCheckpointer
+
+        drafts = []
+        drafter = main.first_responder
+
+        async def draft(messages):
+            drafts.append(messages)
+            return await drafter.ainvoke(messages)
+
+        monkeypatch.setattr(main, "first_responder", RunnableLambda(draft))
+        checkpointer = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"))
+        monkeypatch.setattr(api, "graph", main.create_graph(checkpointer))
+
+        async def post_all():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                bodies = [
+                    {"query": "What is an AI SOC?", "run_id": "r"},
+                    {
+                        "query": "What is an AI SOC?",
+                        "run_id": "r",
+                        "deadline_ms": 60000,
+                    },
+                    {"query": "What is an AI SOC?", "run_id": "r", "fresh": True},
+                    {"query": "Who funds SOC startups?", "run_id": "r"},
+                ]
+                return await asyncio.gather(
+                    *(client.post("/v1/agent/invoke", json=body) for body in bodies)
+                )
+
+        responses = asyncio.run(post_all())
+
+        assert [r.status_code for r in responses] == [200, 200, 200, 409]
+        assert len(drafts) == 1
+        # The thread was left whole, holding the finished run.
+        saved = api.graph.get_state({"configurable": {"thread_id": "r"}})
+        assert saved.next == ()
+        assert saved.values["iterations"] == 2
+
+    @pytest.mark.integration
+    def test_fresh_run_id_request_starts_over(self, monkeypatch, stub_graph, tmp_path):
+        """Test that fresh=true discards a saved run instead of resuming it."""
+        import api
+        import main
+        from checkpoints import SQLiteCheckpointer
+
+        drafts = []
+        drafter = main.first_responder
+
+        async def draft(messages):
+            drafts.append(messages)
+            return await drafter.ainvoke(messages)
+
+        monkeypatch.setattr(main, "first_responder", RunnableLambda(draft))
+        checkpointer = SQLiteCheckpointer(str(tmp_path / "checkpoints.db"))
+        monkeypatch.setattr(api, "graph", main.create_graph(checkpointer))
+
+        asyncio.run(_post_queries(["What is an AI SOC?"], run_id="r"))
+        asyncio.run(_post_queries(["What is an AI SOC?"], run_id="r", fresh=True))
+
+        assert len(drafts) == 2
+
+    @pytest.mark.integration
+    def test_identical_concurrent_requests_share_one_run(
+        self, stub_graph, stub_search_tool
+    ):
+        """Test that a burst of the same query runs the graph only once."""
+        asyncio.run(_post_queries(["warm-up question"], fresh=True))
+        searches_per_run = len(stub_search_tool.queries)
+        stub_search_tool.queries.clear()
+
+        responses = asyncio.run(_post_queries(["What is an AI SOC?"] * 10, fresh=True))
+
+        assert len({response.text for response in responses}) == 1
+        assert len(stub_search_tool.queries) == searches_per_run
+
+
+class TestResponseShaping:
+    """Tests for the include levels and response encoding."""
+
+    @pytest.mark.integration
+    def test_default_returns_answer_and_references(self, stub_graph):
+        """Test that the message history is left out unless asked for."""
+        (response,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+
+        body = response.json()
+        assert body["references"] == ["https://example.com/ref"]
+        assert body["messages"] is None
+
+    @pytest.mark.integration
+    def test_answer_only(self, stub_graph):
+        """Test that include=answer drops the references as well."""
+        (response,) = asyncio.run(
+            _post_queries(["What is an AI SOC?"], include="answer")
+        )
+
+        body = response.json()
+        assert body["answer"].startswith("ReviseAnswer answer")
+        assert body["references"] is None
+        assert body["messages"] is None
+
+    @pytest.mark.integration
+    def test_full_trace_is_served_from_answer_cache(self, stub_graph):
+        """Test that a cached run still has its history for include=messages."""
+        asyncio.run(_post_queries(["What is an AI SOC?"]))
+
+        (response,) = asyncio.run(
+            _post_queries(["What is an AI SOC?"], include="messages")
+        )
+
+        types = [message["type"] for message in response.json()["messages"]]
+        assert types[0] == "HumanMessage"
+        assert "ToolMessage" in types
+
+    @pytest.mark.integration
+    def test_unknown_include_level_is_422(self, stub_graph):
+        """Test that include only accepts the documented levels."""
+        (response,) = asyncio.run(
+            _post_queries(["What is an AI SOC?"], include="everything")
+        )
+
+        assert response.status_code == 422
+
+    @pytest.mark.integration
+    def test_large_responses_are_gzipped(self, stub_graph):
+        """Test that a full trace is compressed for clients that accept gzip."""
+        (response,) = asyncio.run(
+            _post_queries(["What is an AI SOC?"], include="messages")
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["messages"]
+
+
+# Deadline tests keep an order of magnitude between the ~50 ms stub steps,
+# the budget, and a search that cannot fit in it, so timer jitter on a busy
+# machine cannot flip the outcome. The search is cut off at the deadline.
+DEADLINE_MS = 500
+SLOW_SEARCH = 5.0
+
+
+class TestDeadline:
+    """Tests for the per-request time budget."""
+
+    @pytest.mark.integration
+    def test_deadline_returns_best_answer_so_far(self, stub_graph, stub_search_tool):
+        """Test that a run out of time returns its draft instead of failing."""
+        # The ~50 ms draft fits well within the budget; the search cannot.
+        stub_search_tool.latency = SLOW_SEARCH
+        (response,) = asyncio.run(
+            _post_queries(["What is an AI SOC?"], deadline_ms=DEADLINE_MS)
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["partial"] is True
+        assert body["answer"].startswith("AnswerQuestion answer")
+
+    @pytest.mark.integration
+    def test_partial_answers_are_not_cached(self, stub_graph, stub_search_tool):
+        """Test that a later request without a budget gets the full answer."""
+        stub_search_tool.latency = SLOW_SEARCH
+        asyncio.run(_post_queries(["What is an AI SOC?"], deadline_ms=DEADLINE_MS))
+
+        stub_search_tool.latency = STUB_LATENCY
+        (response,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+
+        assert response.json()["partial"] is False
+        assert response.json()["answer"].startswith("ReviseAnswer answer")
+
+    @pytest.mark.integration
+    def test_deadline_before_first_draft_is_504(self, stub_graph):
+        """Test that a budget too small for the draft yields a gateway timeout."""
+        # A 1 ms budget against the ~50 ms draft.
+        (response,) = asyncio.run(_post_queries(["What is an AI SOC?"], deadline_ms=1))
+
+        assert response.status_code == 504
+
+    @pytest.mark.integration
+    def test_stream_done_event_reports_partial(self, stub_graph, stub_search_tool):
+        """Test that the stream ends with done/partial when the budget runs out."""
+        stub_search_tool.latency = SLOW_SEARCH
+
+        async def stream():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.post(
+                    "/v1/agent/stream",
+                    json={"query": "What is an AI SOC?", "deadline_ms": DEADLINE_MS},
+                )
+
+        frames = asyncio.run(stream()).text.strip().split("\n\n")
+        events = [dict(line.split(": ", 1) for line in f.splitlines()) for f in frames]
+
+        assert [event["event"] for event in events] == ["draft", "done"]
+        assert json.loads(events[-1]["data"])["partial"] is True
+
+
+class TestAdmission:
+    """Tests for admission control on the run endpoints."""
+
+    @pytest.mark.integration
+    def test_requests_past_the_queue_get_429(self, monkeypatch, stub_graph):
+        """Test that a burst beyond slots plus queue is rejected fast."""
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=1, queue_size=1, per_client=0),
+        )
+
+        responses = asyncio.run(_post_queries([f"question {i}" for i in range(4)]))
+
+        codes = sorted(response.status_code for response in responses)
+        assert codes == [200, 200, 429, 429]
+        rejected = next(r for r in responses if r.status_code == 429)
+        assert rejected.headers["Retry-After"] == "5"
+        assert api.admission.active == 0
+
+    @pytest.mark.integration
+    def test_per_client_limit_uses_client_header(self, monkeypatch, stub_graph):
+        """Test that the per-client cap applies per X-Client-ID."""
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=10, queue_size=10, per_client=1),
+        )
+
+        async def post_as(clients):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(
+                    *(
+                        client.post(
+                            "/v1/agent/invoke",
+                            json={"query": f"question {i}"},
+                            headers={"X-Client-ID": name},
+                        )
+                        for i, name in enumerate(clients)
+                    )
+                )
+
+        responses = asyncio.run(post_as(["a", "a", "b"]))
+
+        assert [r.status_code for r in responses] == [200, 429, 200]
+
+    @pytest.mark.integration
+    def test_coalesced_invokes_share_one_slot(self, monkeypatch, stub_graph):
+        """Test that duplicates joining a run in flight are not admitted separately."""
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=1, queue_size=0, per_client=1),
+        )
+
+        responses = asyncio.run(_post_queries(["What is an AI SOC?"] * 10))
+
+        assert [r.status_code for r in responses] == [200] * 10
+        assert api.admission.active == 0
+
+    @pytest.mark.integration
+    def test_cached_answers_skip_admission(self, monkeypatch, stub_graph):
+        """Test that a cache hit is served even with no free slots."""
+        import api
+        from admission import AdmissionController
+
+        asyncio.run(_post_queries(["What is an AI SOC?"]))
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=0, queue_size=0, per_client=0),
+        )
+
+        (response,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+
+        assert response.status_code == 200
+
+    @pytest.mark.integration
+    def test_rejected_stream_is_429_and_slots_are_released(
+        self, monkeypatch, stub_graph
+    ):
+        """Test that streams take and give back slots like invoke does."""
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=1, queue_size=0, per_client=0),
+        )
+
+        async def two_streams():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(
+                    *(
+                        client.post("/v1/agent/stream", json={"query": query})
+                        for query in ("first question", "second question")
+                    )
+                )
+
+        responses = asyncio.run(two_streams())
+
+        assert sorted(r.status_code for r in responses) == [200, 429]
+        assert api.admission.active == 0
+
+    @pytest.mark.integration
+    def test_stream_slot_is_released_if_the_body_is_never_read(
+        self, monkeypatch, stub_graph
+    ):
+        """Test that a stream abandoned before its first event frees its slot."""
+        from starlette.requests import Request
+
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api, "admission", AdmissionController(max_concurrent=1, per_client=0)
+        )
+        http_request = Request(
+            {"type": "http", "headers": [], "client": ("127.0.0.1", 1)}
+        )
+
+        async def abandon_stream():
+            request = api.AgentRequest(query="What is an AI SOC?")
+            await api.stream_agent(request, http_request)
+            assert api.admission.active == 1
+            while api.in_flight.streaming(request.flight_key()):
+                await asyncio.sleep(0.01)
+
+        asyncio.run(abandon_stream())
+
+        assert api.admission.active == 0
+
+    @pytest.mark.integration
+    def test_coalesced_streams_share_one_slot(self, monkeypatch, stub_graph):
+        """Test that streams joining a run in flight are not admitted separately."""
+        import api
+        from admission import AdmissionController
+
+        monkeypatch.setattr(
+            api,
+            "admission",
+            AdmissionController(max_concurrent=1, queue_size=0, per_client=0),
+        )
+
+        async def same_streams():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(
+                    *(
+                        client.post(
+                            "/v1/agent/stream", json={"query": "What is an AI SOC?"}
+                        )
+                        for _ in range(3)
+                    )
+                )
+
+        responses = asyncio.run(same_streams())
+
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert api.admission.active == 0
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics."""
+
+    @pytest.mark.integration
+    def test_metrics_cover_nodes_searches_and_caches(self, stub_graph):
+        """Test that a finished run shows up in the Prometheus metrics."""
+
+        async def run_and_scrape():
+            await _post_queries(["What is an AI SOC?"], fresh=True)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.get("/metrics")
+
+        response = asyncio.run(run_and_scrape())
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for sample in (
+            'reflexion_node_duration_seconds_count{node="draft"}',
+            'reflexion_node_duration_seconds_count{node="execute_tools"}',
+            'reflexion_node_duration_seconds_count{node="revise"}',
+            "reflexion_search_duration_seconds_count",
+            "reflexion_run_iterations_count",
+            "reflexion_answer_cache_misses_total",
+        ):
+            assert sample in response.text
+
+
+class TestStreamEndpoint:
+    """Tests for /v1/agent/stream."""
+
+    @pytest.mark.integration
+    def test_stream_emits_events_in_graph_order(self, stub_graph):
+        """Test that draft, search and revision events arrive before done."""
+        response, events = asyncio.run(_stream_events("What is an AI SOC?"))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        names = [name for name, _ in events]
+        assert names[:3] == ["draft", "search", "revision"]
+        assert names[-1] == "done"
+        assert events[0][1]["answer"].startswith("AnswerQuestion answer")
+        assert events[1][1]["results"]
+        assert events[-1][1]["references"] == ["https://example.com/ref"]
+
+    @pytest.mark.integration
+    def test_identical_concurrent_streams_share_one_run(
+        self, stub_graph, stub_search_tool
+    ):
+        """Test that concurrent streams for one query receive the same events."""
+        asyncio.run(_stream_events("warm-up question"))
+        searches_per_run = len(stub_search_tool.queries)
+        stub_search_tool.queries.clear()
+
+        async def both():
+            return await asyncio.gather(
+                _stream_events("What is an AI SOC?"),
+                _stream_events("what is an ai soc"),
+            )
+
+        (_, first), (_, second) = asyncio.run(both())
+
+        assert first == second
+        assert len(stub_search_tool.queries) == searches_per_run
+
+    @pytest.mark.integration
+    def test_stream_reports_errors_as_event(self, stub_graph, stub_search_tool):
+        """Test that a failing run ends with an error event instead of done."""
+
+        async def failing_abatch(*args, **kwargs):
+            raise RuntimeError("search backend down")
+
+        stub_search_tool.abatch = failing_abatch
+
+        _, events = asyncio.run(_stream_events("What is an AI SOC?"))
+
+        assert [name for name, _ in events] == ["draft", "error"]
+        assert "search backend down" in events[-1][1]["detail"]
+
+
+async def _run_job(query, **fields):
+    """Submit a job, poll it until it finishes and fetch its result."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        submitted = await client.post("/v1/agent/jobs", json={"query": query, **fields})
+        job_id = submitted.json()["job_id"]
+        statuses = []
+        while True:
+            status = (await client.get(f"/v1/agent/jobs/{job_id}")).json()
+            statuses.append(status)
+            if status["status"] in ("succeeded", "failed"):
+                break
+            await asyncio.sleep(0.01)
+        result = await client.get(f"/v1/agent/jobs/{job_id}/result")
+    return submitted, statuses, result
+
+
+class TestJobEndpoints:
+    """Tests for the background job API."""
+
+    @pytest.mark.integration
+    def test_job_runs_in_background_and_returns_result(self, stub_graph):
+        """Test that submit returns 202 at once and the result matches invoke."""
+        submitted, statuses, result = asyncio.run(_run_job("What is an AI SOC?"))
+
+        assert submitted.status_code == 202
+        assert submitted.json()["status"] == "queued"
+        assert statuses[-1]["status"] == "succeeded"
+        assert statuses[-1]["progress"]["stage"] == "revision"
+        assert statuses[-1]["progress"]["iterations"] == 2
+        assert result.status_code == 200
+        assert result.json()["answer"].startswith("ReviseAnswer answer")
+
+    @pytest.mark.integration
+    def test_job_reports_progress_while_running(self, stub_graph):
+        """Test that polling sees intermediate stages before the job finishes."""
+        _, statuses, _ = asyncio.run(_run_job("What is an AI SOC?"))
+
+        stages = {status["progress"].get("stage") for status in statuses}
+        assert "draft" in stages or "execute_tools" in stages
+
+    @pytest.mark.integration
+    def test_cached_answer_completes_job_immediately(
+        self, stub_graph, stub_search_tool
+    ):
+        """Test that a cached query yields an already finished job."""
+        (invoked,) = asyncio.run(_post_queries(["What is an AI SOC?"]))
+        stub_search_tool.queries.clear()
+
+        submitted, _, result = asyncio.run(_run_job("what is an ai soc"))
+
+        assert submitted.json()["status"] == "succeeded"
+        assert result.json() == invoked.json()
+        assert stub_search_tool.queries == []
+
+    @pytest.mark.integration
+    def test_result_before_completion_is_409(self, stub_graph):
+        """Test that fetching the result of a running job is a conflict."""
+
+        async def submit_and_fetch():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                submitted = await client.post(
+                    "/v1/agent/jobs", json={"query": "What is an AI SOC?"}
+                )
+                job_id = submitted.json()["job_id"]
+                return await client.get(f"/v1/agent/jobs/{job_id}/result")
+
+        assert asyncio.run(submit_and_fetch()).status_code == 409
+
+    @pytest.mark.integration
+    def test_failed_job_result_is_500(self, stub_graph, stub_search_tool):
+        """Test that a failing run marks the job failed with its error."""
+
+        async def failing_abatch(*args, **kwargs):
+            raise RuntimeError("search backend down")
+
+        stub_search_tool.abatch = failing_abatch
+
+        _, statuses, result = asyncio.run(_run_job("What is an AI SOC?"))
+
+        assert statuses[-1]["status"] == "failed"
+        assert "search backend down" in statuses[-1]["error"]
+        assert result.status_code == 500
+
+    @pytest.mark.integration
+    def test_unknown_job_is_404(self, stub_graph):
+        """Test that polling an unknown job ID is not found."""
+
+        async def get_unknown():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.get("/v1/agent/jobs/does-not-exist")
+
+        assert asyncio.run(get_unknown()).status_code == 404
+
+    @pytest.mark.integration
+    def test_full_job_queue_is_429(self, monkeypatch, stub_graph):
+        """Test that submissions past the queue limit are rejected."""
+        import api
+        from jobs import JobManager
+
+        monkeypatch.setattr(api, "jobs", JobManager(api.run_job, queue_size=1))
+
+        async def submit_many():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return [
+                    await client.post("/v1/agent/jobs", json={"query": f"question {i}"})
+                    for i in range(3)
+                ]
+
+        responses = asyncio.run(submit_many())
+
+        assert responses[0].status_code == 202
+        assert responses[-1].status_code == 429
+        assert "Retry-After" in responses[-1].headers
+
+    @pytest.mark.integration
+    def test_job_result_uses_the_job_include_level(self, stub_graph):
+        """Test that a job submitted with include=messages returns the trace."""
+        _, _, result = asyncio.run(_run_job("What is an AI SOC?", include="messages"))
+
+        assert result.status_code == 200
+        assert result.json()["messages"][0]["content"] == "What is an AI SOC?"
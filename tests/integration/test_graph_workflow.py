@@ -7,6 +7,7 @@ from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
 from main import MAX_ITERATIONS, graph
 from schemas import AnswerQuestion, Reflection
+from state import initial_state
 
 
 class TestGraphWorkflow:
@@ -58,7 +59,7 @@ class TestGraphWorkflow:
         )
 
         # Execute graph
-        result = graph.invoke("Test question")
+        result = graph.invoke(initial_state("Test question"))["messages"]
 
         # Verify first responder was called
         assert mock_first_responder.invoke.called
@@ -125,7 +126,7 @@ class TestGraphWorkflow:
         )
 
         # Execute graph
-        result = graph.invoke("Test question")
+        result = graph.invoke(initial_state("Test question"))["messages"]
 
         # Verify multiple iterations occurred
         assert mock_execute_tools.call_count >= 1
@@ -177,7 +178,7 @@ class TestGraphWorkflow:
                 ],
             )
 
-            result = graph.invoke("Test question")
+            result = graph.invoke(initial_state("Test question"))["messages"]
 
             # Should eventually stop due to MAX_ITERATIONS
             assert isinstance(result, list)
@@ -222,7 +223,7 @@ class TestGraphWorkflow:
             ],
         )
 
-        result = graph.invoke("Test question")
+        result = graph.invoke(initial_state("Test question"))["messages"]
 
         assert isinstance(result, list)
         assert mock_execute_tools.called
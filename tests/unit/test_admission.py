@@ -0,0 +1,115 @@
+"""Unit tests for admission.py."""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Rejected
+
+
+class TestAdmissionController:
+    """Tests for AdmissionController."""
+
+    def test_limits_concurrent_runs(self):
+        """Test that no more than max_concurrent holders run at once."""
+        admission = AdmissionController(max_concurrent=2, queue_size=10, per_client=0)
+        peak = 0
+
+        async def run(i):
+            nonlocal peak
+            await admission.acquire(f"client{i}")
+            try:
+                peak = max(peak, admission.active)
+                await asyncio.sleep(0.01)
+            finally:
+                admission.release(f"client{i}")
+
+        async def main():
+            await asyncio.gather(*(run(i) for i in range(6)))
+
+        asyncio.run(main())
+        assert peak == 2
+        assert admission.stats()["active"] == 0
+        assert admission.stats()["clients"] == 0
+
+    def test_waiters_are_admitted_in_order(self):
+        """Test that queued requests get slots first come, first served."""
+        admission = AdmissionController(max_concurrent=1, queue_size=10, per_client=0)
+        order = []
+
+        async def run(i):
+            await admission.acquire(str(i))
+            order.append(i)
+            await asyncio.sleep(0.001)
+            admission.release(str(i))
+
+        async def main():
+            await asyncio.gather(*(run(i) for i in range(5)))
+
+        asyncio.run(main())
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_full_queue_rejects_immediately(self):
+        """Test that a request past the wait queue limit is rejected."""
+        admission = AdmissionController(max_concurrent=1, queue_size=1, per_client=0)
+
+        async def main():
+            await admission.acquire("a")
+            waiter = asyncio.ensure_future(admission.acquire("b"))
+            await asyncio.sleep(0)
+            with pytest.raises(Rejected) as rejected:
+                await admission.acquire("c")
+            admission.release("a")
+            await waiter
+            admission.release("b")
+            return rejected.value
+
+        assert asyncio.run(main()).reason == "queue_full"
+        assert admission.active == 0
+
+    def test_per_client_limit(self):
+        """Test that one client cannot take more than its share."""
+        admission = AdmissionController(max_concurrent=10, queue_size=10, per_client=2)
+
+        async def main():
+            await admission.acquire("a")
+            await admission.acquire("a")
+            with pytest.raises(Rejected) as rejected:
+                await admission.acquire("a")
+            await admission.acquire("b")
+            return rejected.value
+
+        assert asyncio.run(main()).reason == "client_limit"
+        assert admission.active == 3
+
+    def test_queue_timeout_rejects(self):
+        """Test that a waiter gives up after queue_timeout."""
+        admission = AdmissionController(
+            max_concurrent=1, queue_size=10, per_client=0, queue_timeout=0.01
+        )
+
+        async def main():
+            await admission.acquire("a")
+            with pytest.raises(Rejected) as rejected:
+                await admission.acquire("b")
+            return rejected.value
+
+        assert asyncio.run(main()).reason == "timeout"
+        assert admission.waiting == 0
+        assert admission.active == 1
+
+    def test_cancelled_waiter_frees_its_place(self):
+        """Test that a caller going away while queued does not leak a slot."""
+        admission = AdmissionController(max_concurrent=1, queue_size=10, per_client=0)
+
+        async def main():
+            await admission.acquire("a")
+            waiter = asyncio.ensure_future(admission.acquire("b"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            admission.release("a")
+
+        asyncio.run(main())
+        assert admission.active == 0
+        assert admission.waiting == 0
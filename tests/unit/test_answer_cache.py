@@ -0,0 +1,68 @@
+"""Unit tests for answer_cache.py."""
+
+import time
+
+from answer_cache import AnswerCache
+
+
+class TestAnswerCache:
+    """Tests for the whole-run answer cache."""
+
+    def test_exact_match_after_normalization(self):
+        """Test that case, whitespace and trailing punctuation are ignored."""
+        cache = AnswerCache(max_entries=10, ttl=60)
+        cache.set("What is an AI SOC?", "answer")
+
+        assert cache.get("  what is an  ai soc") == "answer"
+        assert cache.stats()["hits"] == 1
+
+    def test_near_duplicates_are_opt_in(self):
+        """Test that reworded queries only hit when near-duplicates are enabled."""
+        query = "What are AI-powered SOC startups and their funding?"
+        reworded = (
+            "Please tell me what AI powered SOC startups there are and their funding"
+        )
+
+        strict = AnswerCache(max_entries=10, ttl=60, near_duplicates=False)
+        strict.set(query, "answer")
+        assert strict.get(reworded) is None
+
+        fuzzy = AnswerCache(max_entries=10, ttl=60, near_duplicates=True)
+        fuzzy.set(query, "answer")
+        assert fuzzy.get(reworded) == "answer"
+        assert fuzzy.stats()["near_hits"] == 1
+
+    def test_near_duplicates_respect_similarity_threshold(self):
+        """Test that a different subject is not treated as a duplicate."""
+        cache = AnswerCache(max_entries=10, ttl=60, near_duplicates=True)
+        cache.set("What are AI-powered SOC startups and their funding?", "answer")
+
+        assert cache.get("What are AI-powered SOC startups and their revenue?") is None
+
+    def test_near_duplicates_keep_the_question_word(self):
+        """Test that questions differing only in their interrogative do not match."""
+        cache = AnswerCache(max_entries=10, ttl=60, near_duplicates=True)
+        cache.set("When was Acme Security founded?", "in 2019")
+
+        assert cache.get("Where was Acme Security founded?") is None
+        assert cache.get("when was acme security founded") == "in 2019"
+
+    def test_entries_expire(self):
+        """Test that answers older than the TTL are not returned."""
+        cache = AnswerCache(max_entries=10, ttl=0.01)
+        cache.set("q", "answer")
+        time.sleep(0.02)
+
+        assert cache.get("q") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used answer is evicted first."""
+        cache = AnswerCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
@@ -0,0 +1,167 @@
+"""Unit tests for batch.py."""
+
+import asyncio
+import json
+
+import pytest
+
+import batch
+from batch import iter_questions, load_finished_ids, positive_int, run_batch
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def _read_jsonl_valid(path):
+    records = []
+    for line in path.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+@pytest.fixture
+def batch_graph(monkeypatch, stub_graph):
+    """Point the batch runner at the stubbed graph."""
+    monkeypatch.setattr(batch, "get_graph", lambda: stub_graph)
+    return stub_graph
+
+
+class TestBatchInput:
+    """Tests for reading inputs and previous outputs."""
+
+    def test_iter_questions_uses_configured_fields(self, tmp_path):
+        """Test that custom ID and query fields are honoured."""
+        path = tmp_path / "in.jsonl"
+        _write_jsonl(
+            path, [{"request_id": "r1", "body": "Question one?"}, {"body": "Q2"}]
+        )
+
+        assert list(iter_questions(str(path), "request_id", "body")) == [
+            ("r1", "Question one?", None),
+            ("line-2", "Q2", None),
+        ]
+
+    def test_iter_questions_reports_bad_records(self, tmp_path):
+        """Test that malformed lines and records without a query are flagged."""
+        path = tmp_path / "in.jsonl"
+        path.write_text('{"id": "a", "query": "Q"}\n{"id": "b"}\n{"id": \n[1]\n')
+
+        assert [
+            (question_id, query, error is not None)
+            for question_id, query, error in iter_questions(str(path), "id", "query")
+        ] == [
+            ("a", "Q", False),
+            ("b", None, True),
+            ("line-3", None, True),
+            ("line-4", None, True),
+        ]
+
+    def test_load_finished_ids_ignores_errors_and_partial_lines(self, tmp_path):
+        """Test that only successful records count as finished."""
+        path = tmp_path / "out.jsonl"
+        path.write_text(
+            json.dumps({"id": "a", "status": "ok"})
+            + "\n"
+            + json.dumps({"id": "b", "status": "error"})
+            + '\n{"id": "c", "sta'
+        )
+
+        assert load_finished_ids(str(path)) == {"a"}
+
+    def test_load_finished_ids_skips_ok_records_without_id(self, tmp_path):
+        """Test that an ok record missing its ID is skipped, not a KeyError."""
+        path = tmp_path / "out.jsonl"
+        _write_jsonl(path, [{"status": "ok"}, {"id": 7, "status": "ok"}])
+
+        assert load_finished_ids(str(path)) == {"7"}
+
+
+class TestRunBatch:
+    """Tests for run_batch."""
+
+    def test_answers_every_question(self, tmp_path, batch_graph):
+        """Test that each question gets one output record."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": str(i), "query": f"q{i}"} for i in range(5)])
+
+        counts = asyncio.run(run_batch(str(input_path), str(output_path), 2))
+
+        records = _read_jsonl(output_path)
+        assert counts == {"ok": 5, "error": 0, "skipped": 0}
+        assert sorted(record["id"] for record in records) == ["0", "1", "2", "3", "4"]
+        assert all(record["answer"] for record in records)
+
+    def test_resumes_after_interruption(self, tmp_path, batch_graph):
+        """Test that finished IDs are skipped and a partial line is tolerated."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": str(i), "query": f"q{i}"} for i in range(3)])
+        output_path.write_text(
+            json.dumps({"id": "0", "status": "ok", "answer": "done"}) + '\n{"id": "1"'
+        )
+
+        counts = asyncio.run(run_batch(str(input_path), str(output_path), 2))
+
+        records = _read_jsonl_valid(output_path)
+        assert counts == {"ok": 2, "error": 0, "skipped": 1}
+        assert sorted(record["id"] for record in records) == ["0", "1", "2"]
+
+    def test_failures_are_recorded_and_retried(
+        self, tmp_path, batch_graph, stub_search_tool
+    ):
+        """Test that a failed question is written as an error and rerun later."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": "1", "query": "q1"}])
+
+        async def failing_abatch(*args, **kwargs):
+            raise RuntimeError("search down")
+
+        original_abatch = stub_search_tool.abatch
+        stub_search_tool.abatch = failing_abatch
+        counts = asyncio.run(run_batch(str(input_path), str(output_path)))
+        assert counts["error"] == 1
+        assert "search down" in _read_jsonl(output_path)[0]["error"]
+
+        stub_search_tool.abatch = original_abatch
+        counts = asyncio.run(run_batch(str(input_path), str(output_path)))
+        assert counts == {"ok": 1, "error": 0, "skipped": 0}
+
+    def test_bad_records_do_not_stop_the_batch(self, tmp_path, batch_graph):
+        """Test that a record without a query is recorded as failed, not fatal."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(
+            input_path,
+            [
+                {"id": "1", "query": "q1"},
+                {"id": "2", "query": "q2"},
+                {"id": "3"},
+                {"id": "4", "query": "q4"},
+            ],
+        )
+
+        counts = asyncio.run(run_batch(str(input_path), str(output_path), 2))
+
+        records = {record["id"]: record for record in _read_jsonl(output_path)}
+        assert counts == {"ok": 3, "error": 1, "skipped": 0}
+        assert records["3"]["status"] == "error"
+        assert "'query'" in records["3"]["error"]
+
+    def test_concurrency_must_be_positive(self, tmp_path, monkeypatch, capsys):
+        """Test that a batch that would run nothing is rejected up front."""
+        assert positive_int("3") == 3
+        monkeypatch.setattr(
+            "sys.argv", ["batch.py", "in.jsonl", "out.jsonl", "--concurrency", "0"]
+        )
+
+        with pytest.raises(SystemExit):
+            batch.main()
+        assert "must be a positive integer" in capsys.readouterr().err
+        with pytest.raises(ValueError):
+            asyncio.run(run_batch("in.jsonl", str(tmp_path / "out.jsonl"), 0))
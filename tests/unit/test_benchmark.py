@@ -0,0 +1,120 @@
+"""Unit tests for benchmark.py."""
+
+import asyncio
+
+from langchain_core.messages import HumanMessage
+
+from benchmark import (
+    PromptTokenCounter,
+    benchmark_api,
+    benchmark_graph,
+    benchmark_import,
+    find_regressions,
+    summarize,
+)
+from replay import Cassette, ReplayChatModel
+from schemas import AnswerQuestion
+
+
+def _results(run_seconds=1.0, tokens=(100, 400), rps=10.0):
+    return {
+        "graph": {
+            "run_seconds": summarize([run_seconds]),
+            "nodes": {"draft": summarize([run_seconds / 2])},
+            "prompt_tokens": list(tokens),
+            "peak_memory_bytes": summarize([1_000_000]),
+        },
+        "api": [
+            {
+                "concurrency": 8,
+                "requests_per_second": rps,
+                "latency_seconds": summarize([run_seconds]),
+            }
+        ],
+    }
+
+
+class TestBenchmarkGraph:
+    """Tests for the graph profiler."""
+
+    def test_reports_every_node(self, stub_graph):
+        """Test that each node of the loop gets timings and memory is traced."""
+        results = asyncio.run(benchmark_graph(stub_graph, runs=2))
+
+        assert set(results["nodes"]) == {"draft", "execute_tools", "revise"}
+        assert results["nodes"]["draft"]["mean"] > 0
+        assert results["run_seconds"]["mean"] >= results["nodes"]["draft"]["mean"]
+        assert results["peak_memory_bytes"]["max"] > 0
+
+    def test_prompt_tokens_are_counted_per_model_call(self):
+        """Test that the callback sees the prompt of every chat-model call."""
+        counter = PromptTokenCounter()
+        model = ReplayChatModel(cassette=Cassette(), mode="synthetic").bind_tools(
+            [AnswerQuestion]
+        )
+
+        model.invoke([HumanMessage(content="x" * 400)], config={"callbacks": [counter]})
+
+        assert counter.prompt_tokens == [100]
+
+
+class TestBenchmarkApi:
+    """Tests for the API throughput measurement."""
+
+    def test_measures_throughput(self, stub_graph):
+        """Test that every request is sent and succeeds."""
+        import api
+
+        result = asyncio.run(
+            benchmark_api(api.app, concurrency=4, requests_per_client=2)
+        )
+
+        assert result["requests"] == 8
+        assert result["failures"] == 0
+        assert result["requests_per_second"] > 0
+
+
+class TestFindRegressions:
+    """Tests for the baseline comparison."""
+
+    def test_within_tolerance_is_not_flagged(self):
+        """Test that small changes pass."""
+        assert find_regressions(_results(run_seconds=1.1), _results(), 0.2) == []
+
+    def test_slower_run_and_larger_prompt_are_flagged(self):
+        """Test that costs that grew past the tolerance are reported."""
+        regressions = find_regressions(
+            _results(run_seconds=2.0, tokens=(100, 900)), _results(), 0.2
+        )
+
+        assert any(r.startswith("graph.run_seconds.mean") for r in regressions)
+        assert any(r.startswith("graph.prompt_tokens.1") for r in regressions)
+        assert not any(r.startswith("graph.prompt_tokens.0") for r in regressions)
+
+    def test_lower_throughput_is_flagged(self):
+        """Test that throughput is compared as higher-is-better."""
+        assert find_regressions(_results(rps=20.0), _results(), 0.2) == []
+        assert find_regressions(_results(rps=5.0), _results(), 0.2) == [
+            "api.concurrency_8.requests_per_second: 10 -> 5 (50% worse)"
+        ]
+
+
+class TestBenchmarkImport:
+    """Tests for the cold-import timer."""
+
+    def test_times_fresh_interpreters(self):
+        """Test that each run imports the module in a new process."""
+        results = benchmark_import("json", runs=2)
+
+        assert results["module"] == "json"
+        assert results["runs"] == 2
+        assert 0 < results["seconds"]["p50"] < 5
+
+    def test_import_time_is_compared_to_baseline(self):
+        """Test that a slower import is reported as a regression."""
+        baseline = {**_results(), "import": {"seconds": summarize([1.0])}}
+        slower = {**_results(), "import": {"seconds": summarize([2.0])}}
+
+        assert find_regressions(slower, baseline, 0.2) == [
+            "import.seconds.p50: 1 -> 2 (100% worse)"
+        ]
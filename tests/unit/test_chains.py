@@ -1,15 +1,18 @@
 """Unit tests for chains.py."""
 
+import datetime
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 
+import chains
 from chains import (
     actor_prompt_template,
     first_responder,
     parser,
     parser_pydantic,
+    revise_instructions,
     revisor,
 )
 
@@ -106,3 +109,66 @@ class TestChains:
 
         # revisor should have revise_instructions partial
         assert revisor is not None
+
+
+class TestPromptLayout:
+    """Tests that the prompt layout keeps a cacheable prefix."""
+
+    @pytest.mark.parametrize(
+        "instruction", ["Provide a detailed ~250 word answer.", revise_instructions]
+    )
+    def test_system_prefix_is_identical_across_calls(self, instruction):
+        """Test that the leading system message never changes between calls."""
+        template = actor_prompt_template.partial(first_instruction=instruction)
+        first = template.invoke({"messages": [HumanMessage(content="Question A")]})
+        second = template.invoke(
+            {
+                "messages": [
+                    HumanMessage(content="Question B"),
+                    AIMessage(content="draft"),
+                    ToolMessage(content="results", tool_call_id="call_1"),
+                ]
+            }
+        )
+
+        prefix = first.to_messages()[0]
+        assert isinstance(prefix, SystemMessage)
+        assert prefix.content == second.to_messages()[0].content
+        assert str(datetime.date.today().year) not in prefix.content
+
+    @pytest.mark.parametrize("min_tokens, cached", [(1024, False), (0, True)])
+    @patch("chains.llm")
+    def test_context_cache_only_wraps_cacheable_prefixes(
+        self, mock_llm, monkeypatch, min_tokens, cached
+    ):
+        """Test that a prefix below Gemini's minimum skips the cache step."""
+        from context_cache import ContextCache
+
+        created = []
+        monkeypatch.setattr(
+            chains,
+            "context_cache",
+            ContextCache(
+                lambda system, tool, ttl: created.append(system) or "cachedContents/1",
+                min_tokens=min_tokens,
+            ),
+        )
+        chain = chains.actor_chain(
+            "Provide a detailed ~250 word answer.", chains.AnswerQuestion
+        )
+
+        chain.invoke({"messages": [HumanMessage(content="Question")]})
+
+        assert len(created) == int(cached)
+        assert mock_llm.bind.called == cached
+
+    def test_date_comes_after_the_conversation(self):
+        """Test that the volatile date is day-granular and sent last."""
+        messages = actor_prompt_template.partial(first_instruction="x").invoke(
+            {"messages": [HumanMessage(content="Question")]}
+        )
+
+        closing = messages.to_messages()[-1]
+        assert closing.content.startswith(
+            f"Current date: {datetime.date.today().isoformat()}\n"
+        )
@@ -0,0 +1,274 @@
+"""Unit tests for SQLite checkpoints and resuming interrupted runs."""
+
+import asyncio
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+from checkpoints import (
+    SQLiteCheckpointer,
+    ThreadBusy,
+    ThreadLocks,
+    last_finished_step,
+    resume_input,
+)
+from main import MAX_ITERATIONS
+from tests.conftest import make_stub_chain
+
+
+def counted(chain, calls, fail_first=False):
+    """Wrap a stub chain to record its calls, optionally failing the first one."""
+
+    async def _ainvoke(messages):
+        calls.append(len(messages))
+        if fail_first and len(calls) == 1:
+            raise RuntimeError("model unavailable")
+        return await chain.ainvoke(messages)
+
+    return RunnableLambda(lambda messages: None, afunc=_ainvoke)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.db")
+
+
+@pytest.fixture
+def calls():
+    return {"draft": [], "revise": []}
+
+
+@pytest.fixture
+def make_graph(monkeypatch, stub_search_tool, calls, db_path):
+    """Build graphs over stub chains that checkpoint into one SQLite file."""
+    import main
+
+    def _make(fail_revise=False):
+        monkeypatch.setattr(
+            main,
+            "first_responder",
+            counted(make_stub_chain("AnswerQuestion"), calls["draft"]),
+        )
+        monkeypatch.setattr(
+            main,
+            "revisor",
+            counted(make_stub_chain("ReviseAnswer"), calls["revise"], fail_revise),
+        )
+        return main.create_graph(SQLiteCheckpointer(db_path))
+
+    return _make
+
+
+def run(graph, query, thread_id="run-1", deadline_ms=None, fresh=False):
+    async def _run():
+        config = {"configurable": {"thread_id": thread_id, "fresh": fresh}}
+        graph_input, _ = await resume_input(graph, config, query, deadline_ms)
+        return await graph.ainvoke(graph_input, config)
+
+    return asyncio.run(_run())
+
+
+class TestSQLiteCheckpointer:
+    """Tests for the checkpoint saver itself."""
+
+    def test_saved_state_round_trips(self, make_graph):
+        """Test that the saved state matches the run's final state."""
+        graph = make_graph()
+        result = run(graph, "What is an AI SOC?")
+
+        saved = graph.get_state({"configurable": {"thread_id": "run-1"}})
+
+        assert saved.values["messages"] == result["messages"]
+        assert saved.values["iterations"] == MAX_ITERATIONS
+        assert saved.next == ()
+
+    def test_only_the_latest_checkpoint_is_kept(self, make_graph, db_path):
+        """Test that each thread keeps one checkpoint and its live values only."""
+        graph = make_graph()
+        run(graph, "first question", thread_id="a")
+        run(graph, "second question", thread_id="b")
+
+        conn = sqlite3.connect(db_path)
+        per_thread = conn.execute(
+            "SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id"
+        ).fetchall()
+        blobs = conn.execute(
+            "SELECT COUNT(*) FROM checkpoint_blobs WHERE thread_id = 'a'"
+        ).fetchone()[0]
+        writes = conn.execute("SELECT COUNT(*) FROM checkpoint_writes").fetchone()[0]
+
+        assert sorted(per_thread) == [("a", 1), ("b", 1)]
+        # One value per state channel, not one per step.
+        assert blobs <= 8
+        assert writes == 0
+
+    def test_expired_threads_are_dropped(self, db_path):
+        """Test that threads older than the TTL are removed on the next save."""
+        saver = SQLiteCheckpointer(db_path, ttl=0)
+        config = {"configurable": {"thread_id": "old", "checkpoint_ns": ""}}
+        checkpoint = {
+            "v": 4,
+            "id": "1",
+            "ts": "",
+            "channel_values": {"x": 1},
+            "channel_versions": {"x": 1},
+            "versions_seen": {},
+            "updated_channels": None,
+        }
+        saver.put(config, checkpoint, {}, {"x": 1})
+        saver.put(
+            {"configurable": {"thread_id": "new", "checkpoint_ns": ""}},
+            checkpoint,
+            {},
+            {"x": 1},
+        )
+
+        assert saver.get_tuple(config) is None
+        assert saver.threads() == 1
+
+    def test_delete_thread(self, make_graph):
+        """Test that deleting a thread removes its checkpoint."""
+        graph = make_graph()
+        run(graph, "What is an AI SOC?")
+
+        graph.checkpointer.delete_thread("run-1")
+
+        assert graph.checkpointer.threads() == 0
+
+
+class TestResume:
+    """Tests for resuming a thread after its last finished step."""
+
+    def test_failed_run_resumes_after_last_step(
+        self, make_graph, calls, stub_search_tool
+    ):
+        """Test that a retry after a failed revise does not redo draft or search."""
+        with pytest.raises(RuntimeError):
+            run(make_graph(fail_revise=True), "What is an AI SOC?")
+        first_search = list(stub_search_tool.queries)
+
+        # A new process: a fresh graph and saver over the same database.
+        result = run(make_graph(), "What is an AI SOC?")
+
+        assert len(calls["draft"]) == 1
+        assert stub_search_tool.queries[: len(first_search)] == first_search
+        assert stub_search_tool.queries.count(first_search[0]) == 1
+        assert len(calls["revise"]) == MAX_ITERATIONS + 1
+        assert result["iterations"] == MAX_ITERATIONS
+        assert result["messages"][-1].tool_calls[0]["name"] == "ReviseAnswer"
+
+    def test_partial_run_resumes_with_a_new_budget(
+        self, make_graph, calls, stub_search_tool
+    ):
+        """Test that a run cut short by its deadline continues where it stopped."""
+        # A search that cannot fit in a budget ten times the ~50 ms draft.
+        stub_search_tool.latency = 5.0
+        graph = make_graph()
+        partial = run(graph, "What is an AI SOC?", deadline_ms=500)
+        assert partial["deadline_exceeded"]
+        assert partial["iterations"] == 0
+
+        stub_search_tool.latency = 0.01
+        result = run(graph, "What is an AI SOC?")
+
+        assert not result["deadline_exceeded"]
+        assert result["iterations"] == MAX_ITERATIONS
+        assert len(calls["draft"]) == 1
+
+    def test_finished_run_is_not_run_again(self, make_graph, calls):
+        """Test that a finished thread returns its saved state."""
+        graph = make_graph()
+        first = run(graph, "What is an AI SOC?")
+
+        second = run(graph, "What is an AI SOC?")
+
+        assert second["messages"] == first["messages"]
+        assert len(calls["draft"]) == 1
+
+    def test_other_question_on_same_thread_starts_over(self, make_graph, calls):
+        """Test that a thread reused for a new question is not resumed."""
+        graph = make_graph()
+        run(graph, "What is an AI SOC?")
+
+        result = run(graph, "Who funds SOC startups?")
+
+        assert result["messages"][0].content == "Who funds SOC startups?"
+        assert len(calls["draft"]) == 2
+
+    def test_fresh_run_discards_the_saved_thread(self, make_graph, calls):
+        """Test that a fresh run starts over instead of resuming."""
+        graph = make_graph()
+        run(graph, "What is an AI SOC?")
+
+        run(graph, "What is an AI SOC?", fresh=True)
+
+        assert len(calls["draft"]) == 2
+
+    def test_without_thread_id_runs_from_scratch(self, make_graph):
+        """Test that a run without a thread ID gets a fresh initial state."""
+        graph = make_graph()
+
+        graph_input, saved = asyncio.run(
+            resume_input(graph, {"configurable": {}}, "What is an AI SOC?")
+        )
+
+        assert graph_input["messages"][0].content == "What is an AI SOC?"
+        assert saved == {}
+
+
+class TestLastFinishedStep:
+    """Tests for reading the last finished node off the message history."""
+
+    def test_steps(self):
+        """Test that each node's trace is recognized."""
+        question = HumanMessage(content="q")
+        answer = AIMessage(content="", tool_calls=[])
+        results = ToolMessage(content="r", tool_call_id="c")
+
+        assert last_finished_step([], 0) is None
+        assert last_finished_step([question], 0) is None
+        assert last_finished_step([question, answer], 0) == "draft"
+        assert last_finished_step([question, answer, results], 0) == "execute_tools"
+        assert last_finished_step([question, answer, results, answer], 1) == "revise"
+
+
+class TestThreadLocks:
+    """Tests for keeping concurrent runs off one checkpoint thread."""
+
+    def test_runs_for_the_same_question_take_turns(self):
+        """Test that holders of one thread run one after the other."""
+        locks = ThreadLocks()
+        order = []
+
+        async def hold(name):
+            async with locks.hold("t", "What is an AI SOC?"):
+                order.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name} end")
+
+        async def main():
+            await asyncio.gather(hold("a"), hold("b"))
+
+        asyncio.run(main())
+
+        assert order == ["a start", "a end", "b start", "b end"]
+
+    def test_other_question_is_rejected_while_in_use(self):
+        """Test that a thread in use cannot be claimed for another question."""
+        locks = ThreadLocks()
+
+        async def main():
+            async with locks.hold("t", "What is an AI SOC?"):
+                locks.check("t", "  what is an AI SOC ")
+                with pytest.raises(ThreadBusy):
+                    locks.check("t", "Who funds SOC startups?")
+                with pytest.raises(ThreadBusy):
+                    async with locks.hold("t", "Who funds SOC startups?"):
+                        pass
+            # Released: the thread can now be used for anything.
+            async with locks.hold("t", "Who funds SOC startups?"):
+                pass
+
+        asyncio.run(main())
@@ -0,0 +1,181 @@
+"""Unit tests for context_cache.py."""
+
+import asyncio
+import threading
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.runnables import RunnableLambda
+
+import context_cache
+from context_cache import ContextCache, with_context_cache
+from metrics import CONTEXT_CACHE_EVENTS
+from schemas import AnswerQuestion, ReviseAnswer
+
+TOO_SMALL = RuntimeError(
+    "400 INVALID_ARGUMENT. Cached content is too small. "
+    "total_token_count=200, min_total_token_count=1024"
+)
+
+
+def _creator(calls, fail=None):
+    def create(system, tool, ttl):
+        calls.append((system, tool.__name__, ttl))
+        if fail is not None:
+            raise fail
+        return f"cachedContents/{len(calls)}"
+
+    return create
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock for the cache's renew and retry times."""
+    now = [1000.0]
+    monkeypatch.setattr(context_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _prompt():
+    return ChatPromptValue(
+        messages=[
+            SystemMessage(content="static instructions"),
+            HumanMessage(content="Question"),
+            SystemMessage(content="Current date: 2026-01-01"),
+        ]
+    )
+
+
+class TestContextCache:
+    """Tests for creating and renewing cache names."""
+
+    def test_prefix_is_cached_once_per_tool(self):
+        """Test that repeated calls reuse one cache per prefix and tool."""
+        calls = []
+        cache = ContextCache(_creator(calls), ttl=3600, min_tokens=0)
+
+        assert cache.name("prefix", AnswerQuestion) == "cachedContents/1"
+        assert cache.name("prefix", AnswerQuestion) == "cachedContents/1"
+        assert cache.name("prefix", ReviseAnswer) == "cachedContents/2"
+        assert calls == [
+            ("prefix", "AnswerQuestion", 3600),
+            ("prefix", "ReviseAnswer", 3600),
+        ]
+
+    def test_cache_is_renewed_before_expiry(self):
+        """Test that a cache within the renew margin is recreated."""
+        calls = []
+        cache = ContextCache(_creator(calls), ttl=30, min_tokens=0)
+
+        cache.name("prefix", AnswerQuestion)
+        assert cache.name("prefix", AnswerQuestion) == "cachedContents/2"
+
+    def test_too_small_prefix_is_sent_inline_from_then_on(self, clock):
+        """Test that a prefix Gemini refuses as too small is not retried."""
+        calls = []
+        before = CONTEXT_CACHE_EVENTS["failed"].value
+        cache = ContextCache(_creator(calls, fail=TOO_SMALL), min_tokens=0)
+
+        assert cache.name("prefix", AnswerQuestion) is None
+        clock[0] += 3600
+        assert cache.name("prefix", AnswerQuestion) is None
+        assert len(calls) == 1
+        assert CONTEXT_CACHE_EVENTS["failed"].value == before + 1
+
+    def test_other_failures_are_retried_after_a_backoff(self, clock):
+        """Test that a transient failure is retried, waiting longer each time."""
+        calls = []
+        cache = ContextCache(
+            _creator(calls, fail=RuntimeError("503 UNAVAILABLE")), min_tokens=0
+        )
+
+        assert cache.name("prefix", AnswerQuestion) is None
+        clock[0] += context_cache.RETRY_BACKOFF - 1
+        assert cache.name("prefix", AnswerQuestion) is None
+        assert len(calls) == 1
+
+        clock[0] += 1
+        assert cache.name("prefix", AnswerQuestion) is None
+        assert len(calls) == 2
+
+        # The second wait is twice as long.
+        clock[0] += context_cache.RETRY_BACKOFF
+        assert cache.name("prefix", AnswerQuestion) is None
+        assert len(calls) == 2
+
+        cache._create = _creator(calls)
+        clock[0] += context_cache.RETRY_BACKOFF
+        assert cache.name("prefix", AnswerQuestion) == "cachedContents/3"
+
+    def test_prefix_below_the_minimum_is_never_sent_upstream(self):
+        """Test that the size check counts instructions and tool schema."""
+        calls = []
+        before = CONTEXT_CACHE_EVENTS["too_small"].value
+        schema_only = context_cache.prefix_tokens("", AnswerQuestion)
+        cache = ContextCache(_creator(calls), min_tokens=schema_only + 10)
+
+        assert cache.name("short", AnswerQuestion) is None
+        assert cache.name("x" * 80, AnswerQuestion) == "cachedContents/1"
+        assert calls == [("x" * 80, "AnswerQuestion", cache.ttl)]
+        assert CONTEXT_CACHE_EVENTS["too_small"].value == before + 1
+
+    def test_creation_does_not_block_other_prefixes(self):
+        """Test that a slow creation leaves other callers free to proceed."""
+        started, release = threading.Event(), threading.Event()
+
+        def create(system, tool, ttl):
+            if system == "slow":
+                started.set()
+                release.wait(5)
+            return f"cachedContents/{system}"
+
+        cache = ContextCache(create, min_tokens=0)
+        slow = threading.Thread(target=cache.name, args=("slow", AnswerQuestion))
+        slow.start()
+        started.wait(5)
+
+        # The same prefix is sent inline meanwhile; other prefixes go ahead.
+        assert cache.name("slow", AnswerQuestion) is None
+        assert cache.name("fast", AnswerQuestion) == "cachedContents/fast"
+
+        release.set()
+        slow.join(5)
+        assert cache.name("slow", AnswerQuestion) == "cachedContents/slow"
+
+
+class TestWithContextCache:
+    """Tests for routing prompts through a cached prefix."""
+
+    def _runnable(self, fail=None):
+        seen = {"inline": [], "cached": []}
+        inline = RunnableLambda(lambda prompt: seen["inline"].append(prompt))
+
+        def cached_model(name):
+            return RunnableLambda(
+                lambda messages: seen["cached"].append((name, messages))
+            )
+
+        cache = ContextCache(_creator([], fail=fail), min_tokens=0)
+        return with_context_cache(inline, cache, AnswerQuestion, cached_model), seen
+
+    def test_cached_prefix_is_sent_by_name(self):
+        """Test that the system prefix is dropped and later ones become user turns."""
+        runnable, seen = self._runnable()
+
+        runnable.invoke(_prompt())
+
+        ((name, messages),) = seen["cached"]
+        assert name == "cachedContents/1"
+        assert [type(m) for m in messages] == [HumanMessage, HumanMessage]
+        assert messages[-1].content == "Current date: 2026-01-01"
+        assert seen["inline"] == []
+
+    def test_uncacheable_prefix_is_sent_inline(self):
+        """Test that the full prompt goes to the tool-bound model on failure."""
+        runnable, seen = self._runnable(fail=TOO_SMALL)
+
+        asyncio.run(runnable.ainvoke(_prompt()))
+
+        assert seen["inline"] == [_prompt()]
+        assert seen["cached"] == []
@@ -0,0 +1,86 @@
+"""Unit tests for convergence.py."""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from convergence import convergence_reason, is_trivial_critique
+
+
+def _answer(call_id, answer, missing="Funding figures.", queries=("new query",)):
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "ReviseAnswer",
+                "args": {
+                    "answer": answer,
+                    "reflection": {"missing": missing, "superfluous": ""},
+                    "search_queries": list(queries),
+                    "references": [],
+                },
+                "id": call_id,
+            }
+        ],
+    )
+
+
+def _run(*answers):
+    messages = [HumanMessage(content="What is an AI SOC?")]
+    for answer in answers:
+        call_id = answer.tool_calls[0]["id"]
+        messages += [answer, ToolMessage(content="results", tool_call_id=call_id)]
+    return messages[:-1]
+
+
+FIRST = "AI SOCs automate alert triage with machine learning models."
+DIFFERENT = "Startups such as Dropzone and Prophet raised venture rounds in 2024."
+
+
+class TestConvergenceReason:
+    """Tests for the early-exit decision."""
+
+    def test_draft_alone_never_converges(self):
+        """Test that at least one revision always runs."""
+        assert convergence_reason(_run(_answer("a", FIRST, missing=""))) is None
+
+    def test_substantial_revision_keeps_going(self):
+        """Test that a changed answer with open critique and new queries continues."""
+        messages = _run(
+            _answer("a", FIRST, queries=["ai soc overview"]),
+            _answer("b", DIFFERENT, queries=["ai soc funding rounds"]),
+        )
+
+        assert convergence_reason(messages) is None
+
+    def test_stable_answer(self):
+        """Test that a near-identical revision converges."""
+        messages = _run(_answer("a", FIRST), _answer("b", FIRST + " "))
+
+        assert convergence_reason(messages) == "stable_answer"
+
+    def test_trivial_critique(self):
+        """Test that an empty 'missing' critique converges."""
+        messages = _run(_answer("a", FIRST), _answer("b", DIFFERENT, missing="None."))
+
+        assert convergence_reason(messages) == "no_critique"
+
+    def test_all_queries_repeat_earlier_searches(self):
+        """Test that reworded repeats of earlier queries converge."""
+        messages = _run(
+            _answer("a", FIRST, queries=["AI SOC startups funding"]),
+            _answer("b", DIFFERENT, queries=["ai soc startups funding?"]),
+        )
+
+        assert convergence_reason(messages) == "no_new_queries"
+
+
+class TestIsTrivialCritique:
+    """Tests for critique triviality."""
+
+    def test_trivial_phrases(self):
+        """Test empty and boilerplate critiques."""
+        for text in ("", "  ", "N/A", "Nothing significant.", "none"):
+            assert is_trivial_critique(text)
+
+    def test_real_critique(self):
+        """Test that a concrete critique is not trivial."""
+        assert not is_trivial_critique("Lacks 2024 funding figures.")
@@ -0,0 +1,96 @@
+"""Unit tests for history.py."""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from history import EVIDENCE_DIGEST_HEADER, compact_history
+
+
+def _answer(text, call_id):
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "ReviseAnswer",
+                "args": {
+                    "answer": text,
+                    "reflection": {"missing": "m", "superfluous": "s"},
+                    "search_queries": [f"query for {text}"],
+                },
+                "id": call_id,
+            }
+        ],
+    )
+
+
+def _run(iterations, evidence_chars=200):
+    messages = [HumanMessage(content="Question?")]
+    for i in range(iterations):
+        messages.append(_answer(f"answer {i}", f"call_{i}"))
+        messages.append(
+            ToolMessage(
+                content=f"[{i + 1}] evidence {i} " + "x" * evidence_chars,
+                tool_call_id=f"call_{i}",
+            )
+        )
+    return messages
+
+
+class TestCompactHistory:
+    """Tests for compact_history."""
+
+    def test_first_revision_is_unchanged(self):
+        """Test that a history with no earlier iterations is passed through."""
+        messages = _run(1)
+
+        assert compact_history(messages) == messages
+
+    def test_drops_superseded_drafts_and_keeps_latest_answer(self):
+        """Test that only the latest answer and its tool results remain."""
+        messages = _run(3)
+
+        compacted = compact_history(messages)
+
+        answers = [m for m in compacted if isinstance(m, AIMessage)]
+        assert len(answers) == 1
+        assert answers[0].tool_calls[0]["args"]["answer"] == "answer 2"
+        assert compacted[0].content == "Question?"
+        assert compacted[-1].tool_call_id == "call_2"
+        digest = compacted[1]
+        assert digest.content.startswith(EVIDENCE_DIGEST_HEADER)
+        assert digest.content.index("evidence 0") < digest.content.index("evidence 1")
+
+    def test_digest_respects_token_budget(self):
+        """Test that older evidence is trimmed, newest first, to the budget."""
+        messages = _run(6, evidence_chars=2000)
+
+        compacted = compact_history(messages, token_budget=1200)
+
+        total_chars = sum(len(str(m.content)) for m in compacted)
+        assert total_chars < len("".join(str(m.content) for m in messages))
+        assert "evidence 4" in compacted[1].content
+        assert "evidence 0" not in compacted[1].content
+
+    def test_prompt_size_stays_bounded_as_iterations_grow(self):
+        """Test that more iterations do not grow the compacted prompt."""
+        sizes = [
+            sum(len(str(m.content)) for m in compact_history(_run(n, 2000), 1500))
+            for n in (3, 6, 12)
+        ]
+
+        assert max(sizes) - min(sizes) < 500
+
+    def test_duplicate_notices_are_dropped_from_digest(self):
+        """Test that duplicate-search pointers do not reach the digest."""
+        messages = _run(2)
+        messages.insert(
+            3,
+            ToolMessage(
+                content="Skipped search 'q'",
+                tool_call_id="call_0",
+                artifact={"query": "q", "duplicate_of": "q"},
+            ),
+        )
+
+        compacted = compact_history(messages)
+
+        assert "Skipped search" not in compacted[1].content
@@ -0,0 +1,126 @@
+"""Unit tests for jobs.py."""
+
+import asyncio
+import time
+
+import pytest
+
+from jobs import FAILED, QUEUED, SUCCEEDED, Job, JobManager, JobStore, QueueFull
+
+
+async def _wait(job, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        await asyncio.sleep(0.001)
+
+
+class TestJobManager:
+    """Tests for JobManager."""
+
+    def test_submitted_job_runs_and_records_result(self):
+        """Test that a worker runs the job and stores its result and progress."""
+
+        async def runner(job):
+            job.progress["stage"] = "draft"
+            return job.params["query"].upper()
+
+        async def run():
+            manager = JobManager(runner, workers=1)
+            job = manager.submit({"query": "soc"})
+            assert job.status == QUEUED
+            await _wait(job)
+            return manager, job
+
+        manager, job = asyncio.run(run())
+        assert job.status == SUCCEEDED
+        assert job.result == "SOC"
+        assert job.progress == {"stage": "draft"}
+        assert job.started_at <= job.finished_at
+        assert manager.get(job.id) is job
+
+    def test_failed_job_records_error(self):
+        """Test that an exception marks the job failed instead of killing the worker."""
+
+        async def runner(job):
+            if job.params["fail"]:
+                raise RuntimeError("upstream failed")
+            return "ok"
+
+        async def run():
+            manager = JobManager(runner, workers=1)
+            failed = manager.submit({"fail": True})
+            ok = manager.submit({"fail": False})
+            await _wait(failed)
+            await _wait(ok)
+            return failed, ok
+
+        failed, ok = asyncio.run(run())
+        assert failed.status == FAILED
+        assert failed.error == "upstream failed"
+        assert ok.status == SUCCEEDED
+
+    def test_workers_bound_concurrency(self):
+        """Test that no more than ``workers`` jobs run at once."""
+        peak = 0
+
+        async def runner(job):
+            nonlocal peak
+            peak = max(peak, manager.running)
+            await asyncio.sleep(0.01)
+
+        async def run():
+            jobs = [manager.submit({}) for _ in range(6)]
+            for job in jobs:
+                await _wait(job)
+
+        manager = JobManager(runner, workers=2)
+        asyncio.run(run())
+        assert peak == 2
+
+    def test_full_queue_rejects_submission(self):
+        """Test that submitting past the queue limit raises QueueFull."""
+
+        async def runner(job):
+            await asyncio.sleep(1)
+
+        async def run():
+            manager = JobManager(runner, workers=1, queue_size=2)
+            manager.submit({})
+            manager.submit({})
+            with pytest.raises(QueueFull):
+                manager.submit({})
+            return manager.stats()
+
+        stats = asyncio.run(run())
+        assert stats["queued"] == 2
+        assert stats["stored"] == 2
+
+    def test_complete_records_finished_job(self):
+        """Test that complete() stores a succeeded job without running it."""
+
+        async def runner(job):
+            raise AssertionError("should not run")
+
+        manager = JobManager(runner)
+        job = manager.complete({"query": "soc"}, "cached")
+
+        assert manager.get(job.id).result == "cached"
+        assert job.status == SUCCEEDED
+
+
+class TestJobStore:
+    """Tests for JobStore expiry."""
+
+    def test_finished_jobs_expire_after_ttl(self):
+        """Test that finished jobs are purged and unfinished ones kept."""
+        store = JobStore(ttl=0)
+        finished, pending = Job({}), Job({})
+        store.add(finished)
+        store.add(pending)
+        finished.finished_at = time.time() - 1
+        store.finished(finished)
+
+        assert store.get(finished.id) is None
+        assert store.get(pending.id) is pending
+        assert len(store) == 1
@@ -0,0 +1,93 @@
+"""Unit tests for lazy.py and lazy client construction."""
+
+import asyncio
+import subprocess
+import sys
+import threading
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from lazy import Lazy, deferred
+
+
+class TestLazy:
+    """Tests for the Lazy proxy."""
+
+    def test_builds_on_first_use_only(self):
+        """Test that the factory runs on first access and never again."""
+        calls = []
+        proxy = Lazy(lambda: calls.append(1) or "target")
+
+        assert not proxy.built
+        assert calls == []
+        assert proxy.upper() == "TARGET"
+        assert proxy.get() == "target"
+        assert proxy.built
+        assert calls == [1]
+
+    def test_concurrent_first_use_builds_once(self):
+        """Test that threads racing on first use share one target."""
+        calls = []
+        start = threading.Barrier(8)
+
+        def build():
+            calls.append(1)
+            return object()
+
+        proxy = Lazy(build)
+        seen = []
+
+        def use():
+            start.wait()
+            seen.append(proxy.get())
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [1]
+        assert len({id(target) for target in seen}) == 1
+
+    def test_private_names_are_not_delegated(self):
+        """Test that probing dunder/private names does not build the target."""
+        proxy = Lazy(lambda: pytest.fail("target should not be built"))
+
+        with pytest.raises(AttributeError):
+            proxy.__wrapped__
+
+        assert not proxy.built
+
+
+class TestDeferred:
+    """Tests for the deferred runnable."""
+
+    def test_resolves_factory_on_every_call(self):
+        """Test that swapping what the factory returns takes effect."""
+        current = {"model": RunnableLambda(lambda x: x + 1)}
+        runnable = deferred(lambda: current["model"])
+
+        assert runnable.invoke(1) == 2
+        current["model"] = RunnableLambda(lambda x: x * 10)
+        assert runnable.invoke(1) == 10
+        assert asyncio.run(runnable.ainvoke(2)) == 20
+
+
+class TestColdImport:
+    """Tests that importing the app builds no clients."""
+
+    def test_importing_api_builds_no_clients(self):
+        """Test that the LLM, search tool and graph are left for first use."""
+        code = (
+            "import sys, api, chains, tool_executor; "
+            "print(chains.llm.built, tool_executor.tavily_tool.tool.built, "
+            "api.graph is None, 'langchain_google_genai' in sys.modules, "
+            "'langchain_tavily' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+
+        assert output.split() == ["False", "False", "True", "False", "False"]
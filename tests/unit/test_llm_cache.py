@@ -0,0 +1,156 @@
+"""Unit tests for llm_cache.py."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.output_parsers import JsonOutputToolsParser, PydanticToolsParser
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from llm_cache import LLMCache, cached_responses, llm_cache_key
+from schemas import AnswerQuestion, ReviseAnswer
+from search_cache import LRUCacheTier, SQLiteCacheTier
+
+MODEL = "google_genai:gemini-2.5-flash"
+SCHEMA = convert_to_openai_tool(AnswerQuestion)
+
+
+def _response(call_id="call_abc"):
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "AnswerQuestion",
+                "args": {
+                    "answer": "Cached answer",
+                    "reflection": {"missing": "Funding.", "superfluous": ""},
+                    "search_queries": ["AI SOC funding"],
+                },
+                "id": call_id,
+            }
+        ],
+        usage_metadata={"input_tokens": 90, "output_tokens": 10, "total_tokens": 100},
+    )
+
+
+def _history(call_id, message_id=None):
+    return [
+        SystemMessage(content="instructions"),
+        HumanMessage(content="What is an AI SOC?", id=message_id),
+        _response(call_id),
+        ToolMessage(content="results", tool_call_id=call_id),
+    ]
+
+
+def _counting_model(response=None):
+    calls = []
+
+    def invoke(prompt):
+        calls.append(prompt)
+        return response if response is not None else _response()
+
+    async def ainvoke(prompt):
+        return invoke(prompt)
+
+    return RunnableLambda(invoke, afunc=ainvoke), calls
+
+
+def _cached(model, cache=None, tool=AnswerQuestion):
+    cache = cache or LLMCache([LRUCacheTier(10, 60)])
+    return cached_responses(model, cache, MODEL, tool), cache
+
+
+class TestLLMCacheKey:
+    """Tests for the canonical request fingerprint."""
+
+    def test_ids_do_not_change_the_key(self):
+        """Test that message IDs and per-run tool-call IDs are canonicalized."""
+        first = llm_cache_key(_history("call_1", "m1"), MODEL, SCHEMA)
+        second = llm_cache_key(_history("call_2", "m2"), MODEL, SCHEMA)
+
+        assert first == second
+
+    def test_prompt_model_and_tool_change_the_key(self):
+        """Test that anything the model is actually asked changes the key."""
+        base = llm_cache_key(_history("call_1"), MODEL, SCHEMA)
+        other_question = _history("call_1")
+        other_question[1] = HumanMessage(content="What is a SIEM?")
+
+        assert llm_cache_key(other_question, MODEL, SCHEMA) != base
+        assert llm_cache_key(_history("call_1"), "other-model", SCHEMA) != base
+        assert (
+            llm_cache_key(
+                _history("call_1"), MODEL, convert_to_openai_tool(ReviseAnswer)
+            )
+            != base
+        )
+
+
+class TestCachedResponses:
+    """Tests for the caching wrapper around a chain's model step."""
+
+    def test_repeated_prompt_skips_the_model(self):
+        """Test that the second identical prompt is answered from the cache."""
+        model, calls = _counting_model()
+        cached, cache = _cached(model)
+
+        first = cached.invoke(_history("call_1"))
+        second = cached.invoke(_history("call_2"))
+
+        assert len(calls) == 1
+        assert cache.hits == 1
+        assert second.tool_calls == first.tool_calls
+        assert second.usage_metadata is None
+
+    def test_tool_calls_round_trip_for_both_parsers(self, tmp_path):
+        """Test that parsers see identical data from a cached response."""
+        db = str(tmp_path / "llm.db")
+        tiers = [SQLiteCacheTier(db, ttl=60, table="llm_cache")]
+        model, _ = _counting_model()
+        live = _cached(model, LLMCache(tiers))[0].invoke(_history("call_1"))
+
+        # A new cache instance reads the response back from SQLite only.
+        reloaded, calls = _counting_model()
+        fresh_tiers = [SQLiteCacheTier(db, ttl=60, table="llm_cache")]
+        cached = _cached(reloaded, LLMCache(fresh_tiers))[0].invoke(_history("call_1"))
+
+        assert calls == []
+        for parser in (
+            JsonOutputToolsParser(return_id=True),
+            PydanticToolsParser(tools=[AnswerQuestion]),
+        ):
+            assert parser.invoke(cached) == parser.invoke(live)
+
+    def test_fresh_run_bypasses_the_cache(self):
+        """Test that configurable.fresh always calls the model."""
+        model, calls = _counting_model()
+        cached, cache = _cached(model)
+        config = {"configurable": {"fresh": True}}
+
+        cached.invoke(_history("call_1"))
+        cached.invoke(_history("call_1"), config)
+
+        assert len(calls) == 2
+        assert cache.hits == 0
+
+    def test_response_without_tool_call_is_not_cached(self):
+        """Test that a failed forced tool call is retried on the next run."""
+        model, calls = _counting_model(AIMessage(content="no tool call"))
+        cached, _ = _cached(model)
+
+        asyncio.run(cached.ainvoke(_history("call_1")))
+        asyncio.run(cached.ainvoke(_history("call_1")))
+
+        assert len(calls) == 2
+
+    def test_size_bound_evicts_oldest_prompt(self):
+        """Test that the memory tier keeps at most max_entries responses."""
+        model, calls = _counting_model()
+        cached, _ = _cached(model, LLMCache([LRUCacheTier(1, 60)]))
+        other = [HumanMessage(content="Another question")]
+
+        cached.invoke(_history("call_1"))
+        cached.invoke(other)
+        cached.invoke(_history("call_1"))
+
+        assert len(calls) == 3
@@ -1,10 +1,19 @@
 """Unit tests for main.py."""
 
+import itertools
+
 import pytest
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END
 
-from main import MAX_ITERATIONS, event_loop
+import main
+from main import MAX_ITERATIONS, DeadlineExceeded, event_loop
+from state import initial_state
+
+
+def _state(messages, iterations):
+    return {"messages": messages, "iterations": iterations}
 
 
 class TestEventLoop:
@@ -18,24 +27,18 @@ class TestEventLoop:
             ToolMessage(content="Tool result 1", tool_call_id="call_1"),
         ]
 
-        result = event_loop(messages)
+        result = event_loop(_state(messages, 1))
         assert result == "execute_tools"
 
-    def test_event_loop_returns_execute_tools_when_at_limit(self):
-        """Test that event_loop returns 'execute_tools' when exactly at MAX_ITERATIONS (uses > not >=)."""
-        messages = [
-            HumanMessage(content="Test"),
-            AIMessage(content="Response"),
-            ToolMessage(content="Tool result 1", tool_call_id="call_1"),
-            ToolMessage(content="Tool result 2", tool_call_id="call_2"),
-        ]
+    def test_event_loop_returns_end_at_limit(self):
+        """Test that event_loop returns END once MAX_ITERATIONS revisions ran."""
+        messages = [HumanMessage(content="Test"), AIMessage(content="Response")]
 
-        result = event_loop(messages)
-        # At exactly MAX_ITERATIONS (2), it still returns execute_tools (only > MAX_ITERATIONS returns END)
-        assert result == "execute_tools"
+        result = event_loop(_state(messages, MAX_ITERATIONS))
+        assert result == END
 
-    def test_event_loop_returns_end_when_above_limit(self):
-        """Test that event_loop returns END when above MAX_ITERATIONS."""
+    def test_event_loop_ignores_number_of_tool_messages(self):
+        """Test that many search results in one iteration do not end the loop."""
         messages = [
             HumanMessage(content="Test"),
             AIMessage(content="Response"),
@@ -44,37 +47,123 @@ class TestEventLoop:
             ToolMessage(content="Tool result 3", tool_call_id="call_3"),
         ]
 
-        result = event_loop(messages)
-        assert result == END
+        result = event_loop(_state(messages, 1))
+        assert result == "execute_tools"
+
+    def test_event_loop_with_empty_messages(self):
+        """Test event_loop with empty message list."""
+        result = event_loop(_state([], 0))
+        assert result == "execute_tools"
 
-    def test_event_loop_counts_only_tool_messages(self):
-        """Test that event_loop only counts ToolMessage instances."""
+    def test_event_loop_ends_early_when_revision_converged(self):
+        """Test that a revision identical to the draft stops the loop."""
+        answer = {
+            "answer": "AI SOCs automate alert triage.",
+            "reflection": {"missing": "Funding data.", "superfluous": ""},
+            "search_queries": ["ai soc funding"],
+        }
         messages = [
             HumanMessage(content="Test"),
-            AIMessage(content="Response"),
-            AIMessage(content="Another response"),
-            ToolMessage(content="Tool result", tool_call_id="call_1"),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "AnswerQuestion", "args": answer, "id": "a"}],
+            ),
+            ToolMessage(content="Tool result", tool_call_id="a"),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "ReviseAnswer", "args": answer, "id": "b"}],
+            ),
         ]
 
-        result = event_loop(messages)
-        # Should return execute_tools since only 1 ToolMessage
-        assert result == "execute_tools"
+        assert event_loop(_state(messages, 1)) == END
 
-    def test_event_loop_with_no_tool_messages(self):
-        """Test event_loop with no ToolMessages."""
-        messages = [HumanMessage(content="Test"), AIMessage(content="Response")]
+    def test_event_loop_ends_when_deadline_exceeded(self):
+        """Test that a skipped step ends the loop with the answer so far."""
+        state = {"messages": [], "iterations": 1, "deadline_exceeded": True}
 
-        result = event_loop(messages)
-        # 0 tool messages, so should return execute_tools
-        assert result == "execute_tools"
-
-    def test_event_loop_with_empty_messages(self):
-        """Test event_loop with empty message list."""
-        messages = []
-
-        result = event_loop(messages)
-        assert result == "execute_tools"
+        assert event_loop(state) == END
 
     def test_max_iterations_constant(self):
         """Test that MAX_ITERATIONS is set correctly."""
         assert MAX_ITERATIONS == 2
+
+
+class TestGraphIterations:
+    """Tests for the revise counter in the graph state."""
+
+    @pytest.mark.parametrize("queries_per_step", [1, 3])
+    def test_revise_steps_do_not_depend_on_query_count(
+        self, monkeypatch, stub_search_tool, queries_per_step
+    ):
+        """Test that the graph runs MAX_ITERATIONS revisions whatever it searches."""
+        steps = itertools.count()
+
+        def responder(tool_name):
+            def _respond(messages):
+                step = next(steps)
+                args = {
+                    "answer": f"Answer {step}: " + f"finding{step} " * 5,
+                    "reflection": {"missing": "More data.", "superfluous": ""},
+                    "search_queries": [
+                        f"topic{step} angle{i}" for i in range(queries_per_step)
+                    ],
+                    "references": [],
+                }
+                return AIMessage(
+                    content="",
+                    tool_calls=[{"name": tool_name, "args": args, "id": f"c{step}"}],
+                )
+
+            return RunnableLambda(_respond)
+
+        monkeypatch.setattr(main, "first_responder", responder("AnswerQuestion"))
+        monkeypatch.setattr(main, "revisor", responder("ReviseAnswer"))
+
+        result = main.create_graph().invoke(initial_state("Test"))
+
+        assert result["iterations"] == MAX_ITERATIONS
+        revisions = [
+            m
+            for m in result["messages"]
+            if isinstance(m, AIMessage) and m.tool_calls[0]["name"] == "ReviseAnswer"
+        ]
+        assert len(revisions) == MAX_ITERATIONS
+
+
+class TestGraphDeadline:
+    """Tests for deadline handling inside the graph."""
+
+    def test_expired_deadline_before_draft_raises(self, stub_graph):
+        """Test that a run with no time left for the draft fails fast."""
+        state = initial_state("Test", deadline_ms=1)
+        state["deadline"] -= 1
+
+        with pytest.raises(DeadlineExceeded):
+            stub_graph.invoke(state)
+
+
+class TestWarmUp:
+    """Tests for lazy graph construction and warm-up."""
+
+    def test_graph_is_compiled_once(self):
+        """Test that get_graph and main.graph share one compiled graph."""
+        assert main.get_graph() is main.get_graph()
+        assert main.graph is main.get_graph()
+
+    def test_warm_up_builds_model_and_search_tool(self, monkeypatch):
+        """Test that warm-up binds both tool models and builds the search stack."""
+        import chains
+        import tool_executor
+        from lazy import Lazy
+
+        bound = []
+        llm = Lazy(lambda: RunnableLambda(lambda x: x))
+        monkeypatch.setattr(chains, "llm", llm)
+        monkeypatch.setattr(chains, "bind_tool", lambda model, tool: bound.append(tool))
+        search = Lazy(lambda: object())
+        monkeypatch.setattr(tool_executor.tavily_tool, "tool", search)
+
+        main.warm_up()
+
+        assert [tool.__name__ for tool in bound] == ["AnswerQuestion", "ReviseAnswer"]
+        assert search.built
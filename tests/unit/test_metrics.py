@@ -0,0 +1,111 @@
+"""Unit tests for metrics.py."""
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from metrics import (
+    CACHED_TOKENS,
+    PROMPT_TOKENS,
+    Registry,
+    _Metric,
+    record_token_usage,
+)
+
+
+class TestRegistry:
+    """Tests for the metric primitives and the text rendering."""
+
+    def test_counter_renders_labels(self):
+        """Test that each bound label combination renders one sample."""
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests.", ["node"])
+        counter.labels("draft").inc()
+        counter.labels("draft").inc(2)
+
+        assert registry.render() == (
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{node="draft"} 3.0\n'
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts, sum and count of a histogram."""
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency.", buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{le="5.0"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 14.5" in lines
+        assert "latency_seconds_count 4" in lines
+
+    def test_labels_are_bound_once(self):
+        """Test that labels() returns the same child for the same values."""
+        counter = Registry().counter("c_total", "C.", ["node"])
+
+        assert counter.labels("draft") is counter.labels("draft")
+        with pytest.raises(ValueError):
+            counter.labels("draft", "extra")
+
+    def test_metric_base_cannot_be_instantiated(self):
+        """Test that a metric kind must define its children and samples."""
+        with pytest.raises(TypeError):
+            _Metric("m", "M.")
+
+    def test_callback_metric_reads_at_render_time(self):
+        """Test that callback metrics expose a value owned elsewhere."""
+        registry = Registry()
+        hits = {"value": 1}
+        registry.callback("hits_total", "Hits.", lambda: hits["value"])
+        hits["value"] = 7
+
+        assert "hits_total 7.0" in registry.render().splitlines()
+
+
+class TestRecordTokenUsage:
+    """Tests for token accounting from model responses."""
+
+    def test_usage_metadata_is_counted(self):
+        """Test that reported prompt tokens are added to the node counter."""
+        before = PROMPT_TOKENS["draft"].value
+        message = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 120,
+                "output_tokens": 30,
+                "total_tokens": 150,
+            },
+        )
+
+        record_token_usage("draft", message)
+
+        assert PROMPT_TOKENS["draft"].value == before + 120
+
+    def test_cached_prompt_tokens_are_counted(self):
+        """Test that the cache-read part of the prompt is counted separately."""
+        before = CACHED_TOKENS["revise"].value
+        message = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 1200,
+                "output_tokens": 30,
+                "total_tokens": 1230,
+                "input_token_details": {"cache_read": 1024},
+            },
+        )
+
+        record_token_usage("revise", message)
+
+        assert CACHED_TOKENS["revise"].value == before + 1024
+
+    def test_missing_usage_is_ignored(self):
+        """Test that responses without usage metadata are skipped."""
+        before = PROMPT_TOKENS["revise"].value
+
+        record_token_usage("revise", AIMessage(content=""))
+
+        assert PROMPT_TOKENS["revise"].value == before
@@ -0,0 +1,119 @@
+"""Unit tests for rate_limit.py."""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from rate_limit import RateLimitedSearchTool, RateLimiter, TokenBucket, rate_limited
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    def test_burst_up_to_capacity_is_free(self):
+        """Test that a full bucket serves its capacity without waiting."""
+        bucket = TokenBucket(rate=10, capacity=3)
+
+        assert [bucket.reserve(1) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_debt_is_paid_back_at_rate(self):
+        """Test that callers past capacity wait in arrival order."""
+        bucket = TokenBucket(rate=10, capacity=1)
+        bucket.reserve(1)
+
+        first, second = bucket.reserve(1), bucket.reserve(1)
+
+        assert first == pytest.approx(0.1, abs=0.01)
+        assert second == pytest.approx(0.2, abs=0.01)
+
+    def test_refund_is_capped_at_capacity(self):
+        """Test that refunds never push the bucket above its capacity."""
+        bucket = TokenBucket(rate=1, capacity=5)
+        bucket.refund(100)
+
+        assert bucket.level == 5
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter."""
+
+    def test_requests_per_second_spaces_calls(self):
+        """Test that async callers are spread to the configured rate."""
+        limiter = RateLimiter("tavily", requests_per_second=50)
+
+        async def burst():
+            start = time.perf_counter()
+            await asyncio.gather(*(limiter.aacquire() for _ in range(100)))
+            return time.perf_counter() - start
+
+        # 50 go at once, the other 50 are spread over one second.
+        assert 0.9 < asyncio.run(burst()) < 1.5
+
+    def test_disabled_limiter_never_waits(self):
+        """Test that a rate of 0 turns the limiter off."""
+        limiter = RateLimiter("gemini")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            limiter.acquire(tokens=10_000)
+
+        assert time.perf_counter() - start < 0.1
+
+    def test_settle_charges_extra_usage(self):
+        """Test that usage above the estimate is taken from the token bucket."""
+        limiter = RateLimiter("gemini", tokens_per_minute=6000)
+        limiter.acquire(tokens=100)
+
+        limiter.settle(100, 1100)
+
+        assert limiter.tokens.level == pytest.approx(4900, abs=5)
+
+    def test_cancelled_waiter_refunds_reservation(self):
+        """Test that giving up while throttled returns the tokens."""
+        limiter = RateLimiter("tavily", requests_per_second=1)
+
+        async def cancel_waiter():
+            await limiter.aacquire()
+            waiter = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+
+        asyncio.run(cancel_waiter())
+        assert limiter.requests.level > -0.5
+
+
+class TestRateLimitedWrappers:
+    """Tests for rate_limited and RateLimitedSearchTool."""
+
+    def test_rate_limited_model_settles_reported_usage(self):
+        """Test that the chat wrapper charges the tokens the model reported."""
+        limiter = RateLimiter("gemini", tokens_per_minute=60_000)
+        model = RunnableLambda(
+            lambda prompt: AIMessage(
+                content="ok",
+                usage_metadata={
+                    "input_tokens": 900,
+                    "output_tokens": 100,
+                    "total_tokens": 1000,
+                },
+            )
+        )
+
+        result = asyncio.run(rate_limited(model, limiter).ainvoke("short prompt"))
+
+        assert result.content == "ok"
+        assert limiter.tokens.level == pytest.approx(59_000, abs=5)
+
+    def test_search_tool_charges_one_request_per_query(self, stub_search_tool):
+        """Test that a batch reserves a request for each query it sends."""
+        limiter = RateLimiter("tavily", requests_per_second=10)
+        tool = RateLimitedSearchTool(stub_search_tool, limiter)
+
+        tool.batch([{"query": "a"}, {"query": "b"}, {"query": "c"}])
+
+        assert limiter.requests.level == pytest.approx(7, abs=0.1)
+        assert tool.max_results == stub_search_tool.max_results
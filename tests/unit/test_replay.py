@@ -0,0 +1,147 @@
+"""Unit tests for replay.py."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.output_parsers import PydanticToolsParser
+
+from replay import (
+    Cassette,
+    CassetteMiss,
+    ReplayChatModel,
+    ReplaySearchTool,
+    chat_request_key,
+    wrap_chat_model,
+)
+from schemas import AnswerQuestion, ReviseAnswer
+
+
+def _recorder(response):
+    inner = Mock()
+    inner.bind_tools.return_value.invoke.return_value = response
+    inner.bind_tools.return_value.ainvoke = AsyncMock(return_value=response)
+    return inner
+
+
+class TestReplayChatModel:
+    """Tests for the chat-model stand-in."""
+
+    def test_record_then_replay_round_trips_tool_calls(
+        self, tmp_path, mock_llm_response
+    ):
+        """Test that a replayed AIMessage parses exactly like the recorded one."""
+        path = str(tmp_path / "llm.json")
+        messages = [HumanMessage(content="What is an AI SOC?")]
+        inner = _recorder(mock_llm_response)
+
+        recorder = ReplayChatModel(cassette=Cassette(path), mode="record", inner=inner)
+        recorded = recorder.bind_tools([AnswerQuestion], tool_choice="AnswerQuestion")
+        recorded.invoke(messages)
+
+        player = ReplayChatModel(cassette=Cassette(path), mode="replay")
+        replayed = player.bind_tools(
+            [AnswerQuestion], tool_choice="AnswerQuestion"
+        ).invoke(messages)
+
+        assert replayed.tool_calls == mock_llm_response.tool_calls
+        parser = PydanticToolsParser(tools=[AnswerQuestion])
+        assert parser.invoke(replayed) == parser.invoke(mock_llm_response)
+        assert inner.bind_tools.return_value.invoke.call_count == 1
+
+    def test_key_ignores_system_messages(self, tmp_path, mock_llm_response):
+        """Test that the volatile timestamped system prompt does not break replay."""
+        cassette = Cassette()
+        inner = _recorder(mock_llm_response)
+        model = ReplayChatModel(cassette=cassette, mode="record", inner=inner)
+        bound = model.bind_tools([AnswerQuestion], tool_choice="AnswerQuestion")
+
+        bound.invoke([SystemMessage(content="time 1"), HumanMessage(content="Q")])
+        model.mode = "replay"
+        replayed = bound.invoke(
+            [SystemMessage(content="time 2"), HumanMessage(content="Q")]
+        )
+
+        assert replayed.tool_calls == mock_llm_response.tool_calls
+
+    def test_key_ignores_message_ids(self):
+        """Test that the per-run IDs the graph state assigns do not break replay."""
+        first = [HumanMessage(content="Q", id="run-1")]
+        second = [HumanMessage(content="Q", id="run-2")]
+
+        assert chat_request_key(first, None, None) == chat_request_key(
+            second, None, None
+        )
+
+    def test_replay_miss_raises(self):
+        """Test that an unrecorded request fails loudly in replay mode."""
+        model = ReplayChatModel(cassette=Cassette(), mode="replay")
+
+        with pytest.raises(CassetteMiss):
+            model.bind_tools([AnswerQuestion]).invoke([HumanMessage(content="Q")])
+
+    @pytest.mark.parametrize("schema", [AnswerQuestion, ReviseAnswer])
+    def test_synthetic_responses_are_schema_valid(self, schema):
+        """Test that synthetic tool calls validate against the bound schema."""
+        model = ReplayChatModel(cassette=Cassette(), mode="synthetic")
+        response = model.bind_tools([schema], tool_choice=schema.__name__).invoke(
+            [HumanMessage(content="What is an AI SOC?")]
+        )
+
+        (parsed,) = PydanticToolsParser(tools=[schema]).invoke(response)
+        assert isinstance(parsed, schema)
+        assert parsed.search_queries
+
+    def test_artificial_latency(self):
+        """Test that the async path sleeps for the configured latency."""
+        model = ReplayChatModel(cassette=Cassette(), mode="synthetic", latency=0.05)
+        bound = model.bind_tools([AnswerQuestion])
+
+        start = time.perf_counter()
+        asyncio.run(bound.ainvoke([HumanMessage(content="Q")]))
+
+        assert time.perf_counter() - start >= 0.05
+
+    def test_off_mode_returns_real_model(self):
+        """Test that REPLAY_MODE=off leaves the real model untouched."""
+        real = object()
+
+        assert wrap_chat_model(lambda: real, mode="off") is real
+
+    def test_unknown_mode_is_rejected(self):
+        """Test that a typo in REPLAY_MODE is reported."""
+        with pytest.raises(ValueError):
+            wrap_chat_model(lambda: None, mode="replya")
+
+
+class TestReplaySearchTool:
+    """Tests for the search-tool stand-in."""
+
+    def test_record_then_replay(self, tmp_path, mock_tavily_tool):
+        """Test that recorded search results are replayed without the tool."""
+        path = str(tmp_path / "search.json")
+        mock_tavily_tool.max_results = 5
+        mock_tavily_tool.batch.return_value = [{"results": [{"url": "u"}]}]
+        ReplaySearchTool(Cassette(path), mode="record", inner=mock_tavily_tool).batch(
+            [{"query": "AI SOC"}]
+        )
+
+        player = ReplaySearchTool(Cassette(path), mode="replay")
+
+        assert asyncio.run(player.abatch([{"query": "ai soc"}])) == [
+            {"results": [{"url": "u"}]}
+        ]
+        with pytest.raises(CassetteMiss):
+            player.batch([{"query": "other"}])
+
+    def test_synthetic_results_are_deterministic(self):
+        """Test that synthetic search results are stable across calls."""
+        tool = ReplaySearchTool(Cassette(), mode="synthetic", max_results=3)
+
+        first = tool.batch([{"query": "AI SOC"}])
+        second = tool.batch([{"query": "AI SOC"}])
+
+        assert first == second
+        assert len(first[0]["results"]) == 3
@@ -0,0 +1,161 @@
+"""Unit tests for search_cache.py."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import search_cache
+from search_cache import (
+    CachedSearchTool,
+    LRUCacheTier,
+    SearchCache,
+    SQLiteCacheTier,
+    make_cache_key,
+)
+
+
+class TestMakeCacheKey:
+    """Tests for cache key normalization."""
+
+    def test_equivalent_queries_share_a_key(self):
+        """Test that case and whitespace differences are normalized away."""
+        assert make_cache_key("  AI SOC   startups? ", 5) == make_cache_key(
+            "ai soc startups", 5
+        )
+
+    def test_max_results_is_part_of_the_key(self):
+        """Test that different result counts do not collide."""
+        assert make_cache_key("query", 5) != make_cache_key("query", 10)
+
+
+class TestLRUCacheTier:
+    """Tests for the in-process LRU tier."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted first."""
+        tier = LRUCacheTier(max_entries=2, ttl=60)
+        tier.set("a", 1)
+        tier.set("b", 2)
+        tier.get("a")
+        tier.set("c", 3)
+
+        assert tier.get("a") == 1
+        assert tier.get("b") is None
+        assert tier.get("c") == 3
+
+    def test_entries_expire_after_ttl(self):
+        """Test that expired entries are treated as misses."""
+        tier = LRUCacheTier(max_entries=10, ttl=0.01)
+        tier.set("a", 1)
+        time.sleep(0.02)
+
+        assert tier.get("a") is None
+
+
+class TestSQLiteCacheTier:
+    """Tests for the shared SQLite tier."""
+
+    def test_round_trip_across_instances(self, tmp_path):
+        """Test that a second instance (another worker) sees stored results."""
+        path = str(tmp_path / "search.db")
+        SQLiteCacheTier(path, ttl=60).set("key", {"results": [{"url": "u"}]})
+
+        assert SQLiteCacheTier(path, ttl=60).get("key") == {"results": [{"url": "u"}]}
+
+    def test_size_cap_evicts_least_recently_accessed(self, tmp_path):
+        """Test that the table never grows past max_entries."""
+        tier = SQLiteCacheTier(str(tmp_path / "search.db"), max_entries=2, ttl=60)
+        for key in ("a", "b", "c"):
+            tier.set(key, key)
+            time.sleep(0.001)
+
+        assert len(tier) == 2
+        assert tier.get("a") is None
+
+    def test_hits_only_refresh_stale_access_times(self, tmp_path, monkeypatch):
+        """Test that a hit writes accessed_at only once it is old enough."""
+        now = [1000.0]
+        monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+        tier = SQLiteCacheTier(str(tmp_path / "search.db"), ttl=100)
+        tier.set("key", "value")
+
+        def accessed_at():
+            return tier._conn.execute(
+                "SELECT accessed_at FROM search_cache WHERE key = 'key'"
+            ).fetchone()[0]
+
+        now[0] += 100 * search_cache.ACCESS_REFRESH_FRACTION
+        assert tier.get("key") == "value"
+        assert accessed_at() == 1000.0
+
+        now[0] += 1
+        assert tier.get("key") == "value"
+        assert accessed_at() == now[0]
+
+    def test_tables_keep_caches_apart(self, tmp_path):
+        """Test that two caches can share one database file."""
+        path = str(tmp_path / "cache.db")
+        SQLiteCacheTier(path, ttl=60).set("key", "search")
+        SQLiteCacheTier(path, ttl=60, table="llm_cache").set("key", "llm")
+
+        assert SQLiteCacheTier(path, ttl=60).get("key") == "search"
+        assert SQLiteCacheTier(path, ttl=60, table="llm_cache").get("key") == "llm"
+
+
+class TestCachedSearchTool:
+    """Tests for the caching wrapper around the search tool."""
+
+    def _tool(self):
+        tool = Mock()
+        tool.max_results = 5
+        tool.batch.side_effect = lambda inputs: [
+            {"query": item["query"], "results": []} for item in inputs
+        ]
+        return tool
+
+    def test_hits_skip_the_network(self):
+        """Test that only uncached queries reach the wrapped tool."""
+        tool = self._tool()
+        cached = CachedSearchTool(tool, SearchCache([LRUCacheTier(10, 60)]))
+
+        cached.batch([{"query": "first"}])
+        results = cached.batch([{"query": "First "}, {"query": "second"}])
+
+        assert [r["query"] for r in results] == ["first", "second"]
+        assert tool.batch.call_args_list[-1].args[0] == [{"query": "second"}]
+        assert cached.cache.stats()["hits"] == 1
+        assert cached.cache.stats()["misses"] == 2
+
+    def test_errors_are_not_cached(self):
+        """Test that failed searches are retried on the next call."""
+        tool = self._tool()
+        tool.batch.side_effect = lambda inputs: [{"error": "boom"} for _ in inputs]
+        cached = CachedSearchTool(tool, SearchCache([LRUCacheTier(10, 60)]))
+
+        cached.batch([{"query": "q"}])
+        cached.batch([{"query": "q"}])
+
+        assert tool.batch.call_count == 2
+
+    def test_abatch_fully_cached_makes_no_call(self):
+        """Test that the async path skips the tool when everything is cached."""
+        tool = self._tool()
+        tool.abatch = AsyncMock()
+        cache = SearchCache([LRUCacheTier(10, 60)])
+        cache.set(make_cache_key("q", 5), {"results": []})
+        cached = CachedSearchTool(tool, cache)
+
+        results = asyncio.run(cached.abatch([{"query": "q"}]))
+
+        assert results == [{"results": []}]
+        tool.abatch.assert_not_called()
+
+    def test_disk_hits_backfill_memory_tier(self, tmp_path):
+        """Test that a hit in the SQLite tier populates the LRU tier."""
+        memory = LRUCacheTier(10, 60)
+        disk = SQLiteCacheTier(str(tmp_path / "search.db"), ttl=60)
+        disk.set("k", {"results": []})
+        cache = SearchCache([memory, disk])
+
+        assert cache.get("k") == {"results": []}
+        assert memory.get("k") == {"results": []}
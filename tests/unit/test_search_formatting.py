@@ -0,0 +1,71 @@
+"""Unit tests for search_formatting.py."""
+
+from search_formatting import render_search_result, snippet_budget, trim_snippet
+
+TAVILY_RESULT = {
+    "query": "ai soc startups",
+    "follow_up_questions": None,
+    "answer": None,
+    "images": [],
+    "results": [
+        {
+            "title": "Startup X raises $10M",
+            "url": "https://example.com/x",
+            "content": "Startup X, an autonomous SOC platform, raised $10M.",
+            "score": 0.91,
+            "raw_content": None,
+        },
+        {
+            "title": "Startup Y Series B",
+            "url": "https://example.com/y",
+            "content": "Startup Y closed a $25M Series B.",
+            "score": 0.87,
+            "raw_content": None,
+        },
+    ],
+    "response_time": 1.23,
+}
+
+
+class TestRenderSearchResult:
+    """Tests for the compact result renderer."""
+
+    def test_renders_numbered_sources_without_noise(self):
+        """Test that only title, URL and snippet reach the prompt."""
+        text, sources = render_search_result("ai soc startups", TAVILY_RESULT, 3, 500)
+
+        assert sources == 2
+        assert "[3] Startup X raises $10M" in text
+        assert "URL: https://example.com/y" in text
+        assert text.index("[3]") < text.index("[4]")
+        for noise in ("score", "raw_content", "response_time", "0.91"):
+            assert noise not in text
+        assert len(text) < len(str(TAVILY_RESULT))
+
+    def test_error_results_are_reported_without_numbers(self):
+        """Test that a failed search renders a one-line error."""
+        text, sources = render_search_result("q", {"error": "timeout"}, 1, 500)
+
+        assert sources == 0
+        assert text == "Search 'q' failed: timeout"
+
+    def test_single_entry_payload(self):
+        """Test that a bare {content, url} dict is treated as one source."""
+        text, sources = render_search_result(
+            "q", {"content": "Body", "url": "https://example.com"}, 1, 500
+        )
+
+        assert sources == 1
+        assert "[1] Untitled\nURL: https://example.com\nBody" in text
+
+
+class TestSnippetBudget:
+    """Tests for snippet trimming and budgeting."""
+
+    def test_trim_snippet_cuts_at_word_boundary(self):
+        """Test that snippets are cut between words and marked."""
+        assert trim_snippet("alpha   beta gamma delta", 12) == "alpha beta…"
+
+    def test_budget_shrinks_with_more_results(self):
+        """Test that the per-snippet budget shrinks as results grow."""
+        assert snippet_budget(100) < snippet_budget(2)
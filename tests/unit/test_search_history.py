@@ -0,0 +1,73 @@
+"""Unit tests for search_history.py."""
+
+from langchain_core.messages import ToolMessage
+
+from search_history import SearchHistory, duplicate_search_message
+
+
+class TestSearchHistory:
+    """Tests for query and URL de-duplication."""
+
+    def test_from_messages_collects_queries_and_urls(self, sample_messages):
+        """Test that earlier queries and artifact URLs are recorded."""
+        messages = sample_messages + [
+            ToolMessage(
+                content="...",
+                tool_call_id="test_call_id_123",
+                artifact={"query": "query1", "urls": ["https://example.com/a"]},
+            )
+        ]
+
+        history = SearchHistory.from_messages(messages)
+
+        assert [query for query, _ in history.queries] == ["query1", "query2"]
+        assert history.urls == {"https://example.com/a"}
+
+    def test_match_detects_reworded_duplicates(self):
+        """Test that reordered and re-cased queries count as duplicates."""
+        history = SearchHistory(threshold=0.8)
+        history.add_query("AI SOC startups funding")
+
+        assert history.match("AI SOC market size") is None
+        assert history.match("ai SOC Startups funding?") == "AI SOC startups funding"
+        assert history.match("startups funding AI SOC") == "AI SOC startups funding"
+
+    def test_plan_flags_duplicates_within_a_batch(self):
+        """Test that the second copy of a query in one batch is flagged."""
+        history = SearchHistory()
+
+        planned = history.plan(["SOC market size", "soc market size", "SOC vendors"])
+
+        assert planned == [
+            ("SOC market size", None),
+            ("soc market size", "SOC market size"),
+            ("SOC vendors", None),
+        ]
+
+    def test_collapse_drops_seen_urls_without_mutating(self):
+        """Test that repeated URLs are removed from a copy of the result."""
+        history = SearchHistory()
+        history.urls.add("https://example.com/a")
+        result = {
+            "query": "q",
+            "results": [
+                {"url": "https://example.com/a", "content": "old"},
+                {"url": "https://example.com/b", "content": "new"},
+            ],
+        }
+
+        collapsed, new_urls = history.collapse(result)
+
+        assert [entry["url"] for entry in collapsed["results"]] == [
+            "https://example.com/b"
+        ]
+        assert new_urls == ["https://example.com/b"]
+        assert len(result["results"]) == 2
+
+    def test_duplicate_notice_names_the_earlier_query(self):
+        """Test that the notice does not point at results that may be compacted away."""
+        notice = duplicate_search_message("AI SOC startups", "ai soc startup list")
+
+        assert "'AI SOC startups'" in notice
+        assert "'ai soc startup list'" in notice
+        assert "above" not in notice
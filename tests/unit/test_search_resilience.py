@@ -0,0 +1,190 @@
+"""Unit tests for search_resilience.py."""
+
+import asyncio
+import time
+
+from langchain_core.tools import ToolException
+
+from search_resilience import LatencyTracker, ResilientSearchTool
+
+
+class ScriptedSearchTool:
+    """Search tool whose per-query behaviour is scripted call by call.
+
+    ``script[query]`` is a list of ``(delay, outcome)`` pairs consumed one
+    per call; ``outcome`` is a result dict or an exception to raise.
+    """
+
+    max_results = 5
+
+    def __init__(self, script):
+        self.script = {query: list(steps) for query, steps in script.items()}
+        self.calls = []
+
+    def _next(self, query):
+        self.calls.append(query)
+        steps = self.script[query]
+        return steps.pop(0) if len(steps) > 1 else steps[0]
+
+    async def abatch(self, inputs, *args, **kwargs):
+        (item,) = inputs
+        delay, outcome = self._next(item["query"])
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return [outcome]
+
+    def batch(self, inputs, *args, **kwargs):
+        (item,) = inputs
+        delay, outcome = self._next(item["query"])
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return [outcome]
+
+
+def _ok(query):
+    return {"query": query, "results": [{"url": f"https://{query}"}]}
+
+
+def _tool(script, **options):
+    options = {"timeout": 0.2, "retries": 2, "backoff": 0.001, **options}
+    inner = ScriptedSearchTool(script)
+    return inner, ResilientSearchTool(inner, **options)
+
+
+class TestAsyncSearches:
+    """Tests for ResilientSearchTool.abatch."""
+
+    def test_straggler_does_not_delay_other_queries(self):
+        """Test that queries run independently and a slow one times out alone."""
+        inner, tool = _tool(
+            {"fast": [(0.01, _ok("fast"))], "slow": [(5, _ok("slow"))]}, retries=0
+        )
+
+        start = time.perf_counter()
+        fast, slow = asyncio.run(tool.abatch([{"query": "fast"}, {"query": "slow"}]))
+
+        assert time.perf_counter() - start < 1
+        assert fast == _ok("fast")
+        assert "timed out" in slow["error"]
+
+    def test_failed_attempt_is_retried(self):
+        """Test that an error result or exception is retried until it succeeds."""
+        inner, tool = _tool(
+            {
+                "q": [
+                    (0, {"error": "502 Bad Gateway"}),
+                    (0, RuntimeError("reset")),
+                    (0, _ok("q")),
+                ]
+            }
+        )
+
+        (result,) = asyncio.run(tool.abatch([{"query": "q"}]))
+
+        assert result == _ok("q")
+        assert inner.calls == ["q", "q", "q"]
+
+    def test_gives_up_after_retries(self):
+        """Test that a query failing every attempt returns an error result."""
+        inner, tool = _tool({"q": [(0, RuntimeError("down"))]}, retries=1)
+
+        (result,) = asyncio.run(tool.abatch([{"query": "q"}]))
+
+        assert result == {"error": "down (2 attempts)"}
+        assert len(inner.calls) == 2
+
+    def test_no_results_is_not_retried(self):
+        """Test that a ToolException (no results) is returned without retrying."""
+        inner, tool = _tool({"q": [(0, ToolException("No search results found"))]})
+
+        (result,) = asyncio.run(tool.abatch([{"query": "q"}]))
+
+        assert result == {"error": "No search results found"}
+        assert inner.calls == ["q"]
+
+    def test_hedge_wins_over_slow_first_attempt(self):
+        """Test that a duplicate request after the p95 delay is used if faster."""
+        latencies = LatencyTracker()
+        for _ in range(20):
+            latencies.add(0.01)
+        inner, tool = _tool(
+            {"q": [(1, _ok("slow")), (0.01, _ok("q"))]},
+            timeout=2,
+            hedge=True,
+            latencies=latencies,
+        )
+
+        start = time.perf_counter()
+        (result,) = asyncio.run(tool.abatch([{"query": "q"}]))
+
+        assert result == _ok("q")
+        assert time.perf_counter() - start < 0.5
+        assert inner.calls == ["q", "q"]
+
+    def test_max_concurrency_caps_queries_in_flight(self):
+        """Test that config max_concurrency limits the fan-out of a batch."""
+        in_flight = peak = 0
+
+        class CountingTool(ScriptedSearchTool):
+            async def abatch(self, inputs, *args, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                try:
+                    return await super().abatch(inputs, *args, **kwargs)
+                finally:
+                    in_flight -= 1
+
+        queries = [f"q{i}" for i in range(6)]
+        tool = ResilientSearchTool(
+            CountingTool({q: [(0.01, _ok(q))] for q in queries}), timeout=1
+        )
+
+        results = asyncio.run(
+            tool.abatch([{"query": q} for q in queries], config={"max_concurrency": 2})
+        )
+
+        assert results == [_ok(q) for q in queries]
+        assert peak == 2
+
+    def test_no_hedge_without_latency_history(self):
+        """Test that hedging waits until there are enough latency samples."""
+        inner, tool = _tool({"q": [(0.05, _ok("q"))]}, hedge=True)
+
+        asyncio.run(tool.abatch([{"query": "q"}]))
+
+        assert inner.calls == ["q"]
+
+
+class TestSyncSearches:
+    """Tests for ResilientSearchTool.batch."""
+
+    def test_sync_batch_times_out_and_retries(self):
+        """Test that the sync path applies the same timeout and retry policy."""
+        inner, tool = _tool(
+            {
+                "slow": [(1, _ok("late")), (0.01, _ok("slow"))],
+                "fast": [(0, _ok("fast"))],
+            }
+        )
+
+        results = tool.batch([{"query": "slow"}, {"query": "fast"}])
+
+        assert results == [_ok("slow"), _ok("fast")]
+        assert inner.calls.count("slow") == 2
+
+
+class TestLatencyTracker:
+    """Tests for LatencyTracker."""
+
+    def test_percentile_needs_enough_samples(self):
+        """Test that p95 is only reported once the window has enough data."""
+        latencies = LatencyTracker()
+        for i in range(19):
+            latencies.add(i / 100)
+        assert latencies.percentile(0.95) is None
+
+        latencies.add(1.0)
+        assert latencies.percentile(0.95) == 1.0
@@ -0,0 +1,138 @@
+"""Unit tests for singleflight.py."""
+
+import asyncio
+
+from singleflight import SingleFlight
+
+
+class TestSingleFlightDo:
+    """Tests for SingleFlight.do."""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that callers with the same key share the same result."""
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.in_flight == 0
+
+    def test_different_keys_run_separately(self):
+        """Test that distinct keys are not coalesced."""
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return len(calls)
+
+        async def run():
+            return await asyncio.gather(flight.do("a", work), flight.do("b", work))
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test that a failure is raised to all attached callers."""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", work), flight.do("k", work), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_cancelled_caller_does_not_cancel_shared_run(self):
+        """Test that one caller going away leaves the run going for others."""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            first = asyncio.create_task(flight.do("k", work))
+            second = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "done"
+
+    def test_on_done_runs_when_the_started_call_ends(self):
+        """Test that on_done fires when the run ends, and at once on joins."""
+        flight = SingleFlight()
+        done = []
+
+        async def work():
+            await asyncio.sleep(0.01)
+            assert done == ["joined"]
+            return "result"
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", work, lambda: done.append("started")),
+                flight.do("k", work, lambda: done.append("joined")),
+            )
+
+        assert asyncio.run(run()) == ["result"] * 2
+        assert done == ["joined", "started"]
+
+
+class TestSingleFlightStream:
+    """Tests for SingleFlight.stream."""
+
+    def test_late_subscriber_receives_all_events(self):
+        """Test that a subscriber joining mid-stream gets earlier events too."""
+        flight = SingleFlight()
+        started = []
+
+        async def source():
+            started.append(1)
+            for i in range(3):
+                yield f"event {i}"
+                await asyncio.sleep(0.01)
+
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [event async for event in flight.stream("k", source)]
+
+        async def run():
+            return await asyncio.gather(collect(0), collect(0.015))
+
+        first, second = asyncio.run(run())
+        assert first == second == ["event 0", "event 1", "event 2"]
+        assert len(started) == 1
+
+    def test_on_done_runs_when_the_stream_ends_unread(self):
+        """Test that on_done fires when an unread stream ends, and at once on joins."""
+        flight = SingleFlight()
+        done = []
+
+        async def source():
+            yield "event"
+
+        async def run():
+            flight.stream("k", source, lambda: done.append("started"))
+            flight.stream("k", source, lambda: done.append("joined"))
+            assert done == ["joined"]
+            while flight.streaming("k"):
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert done == ["joined", "started"]
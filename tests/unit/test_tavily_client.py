@@ -0,0 +1,105 @@
+"""Unit tests for tavily_client.py."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import tavily_client
+from tavily_client import PooledTavilyAPIWrapper, create_tavily_tool, pooled_connections
+
+
+def _ok(request):
+    body = json.loads(request.content)
+    return httpx.Response(200, json={"query": body["query"], "results": []})
+
+
+@pytest.fixture
+def mock_sync_client(monkeypatch):
+    """Route sync searches to a handler instead of the network."""
+
+    def install(handler):
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(tavily_client, "_sync_client", client)
+        return client
+
+    return install
+
+
+class TestPooledTavilyAPIWrapper:
+    """Tests for PooledTavilyAPIWrapper."""
+
+    def test_sends_search_request_without_empty_params(self, mock_sync_client):
+        """Test that the request matches the Tavily API and drops None values."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return _ok(request)
+
+        mock_sync_client(handler)
+        wrapper = PooledTavilyAPIWrapper(tavily_api_key="test-key")
+        result = wrapper.raw_results(query="ai soc", max_results=5, topic=None)
+
+        assert result["query"] == "ai soc"
+        assert requests[0].url == "https://api.tavily.com/search"
+        assert requests[0].headers["Authorization"] == "Bearer test-key"
+        assert "X-Client-Source" not in requests[0].headers
+        assert json.loads(requests[0].content) == {"query": "ai soc", "max_results": 5}
+
+    def test_error_status_raises(self, mock_sync_client):
+        """Test that an API error surfaces with its status and detail."""
+        mock_sync_client(
+            lambda request: httpx.Response(
+                432, json={"detail": {"error": "Plan limit exceeded"}}
+            )
+        )
+        wrapper = PooledTavilyAPIWrapper(tavily_api_key="test-key")
+
+        with pytest.raises(ValueError, match="432: Plan limit exceeded"):
+            wrapper.raw_results(query="ai soc")
+
+    def test_sync_searches_share_one_client(self, monkeypatch):
+        """Test that sync calls share one pooled client."""
+        monkeypatch.setattr(tavily_client, "_sync_client", None)
+        monkeypatch.setattr(tavily_client, "TAVILY_POOL_SIZE", 7)
+
+        client = tavily_client.sync_client()
+
+        assert tavily_client.sync_client() is client
+        assert client._transport._pool._max_connections == 7
+        client.close()
+
+    def test_async_searches_share_the_open_pool(self, monkeypatch):
+        """Test that async calls use the pool while it is open, and it is closed after."""
+        monkeypatch.setattr(tavily_client, "_sync_client", None)
+        sent = []
+
+        async def handler(request):
+            sent.append(request)
+            return _ok(request)
+
+        async def search():
+            wrapper = PooledTavilyAPIWrapper(tavily_api_key="test-key")
+            async with pooled_connections(size=3) as client:
+                client._transport = httpx.MockTransport(handler)
+                assert tavily_client._async_client is client
+                await wrapper.raw_results_async(query="one")
+                await wrapper.raw_results_async(query="two")
+            return client
+
+        client = asyncio.run(search())
+
+        assert len(sent) == 2
+        assert client.is_closed
+        assert tavily_client._async_client is None
+
+    def test_tool_uses_pooled_wrapper(self, monkeypatch):
+        """Test that the search tool is built on the pooled wrapper."""
+        monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+
+        tool = create_tavily_tool(max_results=3)
+
+        assert isinstance(tool.api_wrapper, PooledTavilyAPIWrapper)
+        assert tool.max_results == 3
@@ -1,11 +1,18 @@
 """Unit tests for tool_executor.py."""
 
-from unittest.mock import MagicMock, Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
-from tool_executor import execute_tools
+from metrics import SEARCH_SECONDS
+from tool_executor import (
+    SEARCH_CONCURRENCY,
+    TimedSearchTool,
+    aexecute_tools,
+    execute_tools,
+)
 
 
 class TestExecuteTools:
@@ -86,7 +93,8 @@ class TestExecuteTools:
         assert all(isinstance(msg, ToolMessage) for msg in result)
         assert all(msg.tool_call_id == "call_456" for msg in result)
         mock_tavily_tool.batch.assert_called_once_with(
-            [{"query": "query1"}, {"query": "query2"}, {"query": "query3"}]
+            [{"query": "query1"}, {"query": "query2"}, {"query": "query3"}],
+            config={"max_concurrency": SEARCH_CONCURRENCY},
         )
 
     @patch("tool_executor.tavily_tool")
@@ -98,8 +106,8 @@ class TestExecuteTools:
             {"id": "call_2", "args": {"search_queries": ["query2"]}},
         ]
 
-        # Each tool call gets its own batch result
-        def batch_side_effect(queries):
+        # Queries from all tool calls go out in one batch
+        def batch_side_effect(queries, config=None):
             # Return one result per query
             return [{"content": f"Result for {q['query']}"} for q in queries]
 
@@ -126,10 +134,13 @@ class TestExecuteTools:
 
         result = execute_tools(messages)
 
-        # Should process all tool calls - each gets one result
+        # Should process all tool calls - each gets its own result back
         assert len(result) == 2
         assert result[0].tool_call_id == "call_1"
         assert result[1].tool_call_id == "call_2"
+        assert "Result for query1" in result[0].content
+        assert "Result for query2" in result[1].content
+        mock_tavily_tool.batch.assert_called_once()
 
     @patch("tool_executor.tavily_tool")
     @patch("tool_executor.parser")
@@ -188,3 +199,177 @@ class TestExecuteTools:
         result = execute_tools(messages)
 
         assert len(result) == 0
+
+    @patch("tool_executor.tavily_tool")
+    @patch("tool_executor.parser")
+    def test_execute_tools_skips_queries_from_earlier_iterations(
+        self, mock_parser, mock_tavily_tool, sample_messages
+    ):
+        """Test that a query already searched earlier is not sent again."""
+        mock_parser.invoke.return_value = [
+            {"id": "call_2", "args": {"search_queries": ["Query1", "new query"]}}
+        ]
+        mock_tavily_tool.batch.return_value = [{"content": "Fresh result"}]
+
+        messages = sample_messages + [
+            ToolMessage(content="Result", tool_call_id="test_call_id_123"),
+            AIMessage(content="", tool_calls=[]),
+        ]
+
+        result = execute_tools(messages)
+
+        mock_tavily_tool.batch.assert_called_once_with(
+            [{"query": "new query"}], config={"max_concurrency": SEARCH_CONCURRENCY}
+        )
+        assert len(result) == 2
+        assert result[0].artifact["duplicate_of"] == "query1"
+        assert "Fresh result" in result[1].content
+
+    @patch("tool_executor.tavily_tool")
+    @patch("tool_executor.parser")
+    def test_execute_tools_numbers_sources_across_iterations(
+        self, mock_parser, mock_tavily_tool, sample_messages
+    ):
+        """Test that source numbers continue from earlier iterations."""
+        mock_parser.invoke.return_value = [
+            {"id": "call_2", "args": {"search_queries": ["new query"]}}
+        ]
+        mock_tavily_tool.batch.return_value = [
+            {
+                "results": [
+                    {"title": "T", "url": "https://example.com/new", "content": "C"}
+                ]
+            }
+        ]
+
+        messages = sample_messages + [
+            ToolMessage(
+                content="[1] ...\n[2] ...",
+                tool_call_id="test_call_id_123",
+                artifact={"query": "query1", "urls": [], "sources": 2},
+            ),
+            AIMessage(content="", tool_calls=[]),
+        ]
+
+        result = execute_tools(messages)
+
+        assert result[0].content.startswith("Search 'new query':\n[3] T")
+        assert result[0].artifact == {
+            "query": "new query",
+            "urls": ["https://example.com/new"],
+            "sources": 1,
+        }
+
+
+class TestAExecuteTools:
+    """Tests for the async aexecute_tools function."""
+
+    @patch("tool_executor.tavily_tool")
+    def test_aexecute_tools_uses_async_batch(self, mock_tavily_tool, sample_messages):
+        """Test that aexecute_tools awaits abatch instead of the blocking batch."""
+        mock_tavily_tool.abatch = AsyncMock(
+            return_value=[{"content": "Result 1"}, {"content": "Result 2"}]
+        )
+
+        result = asyncio.run(aexecute_tools(sample_messages))
+
+        assert len(result) == 2
+        assert all(msg.tool_call_id == "test_call_id_123" for msg in result)
+        mock_tavily_tool.abatch.assert_awaited_once_with(
+            [{"query": "query1"}, {"query": "query2"}],
+            config={"max_concurrency": SEARCH_CONCURRENCY},
+        )
+        mock_tavily_tool.batch.assert_not_called()
+
+    def test_aexecute_tools_continues_when_one_query_fails(
+        self, monkeypatch, stub_search_tool, sample_messages
+    ):
+        """Test that a query failing every retry does not sink the iteration."""
+        import tool_executor
+        from search_resilience import ResilientSearchTool
+
+        healthy_abatch = stub_search_tool.abatch
+
+        async def flaky_abatch(inputs, *args, **kwargs):
+            if inputs[0]["query"] == "query2":
+                raise ConnectionError("connection reset")
+            return await healthy_abatch(inputs, *args, **kwargs)
+
+        stub_search_tool.abatch = flaky_abatch
+        monkeypatch.setattr(
+            tool_executor,
+            "tavily_tool",
+            ResilientSearchTool(stub_search_tool, retries=1, backoff=0.001),
+        )
+
+        result = asyncio.run(aexecute_tools(sample_messages))
+
+        assert len(result) == 2
+        assert "Stub content about query1" in result[0].content
+        assert "connection reset" in result[1].content
+
+    def test_aexecute_tools_searches_all_tool_calls_concurrently(
+        self, monkeypatch, stub_search_tool
+    ):
+        """Test that several tool calls cost one search round trip, in order."""
+        import time
+
+        import tool_executor
+        from search_resilience import ResilientSearchTool
+
+        monkeypatch.setattr(
+            tool_executor, "tavily_tool", ResilientSearchTool(stub_search_tool)
+        )
+        stub_search_tool.latency = 0.1
+        calls = [
+            {
+                "id": f"call_{i}",
+                "args": {"search_queries": [f"topic{i} a", f"topic{i} b"]},
+            }
+            for i in range(3)
+        ]
+        messages = [
+            HumanMessage(content="Test"),
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "AnswerQuestion", "args": call["args"], "id": call["id"]}
+                    for call in calls
+                ],
+            ),
+        ]
+
+        start = time.perf_counter()
+        result = asyncio.run(aexecute_tools(messages))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.25
+        assert [msg.tool_call_id for msg in result] == [
+            "call_0",
+            "call_0",
+            "call_1",
+            "call_1",
+            "call_2",
+            "call_2",
+        ]
+        assert [msg.artifact["query"] for msg in result] == [
+            q for call in calls for q in call["args"]["search_queries"]
+        ]
+
+
+class TestTimedSearchTool:
+    """Tests for per-call search latency."""
+
+    def test_every_upstream_call_is_timed(self, stub_search_tool):
+        """Test that each call is one sample and failed calls are not recorded."""
+        tool = TimedSearchTool(stub_search_tool)
+        before = sum(SEARCH_SECONDS.counts)
+
+        tool.batch([{"query": "a"}])
+        asyncio.run(tool.abatch([{"query": "b"}]))
+        stub_search_tool.abatch = AsyncMock(side_effect=RuntimeError("down"))
+        with pytest.raises(RuntimeError):
+            asyncio.run(tool.abatch([{"query": "c"}]))
+
+        assert sum(SEARCH_SECONDS.counts) == before + 2
+        assert tool.latency == stub_search_tool.latency
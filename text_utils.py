@@ -0,0 +1,43 @@
+"""Small text helpers shared by the caches and the search pipeline."""
+
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+# Interrogatives are not stopwords: "when was X founded" and "where was X
+# founded" are different questions.
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from i in is it me of on or "
+    "please tell that the their there these this those to was will with".split()
+)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache key."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(" \t\n\"'`.,;:!?")
+
+
+def token_set(text: str) -> frozenset:
+    """Return the set of normalized word tokens in ``text``."""
+    return frozenset(_TOKEN.findall(normalize_query(text)))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two token sets (1.0 when both are empty)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for budgeting prompts."""
+    return (len(text) + 3) // 4
+
+
+def content_tokens(text: str) -> frozenset:
+    """Token set of ``text`` without stopwords, for near-duplicate matching."""
+    return token_set(text) - STOPWORDS
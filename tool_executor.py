@@ -1,40 +1,205 @@
-from typing import List
+# Loads .env before any module reads its settings, so it must stay first.
+import env  # noqa: F401  # isort: skip
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
-from langchain_tavily import TavilySearch
 
 from chains import parser
+from lazy import Lazy
+from metrics import SEARCH_QUERIES, SEARCH_RESULTS, SEARCH_SECONDS
+from rate_limit import RateLimitedSearchTool, tavily_limiter
+from replay import wrap_search_tool
 from schemas import AnswerQuestion, Reflection
+from search_cache import CachedSearchTool, SearchCache
+from search_formatting import render_search_result, result_entries, snippet_budget
+from search_history import SearchHistory, duplicate_search_message
+from search_resilience import ResilientSearchTool
 
-load_dotenv()
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", 8))
 
-tavily_tool = TavilySearch(max_results=5)
 
+class TimedSearchTool:
+    """Wrap a search tool to record the latency of every call in ``SEARCH_SECONDS``.
 
-def execute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
-    tool_invocation: AIMessage = state[-1]
-    parsed_tool_calls = parser.invoke(tool_invocation)
+    Sits right on top of the Tavily tool, under the rate limiter, so cache
+    hits and rate-limit waits are not counted. ``ResilientSearchTool`` sends
+    one query per call, so each sample is one attempt at one query; failed
+    and abandoned attempts are not recorded. Only ``batch``/``abatch`` are
+    intercepted; everything else is delegated.
+    """
+
+    def __init__(self, tool: Any):
+        self.tool = tool
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool, name)
+
+    def batch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        started = time.perf_counter()
+        results = self.tool.batch(inputs, *args, **kwargs)
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        return results
+
+    async def abatch(self, inputs: List[Dict[str, Any]], *args, **kwargs) -> List[Any]:
+        started = time.perf_counter()
+        results = await self.tool.abatch(inputs, *args, **kwargs)
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        return results
+
+
+def create_search_tool() -> Any:
+    """Build the live search stack; the Tavily SDK is only imported here."""
+    from tavily_client import create_tavily_tool
+
+    return ResilientSearchTool(
+        RateLimitedSearchTool(
+            TimedSearchTool(create_tavily_tool(max_results=5)), tavily_limiter
+        )
+    )
+
+
+search_cache = SearchCache.from_env()
+tavily_tool = CachedSearchTool(
+    Lazy(lambda: wrap_search_tool(create_search_tool)), search_cache
+)
+
+
+def record_search(results: List[Any]) -> List[Any]:
+    """Record one search batch's query and per-query result counts."""
+    SEARCH_QUERIES.inc(len(results))
+    for result in results:
+        SEARCH_RESULTS.observe(len(result_entries(result)))
+    return results
 
-    tool_messages = []
 
+SearchBatch = Tuple[str, List[Tuple[str, Optional[str]]], List[Any]]
+PlannedCall = Tuple[str, List[Tuple[str, Optional[str]]]]
+
+
+def plan_searches(
+    history: SearchHistory, parsed_tool_calls: List[dict]
+) -> Tuple[List[PlannedCall], List[dict]]:
+    """Plan every tool call's queries and collect the new ones into one batch.
+
+    Returns ``(call_id, planned)`` per tool call, in call order, and the
+    search inputs for all new queries, in call and query order.
+    """
+    calls, inputs = [], []
     for parsed_call in parsed_tool_calls:
-        call_id = parsed_call["id"]
-        search_queries = parsed_call["args"]["search_queries"]
-        results = tavily_tool.batch([{"query": query} for query in search_queries])
+        planned = history.plan(parsed_call["args"]["search_queries"])
+        calls.append((parsed_call["id"], planned))
+        inputs.extend(
+            {"query": query} for query, duplicate_of in planned if not duplicate_of
+        )
+    return calls, inputs
+
+
+def split_results(calls: List[PlannedCall], results: List[Any]) -> List[SearchBatch]:
+    """Hand the flat batch results back to the tool calls that asked for them."""
+    batches, position = [], 0
+    for call_id, planned in calls:
+        count = sum(1 for _, duplicate_of in planned if not duplicate_of)
+        batches.append((call_id, planned, results[position : position + count]))
+        position += count
+    return batches
 
-        # Create ToolMessage for each result
-        for result in results:
+
+def build_tool_messages(
+    history: SearchHistory, batches: List[SearchBatch]
+) -> List[ToolMessage]:
+    """Create one ToolMessage per planned query, in tool-call and query order.
+
+    ``batches`` holds ``(call_id, planned, results)`` for every tool call of
+    the iteration. Duplicate queries get a short pointer to the earlier
+    search, result entries whose URL was already seen are dropped, and the
+    rest is rendered as numbered sources sharing one snippet budget.
+    """
+    collapsed = []
+    for call_id, planned, results in batches:
+        fresh_results = iter(results)
+        for query, duplicate_of in planned:
+            if duplicate_of is not None:
+                collapsed.append((call_id, query, duplicate_of, None, []))
+                continue
+            result = next(fresh_results, None)
+            if result is None:
+                continue
+            result, urls = history.collapse(result)
+            collapsed.append((call_id, query, None, result, urls))
+
+    snippet_chars = snippet_budget(
+        sum(len(result_entries(result)) for *_, result, _ in collapsed)
+    )
+
+    tool_messages = []
+    for call_id, query, duplicate_of, result, urls in collapsed:
+        if duplicate_of is not None:
             tool_messages.append(
                 ToolMessage(
-                    content=str(result),
+                    content=duplicate_search_message(query, duplicate_of),
                     tool_call_id=call_id,
+                    artifact={"query": query, "duplicate_of": duplicate_of},
                 )
             )
+            continue
+
+        content, sources = render_search_result(
+            query, result, history.next_source, snippet_chars
+        )
+        history.next_source += sources
+        tool_messages.append(
+            ToolMessage(
+                content=content,
+                tool_call_id=call_id,
+                artifact={"query": query, "urls": urls, "sources": sources},
+            )
+        )
 
     return tool_messages
 
 
+def execute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
+    """Search every new query of the last message's tool calls in one batch.
+
+    Queries from all tool calls are fanned out together, at most
+    ``SEARCH_CONCURRENCY`` at a time, and the results are mapped back to
+    their tool call in call and query order.
+    """
+    tool_invocation: AIMessage = state[-1]
+    parsed_tool_calls = parser.invoke(tool_invocation)
+    history = SearchHistory.from_messages(state[:-1])
+    calls, inputs = plan_searches(history, parsed_tool_calls)
+
+    results = []
+    if inputs:
+        results = record_search(
+            tavily_tool.batch(inputs, config={"max_concurrency": SEARCH_CONCURRENCY}),
+        )
+
+    return build_tool_messages(history, split_results(calls, results))
+
+
+async def aexecute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
+    """Async counterpart of execute_tools that never blocks the event loop."""
+    tool_invocation: AIMessage = state[-1]
+    parsed_tool_calls = await parser.ainvoke(tool_invocation)
+    history = SearchHistory.from_messages(state[:-1])
+    calls, inputs = plan_searches(history, parsed_tool_calls)
+
+    results = []
+    if inputs:
+        results = record_search(
+            await tavily_tool.abatch(
+                inputs, config={"max_concurrency": SEARCH_CONCURRENCY}
+            ),
+        )
+
+    return build_tool_messages(history, split_results(calls, results))
+
+
 if __name__ == "__main__":
     print("Tool Executor Enter")
 